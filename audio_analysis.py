@@ -1,86 +1,190 @@
 import os
 import subprocess
 import json
+import tempfile
 from pathlib import Path
-import re
+import wave
+
+import numpy as np
+
+from prosody import extract_prosody
+from linguistic import (DEPRESSION_KEYWORDS, FIRST_PERSON_WORDS, NEGATIVE_PATTERNS,
+                        NEGATIVE_WORDS, LinguisticEngine, interpret_speech_score,
+                        speech_recommendation)
+from transcription import (GoogleBackend, format_timestamp, transcribe_segments,
+                           transcript_text)
+
+# Formato do áudio extraído: PCM 16 bits, mono, 16 kHz
+AUDIO_SAMPLE_RATE = 16000
+
+# Tamanho de cada leitura do stdout do ffmpeg
+PIPE_CHUNK_SIZE = 1024 * 1024
+
+
+class DecodedAudio:
+    """Áudio decodificado uma única vez e compartilhado pelas etapas
+
+    Guarda o PCM 16 bits mono em memória; samples é uma view int16 sobre
+    esses bytes (sem cópia). A versão float32 em [-1, 1), usada na análise
+    vocal, é calculada no primeiro uso e reaproveitada.
+    """
+
+    def __init__(self, pcm, sample_rate=AUDIO_SAMPLE_RATE):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.samples = np.frombuffer(pcm, dtype=np.int16)
+        self._float32 = None
+
+    @classmethod
+    def from_video(cls, video_path, sample_rate=AUDIO_SAMPLE_RATE):
+        """Decodifica a trilha de áudio com o ffmpeg, sem arquivo intermediário
+
+        O ffmpeg envia o PCM bruto pelo stdout, lido direto num buffer.
+        Levanta FileNotFoundError sem ffmpeg e CalledProcessError (com a
+        mensagem do ffmpeg em stderr) se a extração falhar.
+        """
+        command = [
+            'ffmpeg',
+            '-nostdin',
+            '-loglevel', 'error',  # só erros no stderr (evita encher o pipe)
+            '-i', video_path,
+            '-vn',  # sem vídeo
+            '-acodec', 'pcm_s16le',  # codec de áudio
+            '-ar', str(sample_rate),  # taxa de amostragem
+            '-ac', '1',  # mono
+            '-f', 's16le',  # PCM bruto, sem cabeçalho WAV
+            '-'  # saída no stdout
+        ]
+
+        # O stderr vai para um arquivo temporário: com os dois num pipe, um
+        # ffmpeg que escreve muito no stderr trava enquanto o stdout é lido
+        pcm = bytearray()
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=stderr_file)
+            with process:
+                for chunk in iter(lambda: process.stdout.read(PIPE_CHUNK_SIZE), b''):
+                    pcm += chunk
+            stderr_file.seek(0)
+            errors = stderr_file.read()
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stderr=errors)
+
+        # Descarta um eventual byte final incompleto
+        del pcm[len(pcm) - len(pcm) % 2:]
+        return cls(pcm, sample_rate)
+
+    @classmethod
+    def from_wav(cls, wav_path, sample_rate=AUDIO_SAMPLE_RATE):
+        """Lê um WAV PCM 16 bits já na taxa sample_rate (canais múltiplos são
+        misturados em mono)
+
+        Levanta ValueError para outra largura de amostra ou outra taxa (não
+        há reamostragem aqui) e wave.Error para WAV que não é PCM.
+        """
+        with wave.open(wav_path, 'rb') as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"WAV não suportado (precisa ser PCM 16 bits): {wav_path}")
+            if f.getframerate() != sample_rate:
+                raise ValueError(f"WAV não suportado (precisa ter {sample_rate} Hz): {wav_path}")
+            channels = f.getnchannels()
+            pcm = f.readframes(f.getnframes())
+
+        if channels > 1:
+            samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+            pcm = samples.mean(axis=1).round().astype(np.int16).tobytes()
+
+        return cls(pcm, sample_rate)
+
+    def segment(self, start, end):
+        """Trecho [start, end) em amostras, sobre o mesmo buffer (sem cópia)"""
+        return DecodedAudio(memoryview(self.pcm)[start * 2:end * 2],
+                            self.sample_rate)
+
+    @property
+    def duration(self):
+        """Duração em segundos"""
+        return len(self.samples) / self.sample_rate
+
+    def as_float32(self):
+        """Amostras em float32 no intervalo [-1, 1), como o librosa.load"""
+        if self._float32 is None:
+            # Conversão e escala no mesmo array (sem temporário extra)
+            self._float32 = self.samples.astype(np.float32)
+            self._float32 /= 32768.0
+        return self._float32
+
+    def to_audio_data(self):
+        """AudioData do SpeechRecognition sobre o mesmo buffer PCM"""
+        import speech_recognition as sr
+        return sr.AudioData(self.pcm, self.sample_rate, 2)
 
 
 class AudioAnalyzer:
     """Análise de áudio para detectar sinais de depressão na fala"""
 
-    def __init__(self, video_path):
+    def __init__(self, video_path, backend=None, transcription_workers=4,
+                 linguistic_window=60.0):
         self.video_path = video_path
-        self.audio_path = None
+
+        # Duração (s) das janelas da série de scores linguísticos
+        self.linguistic_window = linguistic_window
+
+        # Backend de transcrição (ver transcription.py); None usa o Google
+        self.backend = backend
+        self.transcription_workers = transcription_workers
+
+        # Áudio decodificado por extract_audio (DecodedAudio), usado pela
+        # transcrição e pela análise vocal
+        self.audio = None
         self.results = {
             'transcricao': '',
+            'segmentos': [],
             'palavras_chave_depressao': [],
             'score_depressao_fala': 0,
             'indicadores_linguisticos': [],
             'caracteristicas_voz': {}
         }
 
-        # Palavras e frases indicadoras de depressão
-        self.depression_keywords = [
-            # Sentimentos negativos
-            'triste', 'tristeza', 'deprimido', 'deprimida', 'deprimente',
-            'sozinho', 'sozinha', 'solidão', 'vazio', 'vazia',
-            'desesperado', 'desesperada', 'sem esperança', 'desespero',
-            'cansado', 'cansada', 'exausto', 'exausta', 'esgotado', 'esgotada',
-
-            # Pensamentos negativos
-            'não consigo', 'não aguento', 'não dá mais',
-            'sem sentido', 'sem propósito', 'inútil',
-            'fracasso', 'fracassado', 'fracassada',
-            'culpa', 'culpado', 'culpada',
-
-            # Isolamento
-            'ninguém entende', 'ninguém se importa', 'sozinho no mundo',
-            'me afastar', 'isolar', 'isolamento',
-
-            # Sintomas físicos
-            'não durmo', 'insônia', 'não como', 'sem apetite',
-            'dor', 'corpo pesado', 'sem energia',
-
-            # Ideação
-            'desistir', 'acabar com tudo', 'sumir',
-
-            # Emoções
-            'angústia', 'ansiedade', 'medo', 'pavor',
-            'choro', 'chorando', 'chorar'
-        ]
+        # Termos da análise linguística (cópias das listas padrão de
+        # linguistic.py)
+        self.depression_keywords = list(DEPRESSION_KEYWORDS)
+        self.negative_words = list(NEGATIVE_WORDS)
+        self.first_person_words = list(FIRST_PERSON_WORDS)
+        self.negative_patterns = dict(NEGATIVE_PATTERNS)
 
-        # Padrões linguísticos
-        self.negative_patterns = [
-            r'\bnão\s+\w+',  # negações
-            r'\bnunca\b',
-            r'\bnada\b',
-            r'\bsempre\s+(triste|mal|cansado|sozinho)',
-        ]
+        # Todos os termos acima compilados uma vez (ver linguistic.py)
+        self.linguistic = LinguisticEngine(
+            self.depression_keywords, self.negative_words,
+            self.first_person_words, self.negative_patterns)
 
     def extract_audio(self):
-        """Extrai áudio do vídeo"""
+        """Decodifica o áudio do vídeo uma única vez, em memória
+
+        O PCM (16 bits, mono, 16 kHz) vem do ffmpeg pelo stdout; nenhum
+        arquivo é gravado. Um .wav PCM 16 bits a 16 kHz é lido diretamente,
+        sem ffmpeg; qualquer outro WAV (outra taxa, 24 bits, float, µ-law)
+        passa pelo ffmpeg, que o converte para o mesmo formato.
+        """
+        audio = None
+        if self.video_path.lower().endswith('.wav'):
+            try:
+                audio = DecodedAudio.from_wav(self.video_path)
+            except (wave.Error, EOFError, ValueError, OSError):
+                # Formato que só o ffmpeg converte (ou arquivo ilegível, cujo
+                # erro o ffmpeg informa)
+                audio = None
+
         try:
-            audio_path = self.video_path.replace('.mp4', '_audio.wav')
-
-            # Usa ffmpeg para extrair áudio
-            command = [
-                'ffmpeg',
-                '-i', self.video_path,
-                '-vn',  # sem vídeo
-                '-acodec', 'pcm_s16le',  # codec de áudio
-                '-ar', '16000',  # taxa de amostragem
-                '-ac', '1',  # mono
-                '-y',  # sobrescreve
-                audio_path
-            ]
-
-            subprocess.run(command, check=True, capture_output=True)
-            self.audio_path = audio_path
-            print(f"Áudio extraído: {audio_path}")
-            return True
+            if audio is None:
+                audio = DecodedAudio.from_video(self.video_path)
+            self.audio = audio
 
         except subprocess.CalledProcessError as e:
-            print(f"Erro ao extrair áudio: {e}")
+            message = (e.stderr or b'').decode('utf-8', errors='replace').strip()
+            print(f"Erro ao extrair áudio: {message or e}")
             return False
         except FileNotFoundError:
             print("AVISO: ffmpeg não encontrado. Instalando dependências necessárias...")
@@ -88,140 +192,109 @@ class AudioAnalyzer:
                 "Por favor, instale o ffmpeg manualmente ou use: pip install imageio-ffmpeg")
             return False
 
+        print(f"Áudio extraído para a memória: {self.audio.duration:.1f} s")
+        return True
+
     def transcribe_audio(self):
-        """Transcreve o áudio usando speech recognition"""
-        if not self.audio_path or not os.path.exists(self.audio_path):
+        """Transcreve a fala, trecho a trecho, com timestamps
+
+        O áudio é dividido em falas por detecção de atividade de voz e as
+        falas são transcritas em paralelo pelo backend configurado (ver
+        transcription.py). Os trechos ficam em results['segmentos'].
+        """
+        if self.audio is None:
             print("Áudio não encontrado. Extraindo áudio primeiro...")
             if not self.extract_audio():
                 return ""
 
-        try:
-            import speech_recognition as sr
-
-            recognizer = sr.Recognizer()
-
-            # Lê o arquivo de áudio
-            with sr.AudioFile(self.audio_path) as source:
-                print("Carregando áudio...")
-                audio = recognizer.record(source)
-
-            print("Transcrevendo áudio (isso pode levar alguns minutos)...")
-
-            # Tenta transcrever usando o Google Speech Recognition (gratuito)
+        backend = self.backend
+        if backend is None:
             try:
-                text = recognizer.recognize_google(audio, language='pt-BR')
-                self.results['transcricao'] = text
-                print("Transcrição concluída!")
-                return text
-            except sr.UnknownValueError:
-                print("Não foi possível entender o áudio.")
-                return ""
-            except sr.RequestError as e:
-                print(f"Erro no serviço de reconhecimento: {e}")
+                backend = GoogleBackend(language='pt-BR')
+            except ImportError:
+                print("AVISO: SpeechRecognition não instalado.")
+                print("Para análise de áudio, instale: pip install SpeechRecognition")
                 return ""
 
-        except ImportError:
-            print("AVISO: SpeechRecognition não instalado.")
-            print("Para análise de áudio, instale: pip install SpeechRecognition")
-            return ""
-        except Exception as e:
-            print(f"Erro na transcrição: {e}")
+        print("Transcrevendo áudio (isso pode levar alguns minutos)...")
+        segments = transcribe_segments(
+            self.audio, backend, self.transcription_workers)
+        self.results['segmentos'] = segments
+
+        errors = [s['erro'] for s in segments if 'erro' in s]
+        if errors:
+            print(f"Erro no serviço de reconhecimento em {len(errors)} de "
+                  f"{len(segments)} trechos: {errors[0]}")
+
+        text = transcript_text(segments)
+        if not text:
+            print("Não foi possível entender o áudio.")
             return ""
 
-    def analyze_text_for_depression(self, text):
-        """Analisa o texto transcrito para sinais de depressão"""
+        self.results['transcricao'] = text
+        print(f"Transcrição concluída! ({len(segments)} trechos de fala)")
+        return text
+
+    def analyze_text_for_depression(self, text, segments=None):
+        """Analisa o texto transcrito para sinais de depressão
+
+        Palavras-chave, negações, primeira pessoa e padrões negativos são
+        contados numa única passada pelas palavras do texto, sem diferenciar
+        acentos e só como palavras inteiras (ver linguistic.py); as posições
+        de cada palavra-chave ficam em results['ocorrencias_palavras_chave'].
+        Com os trechos da transcrição (segments), registra também em que
+        trechos as palavras-chave aparecem e a série de scores por janela
+        de linguistic_window segundos (results['serie_linguistica']).
+        """
         if not text:
             return
 
-        text_lower = text.lower()
-        score = 0
-        found_keywords = []
-        indicators = []
-
-        # Procura palavras-chave
-        for keyword in self.depression_keywords:
-            if keyword in text_lower:
-                found_keywords.append(keyword)
-                score += 2
-
-        # Analisa padrões linguísticos
-        for pattern in self.negative_patterns:
-            matches = re.findall(pattern, text_lower)
-            if matches:
-                indicators.append(f"Padrão negativo: {pattern}")
-                score += len(matches)
-
-        # Analisa tom geral
-        negative_words = ['não', 'nunca', 'nada', 'nenhum', 'nem']
-        negative_count = sum(text_lower.count(word) for word in negative_words)
-
-        if negative_count > 5:
-            indicators.append("Alto uso de palavras negativas")
-            score += negative_count * 0.5
-
-        # Analisa primeira pessoa (foco em si mesmo)
-        first_person = ['eu', 'me', 'meu', 'minha', 'mim']
-        first_person_count = sum(text_lower.count(word)
-                                 for word in first_person)
-
-        if first_person_count > 10:
-            indicators.append(
-                "Foco excessivo em si mesmo (possível ruminação)")
-            score += 2
-
-        self.results['palavras_chave_depressao'] = found_keywords
-        self.results['score_depressao_fala'] = score
-        self.results['indicadores_linguisticos'] = indicators
+        # Trechos de outra transcrição não servem de linha do tempo
+        if segments and transcript_text(segments) != text:
+            segments = None
 
-    def analyze_audio_features(self):
-        """Analisa características vocais (tom, velocidade, etc.)"""
-        # Esta funcionalidade requer bibliotecas mais avançadas como librosa
-        # Por enquanto, retorna um placeholder
-        try:
-            import librosa
-            import numpy as np
+        analysis = self.linguistic.analyze(text, segments, self.linguistic_window)
 
-            if not self.audio_path or not os.path.exists(self.audio_path):
-                return
+        self.results['palavras_chave_depressao'] = analysis['palavras_chave']
+        self.results['ocorrencias_palavras_chave'] = analysis['ocorrencias_palavras_chave']
+        self.results['score_depressao_fala'] = analysis['score']
+        self.results['indicadores_linguisticos'] = analysis['indicadores']
+        self.results['contadores_linguisticos'] = analysis['contadores']
 
-            # Carrega áudio
-            y, sr = librosa.load(self.audio_path, sr=16000)
+        if segments:
+            self.results['trechos_palavras_chave'] = analysis['trechos_palavras_chave']
+            self.results['serie_linguistica'] = analysis['serie']
 
-            # Analisa características
-            # Pitch (tom)
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-            pitch_mean = np.mean(pitches[pitches > 0])
+    def analyze_audio_features(self):
+        """Analisa características vocais (tom, energia, pausas, velocidade)
 
-            # Energia
-            energy = np.sum(librosa.feature.rms(y=y))
+        O áudio é processado em blocos de tamanho fixo (ver prosody.py): a
+        memória usada não cresce com a duração da gravação.
+        """
+        if self.audio is None:
+            return
 
-            # Taxa de zero crossing (pode indicar qualidade/emoção da voz)
-            zcr = np.mean(librosa.feature.zero_crossing_rate(y))
+        try:
+            features = extract_prosody(self.audio.samples, self.audio.sample_rate)
+        except Exception as e:
+            print(f"Erro na análise de características vocais: {e}")
+            return
 
-            self.results['caracteristicas_voz'] = {
-                'pitch_medio': float(pitch_mean) if not np.isnan(pitch_mean) else 0,
-                'energia': float(energy),
-                'zero_crossing_rate': float(zcr)
-            }
+        self.results['caracteristicas_voz'] = features
 
-            # Interpretação
-            if pitch_mean < 120:
-                self.results['indicadores_linguisticos'].append(
-                    "Tom de voz baixo (pode indicar baixa energia/tristeza)"
-                )
-                self.results['score_depressao_fala'] += 1
+        # Interpretação pela mediana do F0, menos sensível a erros de oitava
+        # isolados (sem pitch medido, o tom não é avaliado)
+        if 0 < features['pitch_mediana'] < 120:
+            self.results['indicadores_linguisticos'].append(
+                "Tom de voz baixo (pode indicar baixa energia/tristeza)"
+            )
+            self.results['score_depressao_fala'] += 1
 
-            if energy < 100:
-                self.results['indicadores_linguisticos'].append(
-                    "Baixa energia vocal"
-                )
-                self.results['score_depressao_fala'] += 1
-
-        except ImportError:
-            print("AVISO: librosa não instalado. Análise vocal avançada desabilitada.")
-            print("Para análise vocal, instale: pip install librosa")
-        except Exception as e:
-            print(f"Erro na análise de características vocais: {e}")
+        if features['energia'] < 100:
+            self.results['indicadores_linguisticos'].append(
+                "Baixa energia vocal"
+            )
+            self.results['score_depressao_fala'] += 1
 
     def analyze(self, transcription_text=None):
         """Executa análise completa do áudio"""
@@ -241,7 +314,8 @@ class AudioAnalyzer:
         # Analisa texto
         if transcription_text:
             print("\nAnalisando conteúdo da fala...")
-            self.analyze_text_for_depression(transcription_text)
+            self.analyze_text_for_depression(
+                transcription_text, self.results['segmentos'])
 
             # Analisa características vocais
             print("Analisando características vocais...")
@@ -256,12 +330,17 @@ class AudioAnalyzer:
         report = {
             'arquivo_analisado': self.video_path,
             'transcricao': self.results['transcricao'],
+            'segmentos': self.results['segmentos'],
             'analise_fala': {
                 'score_depressao': self.results['score_depressao_fala'],
                 'nivel': self._interpret_speech_score(
                     self.results['score_depressao_fala']
                 ),
                 'palavras_chave_encontradas': self.results['palavras_chave_depressao'],
+                'ocorrencias_palavras_chave': self.results.get('ocorrencias_palavras_chave', {}),
+                'trechos_palavras_chave': self.results.get('trechos_palavras_chave', []),
+                'serie_linguistica': self.results.get('serie_linguistica'),
+                'contadores_linguisticos': self.results.get('contadores_linguisticos', {}),
                 'indicadores_linguisticos': self.results['indicadores_linguisticos'],
                 'caracteristicas_voz': self.results['caracteristicas_voz'],
                 'recomendacao': self._get_speech_recommendation(
@@ -282,21 +361,11 @@ class AudioAnalyzer:
 
     def _interpret_speech_score(self, score):
         """Interpreta o score de depressão na fala"""
-        if score < 5:
-            return 'Baixo - Poucos indicadores na fala'
-        elif score < 15:
-            return 'Moderado - Alguns indicadores presentes'
-        else:
-            return 'Alto - Múltiplos indicadores de depressão na fala'
+        return interpret_speech_score(score)
 
     def _get_speech_recommendation(self, score):
         """Retorna recomendação baseada na análise de fala"""
-        if score < 5:
-            return 'Não foram detectados sinais significativos de depressão na fala.'
-        elif score < 15:
-            return 'Alguns indicadores linguísticos sugerem possível tristeza ou desânimo. Recomenda-se atenção e diálogo.'
-        else:
-            return 'ATENÇÃO: Múltiplos indicadores de depressão detectados na fala. Recomenda-se URGENTEMENTE avaliação profissional de saúde mental. CVV: 188 (24h)'
+        return speech_recommendation(score)
 
     def _generate_text_report(self, report, output_path):
         """Gera relatório em texto"""
@@ -310,7 +379,14 @@ class AudioAnalyzer:
             f.write("-"*80 + "\n")
             f.write("TRANSCRIÇÃO\n")
             f.write("-"*80 + "\n")
-            if report['transcricao']:
+            if report.get('segmentos'):
+                for segment in report['segmentos']:
+                    if segment['texto']:
+                        f.write(f"[{format_timestamp(segment['inicio'])} - "
+                                f"{format_timestamp(segment['fim'])}] "
+                                f"{segment['texto']}\n")
+                f.write("\n")
+            elif report['transcricao']:
                 f.write(report['transcricao'] + "\n\n")
             else:
                 f.write("Transcrição não disponível.\n\n")
@@ -323,13 +399,35 @@ class AudioAnalyzer:
 
             if report['analise_fala']['palavras_chave_encontradas']:
                 f.write("Palavras-chave relacionadas à depressão encontradas:\n")
+                occurrences = report['analise_fala'].get('ocorrencias_palavras_chave', {})
                 for palavra in report['analise_fala']['palavras_chave_encontradas'][:10]:
-                    f.write(f"  • {palavra}\n")
+                    count = len(occurrences.get(palavra, []))
+                    f.write(f"  • {palavra}" + (f" ({count}x)" if count else "") + "\n")
                 if len(report['analise_fala']['palavras_chave_encontradas']) > 10:
                     f.write(
                         f"  ... e mais {len(report['analise_fala']['palavras_chave_encontradas']) - 10}\n")
                 f.write("\n")
 
+            if report['analise_fala'].get('trechos_palavras_chave'):
+                f.write("Trechos com palavras-chave:\n")
+                for trecho in report['analise_fala']['trechos_palavras_chave']:
+                    f.write(f"  • {format_timestamp(trecho['inicio'])} - "
+                            f"{format_timestamp(trecho['fim'])}: "
+                            f"{', '.join(trecho['palavras_chave'])}\n")
+                f.write("\n")
+
+            series = report['analise_fala'].get('serie_linguistica')
+            if series and any(w['score'] for w in series['janelas']):
+                f.write(f"Score linguístico por janela de {series['janela_s']:g} s "
+                        "(só janelas com indicadores):\n")
+                for janela in series['janelas']:
+                    if janela['score']:
+                        keywords = ', '.join(janela['palavras_chave'])
+                        f.write(f"  • {format_timestamp(janela['inicio'])} - "
+                                f"{format_timestamp(janela['fim'])}: {janela['score']:g}"
+                                + (f" ({keywords})" if keywords else "") + "\n")
+                f.write("\n")
+
             if report['analise_fala']['indicadores_linguisticos']:
                 f.write("Indicadores Linguísticos:\n")
                 for ind in report['analise_fala']['indicadores_linguisticos']:
@@ -0,0 +1,210 @@
+"""
+Análise em lote de vídeos
+
+Analisa todos os vídeos de um diretório (ou de um padrão glob) com o
+IntegratedAnalyzer, distribuindo os vídeos entre processos. Cada vídeo gera
+relatórios com nome próprio, e um manifesto registra os vídeos concluídos
+para que um lote interrompido possa ser retomado sem refazer o que já foi
+analisado.
+
+Uso:
+    python batch_analysis.py data/ --workers 4 --output-dir relatorios
+    python batch_analysis.py "data/**/*.mp4" --sample-rate 60
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+MANIFEST_NAME = 'manifesto_lote.json'
+
+
+def find_videos(inputs, extensions=VIDEO_EXTENSIONS):
+    """Lista os vídeos a partir de diretórios, arquivos ou padrões glob"""
+    videos = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, '**', '*'), recursive=True)
+        else:
+            candidates = glob.glob(item, recursive=True)
+
+        for path in sorted(candidates):
+            if os.path.isfile(path) and path.lower().endswith(extensions):
+                videos.append(os.path.abspath(path))
+
+    # Remove duplicados mantendo a ordem
+    return list(dict.fromkeys(videos))
+
+
+def report_prefix(video_path):
+    """Prefixo único dos relatórios de um vídeo: <nome>_<hash do caminho>_"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    digest = hashlib.sha1(video_path.encode('utf-8')).hexdigest()[:8]
+    return f"{stem}_{digest}_"
+
+
+def _file_signature(video_path):
+    """Tamanho e data de modificação, para detectar vídeos alterados"""
+    stat = os.stat(video_path)
+    return {'tamanho': stat.st_size, 'modificado_em': stat.st_mtime}
+
+
+class BatchManifest:
+    """Manifesto do lote: registra o estado de cada vídeo em JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('videos', {})
+
+    def is_done(self, video_path):
+        """Vídeo já concluído, inalterado e com relatório ainda presente"""
+        entry = self.entries.get(video_path)
+        if not entry or entry.get('status') != 'concluido':
+            return False
+        if not os.path.exists(entry.get('relatorio', '')):
+            return False
+        try:
+            signature = _file_signature(video_path)
+        except OSError:
+            return False
+        return (entry.get('tamanho') == signature['tamanho']
+                and entry.get('modificado_em') == signature['modificado_em'])
+
+    def record(self, video_path, entry):
+        """Registra o resultado de um vídeo e grava o manifesto"""
+        self.entries[video_path] = entry
+        self.save()
+
+    def save(self):
+        """Grava de forma atômica (arquivo temporário + rename)"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'atualizado_em': datetime.now().isoformat(),
+                       'videos': self.entries},
+                      f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def analyze_one(video_path, output_dir, sample_rate=30):
+    """Executado no processo filho: análise integrada de um vídeo
+
+    A saída de texto da análise vai para um arquivo .log ao lado dos
+    relatórios, para não misturar a saída dos vários processos.
+    """
+    from main_analysis import IntegratedAnalyzer
+
+    prefix = report_prefix(video_path)
+    log_path = os.path.join(output_dir, prefix + 'analise.log')
+    start = time.time()
+
+    with open(log_path, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        analyzer = IntegratedAnalyzer(video_path, output_dir, prefix)
+        results = analyzer.analyze(sample_rate=sample_rate)
+
+    integrated = results['analise_integrada']
+    return {
+        'status': 'concluido',
+        'relatorio': os.path.join(output_dir, prefix + 'RELATORIO_FINAL_INTEGRADO.json'),
+        'log': log_path,
+        'duracao_s': round(time.time() - start, 2),
+        'nivel_depressao': integrated['depressao']['nivel_risco'],
+        'nivel_hematomas': integrated['violencia_domestica']['nivel_risco'],
+        'concluido_em': datetime.now().isoformat()
+    }
+
+
+def run_batch(inputs, output_dir='relatorios', workers=2, sample_rate=30,
+              manifest_path=None, force=False):
+    """Analisa os vídeos em lote e retorna o manifesto atualizado"""
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = BatchManifest(
+        manifest_path or os.path.join(output_dir, MANIFEST_NAME))
+
+    videos = find_videos(inputs)
+    pending = [v for v in videos if force or not manifest.is_done(v)]
+
+    print(f"Vídeos encontrados: {len(videos)}")
+    print(f"Já concluídos (pulados): {len(videos) - len(pending)}")
+    print(f"A analisar: {len(pending)} (processos: {workers})")
+
+    if not pending:
+        return manifest
+
+    completed = 0
+    failed = 0
+
+    # 'spawn' evita herdar por fork o estado de threads do MediaPipe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {
+            pool.submit(analyze_one, video, output_dir, sample_rate): video
+            for video in pending
+        }
+
+        for future in as_completed(futures):
+            video = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {'status': 'erro', 'erro': str(e)}
+
+            try:
+                entry.update(_file_signature(video))
+            except OSError as e:
+                # Vídeo removido ou ilegível durante o lote: registra o erro
+                # e segue com os demais
+                entry = {'status': 'erro', 'erro': f"Vídeo inacessível: {e}"}
+
+            if entry['status'] == 'concluido':
+                completed += 1
+                print(f"✓ [{completed + failed}/{len(pending)}] {video} "
+                      f"({entry['duracao_s']}s)")
+            else:
+                failed += 1
+                print(f"✗ [{completed + failed}/{len(pending)}] {video}: {entry['erro']}")
+
+            manifest.record(video, entry)
+
+    print(f"\nConcluídos: {completed}, Erros: {failed}")
+    print(f"Manifesto: {manifest.path}")
+    return manifest
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description='Análise integrada em lote de vídeos')
+    parser.add_argument('inputs', nargs='+',
+                        help='Diretórios, arquivos ou padrões glob de vídeos')
+    parser.add_argument('--output-dir', default='relatorios',
+                        help='Diretório dos relatórios (padrão: relatorios)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Número de processos (padrão: 2)')
+    parser.add_argument('--sample-rate', type=int, default=30,
+                        help='Analisa 1 frame a cada N (padrão: 30)')
+    parser.add_argument('--manifest',
+                        help=f'Arquivo de manifesto (padrão: <output-dir>/{MANIFEST_NAME})')
+    parser.add_argument('--force', action='store_true',
+                        help='Reanalisa também os vídeos já concluídos')
+    args = parser.parse_args()
+
+    run_batch(args.inputs, args.output_dir, args.workers, args.sample_rate,
+              args.manifest, args.force)
+
+
+if __name__ == "__main__":
+    main()
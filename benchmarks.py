@@ -0,0 +1,273 @@
+"""
+Micro-benchmarks das otimizações do sistema de análise
+
+Uso:
+    python benchmarks.py color-masks
+    python benchmarks.py haar data/video.mp4
+    python benchmarks.py pitch --minutes 30
+    python benchmarks.py imports
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def _best_time(func, repeat=7, number=50):
+    """Menor tempo médio por chamada (em segundos) entre as repetições"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def bench_color_masks(args):
+    """Classificador de cor por LUT vs. cv2.inRange por faixa"""
+    import cv2
+    import numpy as np
+    from color_classifier import DEFAULT_COLOR_CLASSIFIER, reference_masks
+
+    # Conferência exaustiva: todas as 2^24 combinações HSV de 8 bits
+    all_values = np.arange(256, dtype=np.uint8)
+    h, s, v = np.meshgrid(all_values, all_values, all_values, indexing='ij')
+    every_hsv = np.stack([h, s, v], axis=-1).reshape(4096, 4096, 3)
+    expected = reference_masks(every_hsv)
+    got = DEFAULT_COLOR_CLASSIFIER.classify(every_hsv)
+    identical = all(np.array_equal(a, b) for a, b in zip(expected, got))
+    print(f"Máscaras idênticas em todas as cores HSV: {'sim' if identical else 'NÃO'}")
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'ROI':>10} {'inRange (ms)':>14} {'LUT (ms)':>10} {'ganho':>7}")
+    for size in (160, 320, 480, 720):
+        # Imagem suave (gradientes + ruído), parecida com uma região de pele
+        base = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+        bgr = cv2.resize(base, (size, size), interpolation=cv2.INTER_CUBIC)
+        bgr = cv2.add(bgr, rng.integers(0, 20, bgr.shape, dtype=np.uint8))
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+
+        t_ref = _best_time(lambda: reference_masks(hsv), args.repeat)
+        t_lut = _best_time(lambda: DEFAULT_COLOR_CLASSIFIER.classify(hsv), args.repeat)
+        print(f"{size:>4}x{size:<5} {t_ref * 1e3:>14.3f} {t_lut * 1e3:>10.3f} "
+              f"{t_ref / t_lut:>6.1f}x")
+
+
+def bench_haar(args):
+    """Detecção Haar completa vs. em pirâmide, em 720p e 1080p"""
+    import cv2
+    from haar_detection import PyramidHaarDetector
+
+    face_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    eye_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + 'haarcascade_eye.xml')
+
+    cap = cv2.VideoCapture(args.video)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in range(0, max(total, 1), max(1, total // args.frames)):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+
+    if not frames:
+        print(f"ERRO: Não foi possível ler frames de {args.video}")
+        return
+
+    def full(gray):
+        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+        eyes = sum(len(eye_cascade.detectMultiScale(gray[y:y+h, x:x+w]))
+                   for x, y, w, h in faces)
+        return len(faces), eyes
+
+    def pyramid(detector, gray):
+        faces = detector.detect_faces(face_cascade, gray)
+        eyes = sum(len(detector.detect_eyes(eye_cascade, gray[y:y+h, x:x+w]))
+                   for x, y, w, h in faces)
+        return len(faces), eyes
+
+    print(f"Frames: {len(frames)} de {args.video}")
+    print(f"\n{'resolução':>10} {'modo':>9} {'ms/frame':>9} {'faces':>6} {'olhos':>6}")
+    for width, height in ((1280, 720), (1920, 1080)):
+        scaled = [cv2.resize(gray, (width, height)) for gray in frames]
+        modes = (('completo', full),
+                 ('pirâmide', lambda gray, d=PyramidHaarDetector(): pyramid(d, gray)))
+        for name, detect in modes:
+            start = time.perf_counter()
+            counts = [detect(gray) for gray in scaled]
+            elapsed = (time.perf_counter() - start) / len(scaled)
+            print(f"{height:>9}p {name:>9} {elapsed * 1e3:>9.1f} "
+                  f"{sum(c[0] for c in counts):>6} {sum(c[1] for c in counts):>6}")
+
+
+def _synthetic_voice(minutes, sample_rate, seed=0):
+    """Voz sintética (int16) com F0 conhecido, pausas e ruído de fundo
+
+    Retorna o sinal e o F0 verdadeiro em cada amostra (0 nas pausas).
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * sample_rate)) / sample_rate
+    # F0 entre 90 e 210 Hz, variando devagar como a entonação
+    f0 = 150 + 60 * np.sin(2 * np.pi * t / 7.3) * np.sin(2 * np.pi * t / 31)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 6):
+        signal += np.sin(harmonic * phase) / harmonic
+    del phase
+
+    # Falas de 1,5 a 4 s separadas por pausas de 0,3 a 1,2 s
+    voiced = np.zeros(len(t), dtype=bool)
+    position = 0
+    while position < len(t):
+        length = int(rng.uniform(1.5, 4.0) * sample_rate)
+        voiced[position:position + length] = True
+        position += length + int(rng.uniform(0.3, 1.2) * sample_rate)
+
+    signal *= 0.3 * voiced
+    signal += 0.002 * rng.standard_normal(len(t))
+    pcm = (signal * 32767).astype(np.int16)
+    return pcm, np.where(voiced, f0, 0)
+
+
+def bench_pitch(args):
+    """Pitch por librosa.piptrack no sinal inteiro vs. YIN nos quadros de fala"""
+    import numpy as np
+    from prosody import extract_prosody
+
+    sample_rate = 16000
+    pcm, true_f0 = _synthetic_voice(args.minutes, sample_rate)
+    voiced = true_f0[true_f0 > 0]
+    truth = (voiced.mean(), np.median(voiced), voiced.var())
+    del true_f0, voiced
+    print(f"Sinal: {args.minutes:g} min a {sample_rate} Hz "
+          f"(F0 real: média {truth[0]:.1f} Hz, mediana {truth[1]:.1f} Hz, "
+          f"variância {truth[2]:.0f} Hz²)")
+
+    start = time.perf_counter()
+    features = extract_prosody(pcm, sample_rate)
+    t_yin = time.perf_counter() - start
+    yin = (features['pitch_medio'], features['pitch_mediana'],
+           features['pitch_variancia'])
+
+    try:
+        import librosa
+    except ImportError:
+        print("AVISO: librosa não instalado. Só o YIN foi medido.")
+        print(f"YIN: {t_yin:.1f} s (média {yin[0]:.1f} Hz, mediana {yin[1]:.1f} Hz)")
+        return
+
+    # Cálculo anterior: piptrack no sinal inteiro e média das posições > 0
+    start = time.perf_counter()
+    y = pcm.astype(np.float32) / 32768.0
+    pitches, _ = librosa.piptrack(y=y, sr=sample_rate)
+    positive = pitches[pitches > 0]
+    piptrack = (positive.mean(), np.median(positive), positive.var())
+    t_piptrack = time.perf_counter() - start
+    del y, pitches, positive
+
+    print(f"\n{'método':>10} {'tempo (s)':>10} {'média':>8} {'mediana':>8} "
+          f"{'variância':>10} {'erro média':>11}")
+    for name, elapsed, (mean, median, variance) in (
+            ('piptrack', t_piptrack, piptrack), ('YIN', t_yin, yin)):
+        print(f"{name:>10} {elapsed:>10.1f} {mean:>8.1f} {median:>8.1f} "
+              f"{variance:>10.0f} {abs(mean - truth[0]):>11.1f}")
+    print(f"\nGanho: {t_piptrack / t_yin:.1f}x (o YIN inclui energia, pausas, "
+          f"taxa de fala e cruzamentos por zero)")
+
+
+# Dependências pesadas que só devem ser carregadas no primeiro uso
+HEAVY_MODULES = ('mediapipe', 'matplotlib', 'librosa', 'speech_recognition', 'cv2')
+
+# Módulos do sistema medidos em bench_imports
+PROJECT_MODULES = ('main_analysis', 'video_analysis', 'simple_video_analysis',
+                   'audio_analysis', 'streaming_analysis', 'feature_store',
+                   'batch_analysis', 'bulk_scoring')
+
+# Pasta do projeto (os módulos e comandos são medidos a partir dela)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Comandos medidos em bench_imports (tempo até sair do --help)
+HELP_COMMANDS = ('main_analysis.py', 'batch_analysis.py', 'streaming_analysis.py',
+                 'feature_store.py', 'bulk_scoring.py')
+
+
+def _import_time(module):
+    """Tempo de import (s) num interpretador novo e dependências pesadas carregadas"""
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"elapsed = time.perf_counter() - start; "
+            f"print(elapsed, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True, cwd=PROJECT_DIR).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def _command_time(script):
+    """Tempo total (s) de python <script> --help, com a inicialização do Python"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, '--help'], capture_output=True,
+                   check=True, cwd=PROJECT_DIR)
+    return time.perf_counter() - start
+
+
+def bench_imports(args):
+    """Tempo de import de cada módulo e de início das linhas de comando"""
+    print(f"{'módulo':>22} {'import (ms)':>12}  dependências pesadas carregadas")
+    for module in PROJECT_MODULES:
+        results = [_import_time(module) for _ in range(args.repeat)]
+        elapsed = min(r[0] for r in results)
+        print(f"{module:>22} {elapsed * 1e3:>12.0f}  {', '.join(results[0][1]) or '-'}")
+
+    print(f"\n{'comando':>22} {'--help (ms)':>12}")
+    for script in HELP_COMMANDS:
+        elapsed = min(_command_time(script) for _ in range(args.repeat))
+        print(f"{script:>22} {elapsed * 1e3:>12.0f}")
+
+    print(f"\n{'dependência':>22} {'import (ms)':>12}")
+    for module in HEAVY_MODULES:
+        try:
+            elapsed = min(_import_time(module)[0] for _ in range(args.repeat))
+        except subprocess.CalledProcessError:
+            print(f"{module:>22} {'não instalado':>12}")
+            continue
+        print(f"{module:>22} {elapsed * 1e3:>12.0f}")
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks da análise')
+    parser.add_argument('--repeat', type=int, default=7,
+                        help='Repetições de cada medição (padrão: 7)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('color-masks', help=bench_color_masks.__doc__)\
+        .set_defaults(func=bench_color_masks)
+
+    haar = commands.add_parser('haar', help=bench_haar.__doc__)
+    haar.add_argument('video', help='Vídeo com faces usado nas medições')
+    haar.add_argument('--frames', type=int, default=30,
+                      help='Número de frames amostrados do vídeo (padrão: 30)')
+    haar.set_defaults(func=bench_haar)
+
+    pitch = commands.add_parser('pitch', help=bench_pitch.__doc__)
+    pitch.add_argument('--minutes', type=float, default=30,
+                       help='Duração do sinal sintético em minutos (padrão: 30)')
+    pitch.set_defaults(func=bench_pitch)
+
+    commands.add_parser('imports', help=bench_imports.__doc__)\
+        .set_defaults(func=bench_imports)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
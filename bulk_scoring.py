@@ -0,0 +1,202 @@
+"""
+Pontuação em lote de transcrições já existentes (JSONL ou CSV).
+
+Aplica a mesma análise linguística do AudioAnalyzer (ver linguistic.py) a
+cada documento, distribuindo lotes de documentos entre processos, sem
+importar nada de áudio ou vídeo. Os resultados saem em JSONL, na ordem da
+entrada, à medida que ficam prontos, e a vazão (documentos/s) é informada
+no fim.
+
+Entrada JSONL: um objeto por linha, com o texto em 'texto' (ou no campo de
+--text-field) e, opcionalmente, 'id' e 'segmentos' (trechos com 'inicio',
+'fim' e 'texto', como no relatório de áudio; com eles sai também a série de
+scores por janela). Como no AudioAnalyzer, trechos cujo texto corrido não é
+o texto do documento são ignorados. Entrada CSV: uma linha por documento,
+com cabeçalho.
+
+    python bulk_scoring.py transcricoes.jsonl --output scores.jsonl --workers 4
+    python bulk_scoring.py transcricoes.csv --text-field transcricao --id-field paciente
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from linguistic import default_engine, interpret_speech_score, segments_text
+
+# Documentos enviados de cada vez a um processo
+BATCH_SIZE = 64
+
+# Tamanho máximo de um campo CSV (o padrão do módulo csv, 128 KB, é menor
+# que uma transcrição longa); cabe num long de 32 bits (Windows)
+CSV_FIELD_SIZE_LIMIT = 2 ** 31 - 1
+
+# Engine de cada processo (compilada no primeiro lote)
+_engine = None
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        _engine = default_engine()
+    return _engine
+
+
+def read_documents(path, file_format=None, text_field='texto', id_field='id'):
+    """Documentos {'id', 'texto', 'segmentos'} de um arquivo JSONL ou CSV
+
+    path '-' lê a entrada padrão. Sem id, o documento recebe seu número
+    (a partir de 1). Linhas JSONL inválidas viram documentos com 'erro'.
+    """
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+    try:
+        if file_format == 'csv':
+            csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+            for number, row in enumerate(csv.DictReader(handle), 1):
+                yield {'id': row.get(id_field) or number,
+                       'texto': row.get(text_field) or ''}
+            return
+
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("esperado um objeto JSON")
+            except ValueError as e:
+                yield {'id': number, 'erro': f"Linha {number} inválida: {e}"}
+                continue
+            yield {'id': record.get(id_field, number),
+                   'texto': record.get(text_field) or '',
+                   'segmentos': record.get('segmentos')}
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def score_document(document, window=60.0):
+    """Score de depressão na fala de um documento (mesma regra do AudioAnalyzer)"""
+    result = {'id': document['id']}
+    if 'erro' in document:
+        result['erro'] = document['erro']
+        return result
+
+    text = document['texto']
+    segments = document.get('segmentos') or None
+    try:
+        # Como no AudioAnalyzer: trechos de outra transcrição (mesmo que só
+        # nos espaços) não servem de linha do tempo, e o texto é pontuado sem eles
+        if segments and text and segments_text(segments) != text:
+            segments = None
+        analysis = _get_engine().analyze(
+            text or (None if segments else ''), segments, window)
+    except (ValueError, KeyError, TypeError) as e:
+        result['erro'] = f"Documento inválido: {e}"
+        return result
+
+    result.update({
+        'score_depressao': analysis['score'],
+        'nivel': interpret_speech_score(analysis['score']),
+        'palavras_chave': analysis['palavras_chave'],
+        'ocorrencias_palavras_chave': analysis['ocorrencias_palavras_chave'],
+        'indicadores': analysis['indicadores'],
+        'contadores': analysis['contadores']
+    })
+    if 'serie' in analysis:
+        result['trechos_palavras_chave'] = analysis['trechos_palavras_chave']
+        result['serie_linguistica'] = analysis['serie']
+    return result
+
+
+def _score_batch(documents, window):
+    return [score_document(document, window) for document in documents]
+
+
+def score_documents(documents, workers=None, batch_size=BATCH_SIZE, window=60.0):
+    """Resultados de cada documento, na ordem da entrada
+
+    Os documentos são lidos sob demanda e enviados em lotes de batch_size a
+    um pool de workers processos (padrão: número de CPUs), com no máximo
+    dois lotes por processo em andamento. workers=1 pontua no próprio
+    processo.
+    """
+    documents = iter(documents)
+    batches = iter(lambda: list(islice(documents, batch_size)), [])
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for batch in batches:
+            yield from _score_batch(batch, window)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_score_batch, batch, window))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description='Pontuação em lote de transcrições (JSONL ou CSV)')
+    parser.add_argument('input', help="Arquivo JSONL ou CSV ('-' para a entrada padrão)")
+    parser.add_argument('--output', default='-',
+                        help="Arquivo JSONL de saída (padrão: saída padrão)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Formato da entrada (padrão: pela extensão)')
+    parser.add_argument('--text-field', default='texto',
+                        help="Campo com o texto (padrão: 'texto')")
+    parser.add_argument('--id-field', default='id',
+                        help="Campo com o identificador (padrão: 'id')")
+    parser.add_argument('--workers', type=int,
+                        help='Processos (padrão: número de CPUs)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Documentos por lote (padrão: {BATCH_SIZE})')
+    parser.add_argument('--window', type=float, default=60.0,
+                        help='Janela da série de scores, em segundos (padrão: 60)')
+    args = parser.parse_args()
+
+    documents = read_documents(args.input, args.format, args.text_field, args.id_field)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    start = time.perf_counter()
+    last_report = start
+    count = errors = 0
+    try:
+        for result in score_documents(documents, args.workers, args.batch_size,
+                                      args.window):
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+            errors += 'erro' in result
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"{count} documentos ({count / (now - start):.0f} documentos/s)",
+                      file=sys.stderr)
+                last_report = now
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    print(f"{count} documentos em {elapsed:.1f} s ({rate:.0f} documentos/s)"
+          + (f", {errors} com erro" if errors else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
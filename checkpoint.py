@@ -0,0 +1,95 @@
+"""
+Pontos de controle (checkpoints) da análise de vídeo.
+
+Durante a análise, o estado do analisador (resultados acumulados, estado do
+amostrador e dos rastreadores) é gravado periodicamente num arquivo. Se o
+processo for interrompido, a análise pode ser retomada logo após o último
+frame gravado e produz o mesmo relatório de uma execução sem interrupção.
+
+O arquivo é um pickle gravado de forma atômica (arquivo temporário +
+rename). Ele guarda também o tamanho e a data de modificação do vídeo e os
+parâmetros da análise: um checkpoint de outro vídeo ou de outra
+configuração é ignorado.
+"""
+
+import os
+import pickle
+import time
+
+CHECKPOINT_VERSION = 1
+
+
+def video_signature(video_path):
+    """Identificação do vídeo: caminho absoluto, tamanho e data de modificação"""
+    stat = os.stat(video_path)
+    return {
+        'caminho': os.path.abspath(video_path),
+        'tamanho': stat.st_size,
+        'modificado_em': stat.st_mtime
+    }
+
+
+class AnalysisCheckpoint:
+    """Checkpoint periódico de uma análise de vídeo
+
+    path: arquivo do checkpoint
+    parameters: parâmetros que definem a análise (amostragem, detecção);
+        um checkpoint só é retomado com os mesmos parâmetros
+    interval: intervalo mínimo (em segundos) entre gravações
+    """
+
+    def __init__(self, path, video_path, parameters, interval=300.0):
+        self.path = path
+        self.video_path = video_path
+        self.parameters = parameters
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def due(self):
+        """Já passou o intervalo desde a última gravação?"""
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, sampler_state, analyzer_state):
+        """Grava o checkpoint de forma atômica"""
+        checkpoint = {
+            'versao': CHECKPOINT_VERSION,
+            'video': video_signature(self.video_path),
+            'parametros': self.parameters,
+            'amostrador': sampler_state,
+            'analisador': analyzer_state
+        }
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """Carrega o checkpoint, ou None se não existir ou não for compatível"""
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"AVISO: Checkpoint ilegível ({e}). Iniciando do começo.")
+            return None
+
+        if checkpoint.get('versao') != CHECKPOINT_VERSION:
+            print("AVISO: Checkpoint de outra versão. Iniciando do começo.")
+            return None
+        if checkpoint['video'] != video_signature(self.video_path):
+            print("AVISO: Checkpoint de outro vídeo (ou vídeo alterado). Iniciando do começo.")
+            return None
+        if checkpoint['parametros'] != self.parameters:
+            print("AVISO: Checkpoint com outros parâmetros de análise. Iniciando do começo.")
+            return None
+
+        return checkpoint
+
+    def remove(self):
+        """Remove o checkpoint de uma análise concluída"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,83 @@
+"""
+Classificação de cor para a detecção de hematomas e marcas vermelhas.
+
+As faixas HSV de cada tipo de hematoma e de marca vermelha são compiladas
+uma única vez em tabelas de consulta (LUT) por canal. Cada faixa ocupa um
+bit: a LUT de um canal marca, para cada valor de 0 a 255, as faixas que
+contêm aquele valor. Um pixel pertence a uma faixa quando o bit está ligado
+nos três canais, então um AND das três consultas classifica o pixel em
+todas as faixas ao mesmo tempo. O resultado é idêntico ao de um cv2.inRange
+por faixa combinado com cv2.bitwise_or.
+"""
+
+import cv2
+import numpy as np
+
+# Faixas HSV (limites inclusivos, como no cv2.inRange)
+BRUISE_HSV_RANGES = (
+    ((120, 30, 30), (160, 255, 200)),  # hematomas frescos (roxo/azulado)
+    ((20, 40, 40), (40, 255, 200)),    # hematomas antigos (amarelado/esverdeado)
+    ((0, 0, 0), (180, 255, 80)),       # hematomas escuros
+)
+
+RED_HSV_RANGES = (
+    ((0, 50, 50), (10, 255, 255)),     # vermelho (início do círculo de matiz)
+    ((170, 50, 50), (180, 255, 255)),  # vermelho (fim do círculo de matiz)
+)
+
+# Elemento estruturante da limpeza morfológica das máscaras
+MORPH_KERNEL = np.ones((5, 5), np.uint8)
+
+
+class ColorMaskClassifier:
+    """Gera as máscaras de hematoma e de marca vermelha numa única classificação"""
+
+    def __init__(self, bruise_ranges=BRUISE_HSV_RANGES, red_ranges=RED_HSV_RANGES):
+        ranges = list(bruise_ranges) + list(red_ranges)
+        if len(ranges) > 8:
+            raise ValueError("No máximo 8 faixas de cor (uma por bit)")
+
+        self.bruise_ranges = tuple(bruise_ranges)
+        self.red_ranges = tuple(red_ranges)
+
+        values = np.arange(256)
+        self._luts = [np.zeros(256, np.uint8) for _ in range(3)]
+        for bit, (lower, upper) in enumerate(ranges):
+            for channel in range(3):
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                self._luts[channel][inside] |= 1 << bit
+
+        self._bruise_bits = (1 << len(self.bruise_ranges)) - 1
+        self._red_bits = ((1 << len(ranges)) - 1) ^ self._bruise_bits
+
+    def classify(self, hsv):
+        """Retorna (mask_bruise, mask_red) para uma imagem HSV de 8 bits"""
+        h, s, v = cv2.split(hsv)
+
+        bits = cv2.bitwise_and(cv2.LUT(h, self._luts[0]), cv2.LUT(s, self._luts[1]))
+        bits = cv2.bitwise_and(bits, cv2.LUT(v, self._luts[2]))
+
+        mask_bruise = cv2.compare(
+            cv2.bitwise_and(bits, self._bruise_bits), 0, cv2.CMP_GT)
+        mask_red = cv2.compare(
+            cv2.bitwise_and(bits, self._red_bits), 0, cv2.CMP_GT)
+
+        return mask_bruise, mask_red
+
+
+def reference_masks(hsv, bruise_ranges=BRUISE_HSV_RANGES, red_ranges=RED_HSV_RANGES):
+    """Implementação anterior (um cv2.inRange por faixa), usada para conferência"""
+    mask_bruise = np.zeros(hsv.shape[:2], np.uint8)
+    for lower, upper in bruise_ranges:
+        mask_bruise = cv2.bitwise_or(
+            mask_bruise, cv2.inRange(hsv, np.array(lower), np.array(upper)))
+
+    mask_red = np.zeros(hsv.shape[:2], np.uint8)
+    for lower, upper in red_ranges:
+        mask_red = cv2.bitwise_or(
+            mask_red, cv2.inRange(hsv, np.array(lower), np.array(upper)))
+
+    return mask_bruise, mask_red
+
+
+DEFAULT_COLOR_CLASSIFIER = ColorMaskClassifier()
@@ -0,0 +1,95 @@
+"""
+Rastreamento de faces entre detecções completas.
+
+O detector Haar percorre o frame inteiro em várias escalas, o que é caro. No
+modo detectar-e-rastrear a detecção completa roda a cada `detect_every`
+frames; nos frames intermediários cada face é seguida por correspondência de
+modelo (cv2.matchTemplate) numa janela em torno da última posição. Se a
+confiança da correspondência cair abaixo do limiar, a detecção completa é
+refeita imediatamente.
+"""
+
+import cv2
+import numpy as np
+
+
+class FaceTracker:
+    """Segue as faces detectadas por correspondência de modelo
+
+    detect_every: intervalo (em frames analisados) entre detecções completas
+    threshold: correlação normalizada mínima (0-1) para aceitar o rastreamento
+    search_margin: margem da janela de busca, em fração do tamanho da face
+    """
+
+    def __init__(self, detect_every=10, threshold=0.6, search_margin=0.5):
+        self.detect_every = max(1, int(detect_every))
+        self.threshold = threshold
+        self.search_margin = search_margin
+
+        # (caixa, modelo em tons de cinza) de cada face rastreada
+        self._faces = []
+        self._since_detection = 0
+
+        self.full_detections = 0
+        self.tracked_frames = 0
+        self.lost_tracks = 0
+
+    def update(self, gray, detect):
+        """Retorna as caixas (x, y, w, h) das faces no frame
+
+        detect: função que executa a detecção completa num frame em tons de
+        cinza (por exemplo, face_cascade.detectMultiScale)
+        """
+        if self._faces and self._since_detection < self.detect_every:
+            boxes = self._track(gray)
+            if boxes is not None:
+                self._since_detection += 1
+                self.tracked_frames += 1
+                return boxes
+            self.lost_tracks += 1
+
+        boxes = [tuple(int(v) for v in box) for box in detect(gray)]
+        self._faces = [(box, gray[box[1]:box[1] + box[3],
+                                  box[0]:box[0] + box[2]].copy())
+                       for box in boxes]
+        self._since_detection = 1
+        self.full_detections += 1
+        return boxes
+
+    def _track(self, gray):
+        """Localiza cada face perto da última posição; None se alguma se perder"""
+        frame_h, frame_w = gray.shape[:2]
+        tracked = []
+
+        for (x, y, w, h), template in self._faces:
+            margin_x = int(w * self.search_margin)
+            margin_y = int(h * self.search_margin)
+            x1 = max(0, x - margin_x)
+            y1 = max(0, y - margin_y)
+            x2 = min(frame_w, x + w + margin_x)
+            y2 = min(frame_h, y + h + margin_y)
+
+            window = gray[y1:y2, x1:x2]
+            if window.shape[0] < h or window.shape[1] < w:
+                return None
+
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if not np.isfinite(confidence) or confidence < self.threshold:
+                return None
+
+            tracked.append(((x1 + dx, y1 + dy, w, h), template))
+
+        # O modelo da detecção é mantido para não acumular deriva
+        self._faces = tracked
+        return [box for box, _ in tracked]
+
+    def describe(self):
+        """Resumo do rastreamento para o relatório"""
+        return {
+            'detectar_a_cada': self.detect_every,
+            'limiar_confianca': self.threshold,
+            'deteccoes_completas': self.full_detections,
+            'frames_rastreados': self.tracked_frames,
+            'rastreamentos_perdidos': self.lost_tracks
+        }
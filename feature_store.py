@@ -0,0 +1,146 @@
+"""
+Armazenamento das features brutas de cada frame analisado.
+
+Os limiares da análise (abertura dos olhos, proporção da boca, faixas de
+área dos contornos, peso de cada hematoma) são aplicados sobre medidas que
+não dependem deles. Com features gravadas, o relatório pode ser recalculado
+com outros limiares em milissegundos, sem decodificar o vídeo de novo:
+
+    python feature_store.py rescore features.npz --eye-openness 7
+
+O arquivo (.npz comprimido) tem duas tabelas colunares:
+- faces: uma linha por face analisada (frame, métricas de expressão,
+  caixa da face e tamanho da região usada na busca de hematomas);
+- contours: todos os contornos encontrados nas máscaras de cor, sem filtro
+  de área (face, classe, área e caixa do contorno).
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from result_store import ColumnStore
+
+FEATURES_VERSION = 1
+
+FACE_FIELDS = [
+    ('frame', np.int64),
+    ('eye_openness', np.float64),
+    ('mouth_ratio', np.float64),
+    ('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+    ('roi_w', np.int32), ('roi_h', np.int32),
+]
+
+CONTOUR_FIELDS = [
+    ('face', np.int64),
+    ('kind', np.uint8),
+    ('area', np.float64),
+    ('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+]
+
+# Classes de contorno
+KIND_BRUISE = 0
+KIND_MARK = 1
+
+
+class FeatureRecorder:
+    """Acumula as features durante a análise"""
+
+    def __init__(self):
+        self.faces = ColumnStore(FACE_FIELDS)
+        self.contours = ColumnStore(CONTOUR_FIELDS)
+
+    def add_face(self, expression_data, face_region, roi_shape):
+        """Registra uma face e retorna seu índice"""
+        x, y, w, h = face_region
+        self.faces.append({
+            'frame': expression_data['timestamp'],
+            'eye_openness': expression_data['eye_openness'],
+            'mouth_ratio': expression_data['mouth_ratio'],
+            'x': x, 'y': y, 'w': w, 'h': h,
+            'roi_w': roi_shape[1], 'roi_h': roi_shape[0]
+        })
+        return len(self.faces) - 1
+
+    def add_contours(self, face_index, kind, contours):
+        """Registra contornos no formato (area, (x, y, w, h))"""
+        for area, (x, y, w, h) in contours:
+            self.contours.append({'face': face_index, 'kind': kind,
+                                  'area': area, 'x': x, 'y': y, 'w': w, 'h': h})
+
+    def save(self, path, metadata):
+        """Grava o arquivo .npz comprimido"""
+        metadata = dict(metadata, versao=FEATURES_VERSION)
+        np.savez_compressed(
+            path, faces=self.faces.to_array(),
+            contours=self.contours.to_array(),
+            meta=np.array(json.dumps(metadata, ensure_ascii=False)))
+
+
+class FeatureSet:
+    """Features carregadas de um arquivo gravado por FeatureRecorder"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.faces = data['faces']
+            self.contours = data['contours']
+            self.meta = json.loads(str(data['meta']))
+
+        if self.meta.get('versao') != FEATURES_VERSION:
+            raise ValueError(f"Arquivo de features de versão não suportada: {path}")
+
+    @property
+    def video_path(self):
+        return self.meta['arquivo_analisado']
+
+
+def rescore(features_path, thresholds=None, output_path=None):
+    """Recalcula o relatório a partir das features, com novos limiares"""
+    from video_analysis import VideoAnalyzer
+
+    features = FeatureSet(features_path)
+    analyzer = VideoAnalyzer(features.video_path, thresholds=thresholds)
+    analyzer.rescore(features)
+
+    if output_path:
+        return analyzer.generate_report(output_path)
+    # Mesmo relatório de generate_report, sem gravar arquivos
+    return analyzer._build_report(analyzer._current_aggregates())
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description='Features gravadas da análise de vídeo')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser(
+        'rescore', help='Recalcula o relatório com outros limiares')
+    cmd.add_argument('features', help='Arquivo .npz gravado por analyze_video')
+    cmd.add_argument('--output', help='Grava o relatório (JSON e texto) neste caminho')
+    cmd.add_argument('--eye-openness', type=float,
+                     help='Abertura média dos olhos abaixo da qual indica cansaço')
+    cmd.add_argument('--mouth-ratio', type=float,
+                     help='Proporção da boca abaixo da qual indica expressão neutra')
+    cmd.add_argument('--bruise-area', type=float, nargs=2, metavar=('MIN', 'MAX'),
+                     help='Faixa de área (exclusiva) dos hematomas')
+    cmd.add_argument('--mark-area', type=float, nargs=2, metavar=('MIN', 'MAX'),
+                     help='Faixa de área (exclusiva) das marcas vermelhas')
+    cmd.add_argument('--bruise-weight', type=float,
+                     help='Peso de cada hematoma no score de risco')
+    args = parser.parse_args()
+
+    thresholds = {}
+    for name in ('eye_openness', 'mouth_ratio', 'bruise_area',
+                 'mark_area', 'bruise_weight'):
+        value = getattr(args, name)
+        if value is not None:
+            thresholds[name] = tuple(value) if isinstance(value, list) else value
+
+    report = rescore(args.features, thresholds, args.output)
+    print(json.dumps(report, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
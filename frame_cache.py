@@ -0,0 +1,322 @@
+"""
+Cache em disco dos frames amostrados.
+
+Reanalisar o mesmo vídeo (trocar de analisador, depurar, ajustar limiares)
+paga de novo todo o custo de decodificação. Com o cache, a primeira análise
+grava os frames amostrados (opcionalmente reduzidos) num arquivo bruto; as
+análises seguintes com a mesma amostragem leem os frames desse arquivo por
+memory-map, sem decodificar o vídeo e sem copiar os dados.
+
+A chave de cada entrada combina o hash do conteúdo do vídeo com os
+parâmetros que definem quais frames são amostrados. O tamanho total do cache
+é limitado: as entradas usadas há mais tempo são removidas primeiro (LRU).
+
+O mesmo diretório pode ser usado por várias análises ao mesmo tempo: cada
+alteração do índice é feita sob uma trava de arquivo, sobre o índice relido
+do disco, e cada processo grava seus frames num arquivo temporário próprio.
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+INDEX_NAME = 'indice.json'
+LOCK_NAME = 'indice.lock'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_content_hash(path):
+    """SHA-1 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _file_lock(path):
+    """Trava exclusiva entre processos (liberada pelo sistema se o processo
+    terminar sem liberá-la)"""
+    with open(path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK desiste após 10 tentativas: continua esperando
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _sampling_key(parameters):
+    """Somente os parâmetros que mudam o conjunto de frames amostrados
+
+    A estratégia de leitura (grab, seek...) não entra: todas entregam os
+    mesmos frames.
+    """
+    if parameters.get('adaptive'):
+        return {'adaptive': True,
+                'min_interval': parameters['min_interval'],
+                'max_interval': parameters['max_interval'],
+                'scene_threshold': parameters['scene_threshold']}
+    return {'sample_rate': parameters['sample_rate']}
+
+
+class FrameCache:
+    """Cache de frames amostrados em arquivos com memory-map
+
+    cache_dir: diretório do cache
+    max_bytes: tamanho máximo do cache (padrão: 4 GB)
+    max_width: largura máxima dos frames gravados (None mantém a original);
+        com redução, a análise passa a usar os frames reduzidos
+    """
+
+    def __init__(self, cache_dir='cache_frames', max_bytes=4 * 1024 ** 3,
+                 max_width=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_width = max_width
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+        self.lock_path = os.path.join(cache_dir, LOCK_NAME)
+        self._load_index()
+
+    def _load_index(self):
+        """Relê o índice do disco (sempre completo: a gravação é atômica)"""
+        self.index = {'hashes': {}, 'entradas': {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    @contextmanager
+    def _updating_index(self):
+        """Altera o índice sob a trava, a partir da versão atual no disco
+
+        Sem a trava, duas análises que gravam o índice ao mesmo tempo
+        perderiam as alterações uma da outra.
+        """
+        with _file_lock(self.lock_path):
+            self._load_index()
+            yield self.index
+            self._save_index()
+
+    def _save_index(self):
+        """Grava o índice de forma atômica (arquivo temporário + rename)"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _content_hash(self, video_path):
+        """Hash do vídeo, recalculado só quando tamanho ou data mudam"""
+        path = os.path.abspath(video_path)
+        stat = os.stat(path)
+        known = self.index['hashes'].get(path)
+        if (known and known['tamanho'] == stat.st_size
+                and known['modificado_em'] == stat.st_mtime):
+            return known['sha1']
+
+        sha1 = file_content_hash(path)
+        with self._updating_index() as index:
+            index['hashes'][path] = {'tamanho': stat.st_size,
+                                     'modificado_em': stat.st_mtime,
+                                     'sha1': sha1}
+        return sha1
+
+    def key(self, video_path, parameters):
+        """Chave da entrada: conteúdo do vídeo + amostragem + redução"""
+        description = json.dumps({
+            'conteudo': self._content_hash(video_path),
+            'amostragem': _sampling_key(parameters),
+            'largura_maxima': self.max_width
+        }, sort_keys=True)
+        return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    def _data_path(self, key):
+        return os.path.join(self.cache_dir, key + '.raw')
+
+    def wrap(self, video_path, sampler, parameters, total_frames):
+        """Retorna um amostrador que lê do cache ou grava nele
+
+        parameters: parâmetros de amostragem do analyze_video
+        total_frames: número de frames do vídeo (para reservar o arquivo)
+        """
+        key = self.key(video_path, parameters)
+
+        with self._updating_index() as index:
+            entry = index['entradas'].get(key)
+            if entry and os.path.exists(self._data_path(key)):
+                entry['ultimo_uso'] = time.time()
+                # Abre o memory-map ainda sob a trava, antes que outra
+                # análise possa remover a entrada
+                frames = CachedFrames(self._data_path(key), entry)
+            else:
+                frames = None
+
+        if frames is not None:
+            print("Frames lidos do cache de frames")
+            return frames
+
+        print("Gravando os frames amostrados no cache de frames")
+        step = (parameters['min_interval'] if parameters.get('adaptive')
+                else parameters['sample_rate'])
+        capacity = total_frames // step + 1 if total_frames > 0 else 0
+        return RecordingFrames(self, key, sampler, capacity)
+
+    def _store(self, key, tmp_path, entry):
+        """Publica o arquivo de uma entrada concluída, registra a entrada e
+        aplica o limite de tamanho"""
+        with self._updating_index() as index:
+            os.replace(tmp_path, self._data_path(key))
+            entry['ultimo_uso'] = time.time()
+            index['entradas'][key] = entry
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """Remove as entradas usadas há mais tempo até caber no limite"""
+        entries = self.index['entradas']
+        total = sum(e['tamanho_bytes'] for e in entries.values())
+
+        for key in sorted(entries, key=lambda k: entries[k]['ultimo_uso']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                if os.path.exists(self._data_path(key)):
+                    os.remove(self._data_path(key))
+            except OSError:
+                # Arquivo aberto por outra análise (Windows): a entrada fica
+                # para a próxima limpeza
+                continue
+            total -= entries[key]['tamanho_bytes']
+            del entries[key]
+
+
+class CachedFrames:
+    """Frames amostrados lidos do cache (views do memory-map, sem cópia)"""
+
+    def __init__(self, data_path, entry):
+        self.entry = entry
+        self.frame_numbers = entry['frames']
+        self._frames = np.memmap(data_path, dtype=np.uint8, mode='r',
+                                 shape=tuple(entry['forma']))
+
+    def __iter__(self):
+        for index, frame_number in enumerate(self.frame_numbers):
+            yield frame_number, self._frames[index]
+
+    def describe(self):
+        """Amostragem da análise que gravou o cache (o relatório é o mesmo
+        de uma análise sem cache)"""
+        return dict(self.entry['amostragem'])
+
+
+class RecordingFrames:
+    """Repassa os frames do amostrador e grava uma cópia no cache
+
+    A entrada só é registrada se o vídeo for percorrido até o fim; uma
+    análise interrompida não deixa entrada incompleta.
+    """
+
+    def __init__(self, cache, key, sampler, capacity):
+        self.cache = cache
+        self.key = key
+        self.sampler = sampler
+        self.capacity = capacity
+
+    def _fit(self, frame):
+        """Reduz o frame para a largura máxima do cache"""
+        max_width = self.cache.max_width
+        h, w = frame.shape[:2]
+        if max_width and w > max_width:
+            size = (max_width, max(1, int(round(h * max_width / w))))
+            return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return frame
+
+    def __iter__(self):
+        # Arquivo temporário próprio do processo: duas análises podem gravar
+        # a mesma entrada ao mesmo tempo
+        data_path = self.cache._data_path(self.key)
+        tmp_path = f'{data_path}.{os.getpid()}.tmp'
+        storage = None
+        frame_numbers = []
+        recording = self.capacity > 0
+        finished = False
+
+        try:
+            for frame_number, frame in self.sampler:
+                frame = self._fit(frame)
+
+                if recording and storage is None:
+                    if self.capacity * frame.nbytes > self.cache.max_bytes:
+                        print("AVISO: Frames amostrados maiores que o limite do cache. "
+                              "Cache de frames desativado nesta análise.")
+                        recording = False
+                    else:
+                        storage = np.memmap(tmp_path, dtype=np.uint8, mode='w+',
+                                            shape=(self.capacity,) + frame.shape)
+
+                # Contagem de frames do container imprecisa ou frames de
+                # tamanho variável: desiste de gravar esta entrada
+                if recording and (len(frame_numbers) >= self.capacity
+                                  or frame.shape != storage.shape[1:]):
+                    recording = False
+
+                if recording:
+                    storage[len(frame_numbers)] = frame
+                    frame_numbers.append(frame_number)
+
+                yield frame_number, frame
+
+            finished = True
+        finally:
+            shape = storage.shape[1:] if storage is not None else None
+            if storage is not None:
+                storage.flush()
+                del storage
+
+            if finished and recording and frame_numbers:
+                self._store(tmp_path, frame_numbers, shape)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _store(self, tmp_path, frame_numbers, shape):
+        """Encolhe o arquivo para os frames gravados e registra a entrada"""
+        size = len(frame_numbers) * int(np.prod(shape))
+        os.truncate(tmp_path, size)
+        self.cache._store(self.key, tmp_path, {
+            'frames': frame_numbers,
+            'forma': [len(frame_numbers)] + list(shape),
+            'tamanho_bytes': size,
+            'amostragem': self.sampler.describe()
+        })
+
+    def describe(self):
+        """Resumo da amostragem utilizada (incluído no relatório)"""
+        return self.sampler.describe()
@@ -0,0 +1,137 @@
+"""
+Pipeline de decodificação antecipada para a análise de vídeo.
+
+Uma thread decodificadora percorre o amostrador de frames, aplica o
+pré-processamento (conversão de cor) e coloca os frames numa fila limitada,
+enquanto a thread principal consome a fila e executa a análise. O OpenCV
+libera o GIL durante a decodificação, então as duas etapas se sobrepõem.
+A fila limitada aplica contrapressão: quando a análise fica para trás, a
+decodificação espera.
+"""
+
+import queue
+import threading
+import time
+
+# Marca o fim dos frames na fila
+_END = object()
+
+
+class _StageStats:
+    """Estatísticas de uma etapa do pipeline"""
+
+    def __init__(self):
+        self.frames = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.depth_sum = 0
+        self.depth_max = 0
+
+    def record_depth(self, depth):
+        self.depth_sum += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def as_dict(self):
+        return {
+            'frames': self.frames,
+            'tempo_processamento_s': round(self.busy_time, 3),
+            'tempo_espera_fila_s': round(self.wait_time, 3),
+            'profundidade_media_fila': round(self.depth_sum / self.frames, 2) if self.frames else 0,
+            'profundidade_maxima_fila': self.depth_max
+        }
+
+
+class DecodeAheadPipeline:
+    """Decodifica os frames amostrados numa thread separada
+
+    Itera sobre tuplas (numero_do_frame, frame, frame_preparado), onde
+    frame_preparado é o resultado de prepare(frame) calculado na thread de
+    decodificação.
+    """
+
+    def __init__(self, frames, prepare=None, queue_size=8):
+        if queue_size < 1:
+            raise ValueError("queue_size deve ser maior ou igual a 1")
+
+        self.frames = frames
+        self.prepare = prepare
+        self.queue_size = queue_size
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._error = None
+        self._decode_stats = _StageStats()
+        self._analysis_stats = _StageStats()
+
+    def _put(self, item):
+        """Coloca um item na fila, desistindo se o consumidor encerrou"""
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._decode_stats.wait_time += time.perf_counter() - start
+
+    def _decode(self):
+        """Thread decodificadora: lê, prepara e enfileira os frames"""
+        try:
+            iterator = iter(self.frames)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                item = next(iterator, _END)
+                if item is _END:
+                    break
+                frame_number, frame = item
+                prepared = self.prepare(frame) if self.prepare else None
+                self._decode_stats.busy_time += time.perf_counter() - start
+
+                self._decode_stats.frames += 1
+                self._decode_stats.record_depth(self._queue.qsize())
+                self._put((frame_number, frame, prepared))
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        decoder = threading.Thread(
+            target=self._decode, name='decodificador-frames', daemon=True)
+        decoder.start()
+
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._queue.get()
+                self._analysis_stats.wait_time += time.perf_counter() - start
+                if item is _END:
+                    break
+
+                self._analysis_stats.frames += 1
+                self._analysis_stats.record_depth(self._queue.qsize())
+
+                start = time.perf_counter()
+                yield item
+                self._analysis_stats.busy_time += time.perf_counter() - start
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            # Encerramento limpo: sinaliza a thread e esvazia a fila para que
+            # ela não fique bloqueada num put
+            self._stop.set()
+            while decoder.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            decoder.join()
+
+    def stats(self):
+        """Estatísticas de profundidade de fila e tempo por etapa"""
+        return {
+            'tamanho_fila': self.queue_size,
+            'decodificacao': self._decode_stats.as_dict(),
+            'analise': self._analysis_stats.as_dict()
+        }
@@ -0,0 +1,262 @@
+"""
+Amostragem de frames para a análise de vídeo.
+
+A leitura sequencial com ``cap.read()`` decodifica e converte para BGR todos
+os frames do vídeo, inclusive os que a amostragem descarta. As estratégias
+deste módulo entregam exatamente os mesmos frames amostrados (frames cujo
+número, contado a partir de 1, é múltiplo de ``sample_rate``), mas só fazem a
+decodificação completa dos frames que serão analisados.
+"""
+
+import cv2
+
+# Estratégias de amostragem disponíveis:
+# - 'read': lê e converte todos os frames (comportamento original)
+# - 'grab': avança com cap.grab() e só converte (retrieve) os frames amostrados
+# - 'seek': posiciona o vídeo diretamente no frame amostrado; o decodificador
+#           recomeça a partir do keyframe anterior ao alvo
+# - 'auto': usa 'seek' quando o intervalo entre amostras supera o intervalo
+#           típico entre keyframes e 'grab' nos demais casos
+SAMPLING_STRATEGIES = ('auto', 'read', 'grab', 'seek')
+
+# Intervalo típico entre keyframes (keyint padrão do x264/x265). Abaixo disso
+# o seek decodificaria a partir do mesmo keyframe repetidas vezes.
+TYPICAL_KEYFRAME_INTERVAL = 250
+
+
+class FrameSampler:
+    """Itera sobre os frames amostrados de um cv2.VideoCapture"""
+
+    def __init__(self, cap, sample_rate=30, strategy='auto',
+                 start_frame=0, end_frame=None):
+        if sample_rate < 1:
+            raise ValueError("sample_rate deve ser maior ou igual a 1")
+        if strategy not in SAMPLING_STRATEGIES:
+            raise ValueError(
+                f"Estratégia de amostragem inválida: {strategy} "
+                f"(opções: {', '.join(SAMPLING_STRATEGIES)})")
+
+        self.cap = cap
+        self.sample_rate = sample_rate
+        self.requested_strategy = strategy
+        self.strategy = self._resolve_strategy(strategy)
+
+        # Intervalo [start_frame, end_frame) de índices (base 0) a percorrer.
+        # A grade de amostragem é sempre a do vídeo inteiro, então um
+        # intervalo entrega os mesmos frames que a leitura completa nele.
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+
+        # Índice (base 0) do próximo frame que o VideoCapture vai entregar
+        self.position = 0
+        self.seek_fallbacks = 0
+
+    def _resolve_strategy(self, strategy):
+        """Resolve a estratégia 'auto' para uma estratégia concreta"""
+        if strategy != 'auto':
+            return strategy
+        if self.sample_rate >= TYPICAL_KEYFRAME_INTERVAL:
+            return 'seek'
+        return 'grab'
+
+    def __iter__(self):
+        """Gera tuplas (numero_do_frame, frame) com numeração a partir de 1"""
+        if self.start_frame > self.position and not self._seek(self.start_frame):
+            return
+
+        while self.cap.isOpened():
+            target = self._next_target()
+            if self.end_frame is not None and target >= self.end_frame:
+                break
+            frame = self._read_at(target)
+            if frame is None:
+                break
+            yield target + 1, frame
+
+    def _next_target(self):
+        """Índice (base 0) do próximo frame amostrado a partir da posição atual"""
+        position = max(self.position, self.start_frame)
+        return ((position + self.sample_rate) // self.sample_rate) * self.sample_rate - 1
+
+    def _read_at(self, target):
+        """Posiciona o vídeo no frame alvo e retorna o frame decodificado"""
+        if self.strategy == 'seek' and target > self.position:
+            if not self._seek(target):
+                return None
+
+        # Frames intermediários: 'read' converte cada um deles, 'grab' apenas
+        # avança o decodificador
+        while self.position < target:
+            if self.strategy == 'read':
+                ok, _ = self.cap.read()
+            else:
+                ok = self.cap.grab()
+            if not ok:
+                return None
+            self.position += 1
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position += 1
+        return frame
+
+    def _seek(self, target):
+        """Faz seek até o frame alvo, voltando para 'grab' se o seek for impreciso
+
+        Retorna False quando o alvo está além do último frame do vídeo.
+        """
+        total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if 0 < total_frames <= target:
+            return False
+
+        if (self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                and int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == target):
+            self.position = target
+            return True
+
+        # Containers sem índice ou com timestamps irregulares não garantem
+        # seek exato: recomeça do início avançando com grab para manter os
+        # mesmos frames amostrados da leitura sequencial
+        print("AVISO: Seek impreciso neste vídeo. Usando amostragem por grab.")
+        self.strategy = 'grab'
+        self.seek_fallbacks += 1
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.position = 0
+        return True
+
+    def state_dict(self):
+        """Estado para retomar a amostragem logo após o último frame entregue"""
+        return {
+            'position': self.position,
+            'strategy': self.strategy,
+            'seek_fallbacks': self.seek_fallbacks
+        }
+
+    def load_state_dict(self, state):
+        """Retoma a partir de um estado de state_dict (antes de iterar)"""
+        self.start_frame = max(self.start_frame, state['position'])
+        self.strategy = state['strategy']
+        self.seek_fallbacks = state['seek_fallbacks']
+
+    def describe(self):
+        """Resumo da amostragem utilizada (incluído no relatório)"""
+        return {
+            'estrategia': self.strategy,
+            'estrategia_solicitada': self.requested_strategy,
+            'sample_rate': self.sample_rate
+        }
+
+
+class SceneChangeSampler:
+    """Amostragem adaptativa guiada por mudança de cena
+
+    Recebe os frames candidatos (normalmente um FrameSampler com
+    sample_rate=min_interval) e compara miniaturas em tons de cinza com a
+    miniatura do último frame selecionado. Só entrega o frame para a análise
+    completa quando o conteúdo mudou ou quando max_interval frames se
+    passaram desde a última seleção.
+    """
+
+    def __init__(self, frames, min_interval=10, max_interval=120,
+                 threshold=10.0, thumbnail_width=64):
+        if max_interval < min_interval:
+            raise ValueError("max_interval deve ser maior ou igual a min_interval")
+
+        self.frames = frames
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.thumbnail_width = thumbnail_width
+
+        self.frames_checked = 0
+        self.frames_selected = 0
+        self._last_thumbnail = None
+        self._last_selected = 0
+
+    def _thumbnail(self, frame):
+        """Miniatura em tons de cinza usada na comparação entre frames"""
+        h, w = frame.shape[:2]
+        thumb_h = max(1, int(h * self.thumbnail_width / w))
+        small = cv2.resize(frame, (self.thumbnail_width, thumb_h),
+                           interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _scene_changed(self, thumbnail):
+        """Diferença média absoluta (0-255) em relação ao último frame selecionado"""
+        if self._last_thumbnail is None or thumbnail.shape != self._last_thumbnail.shape:
+            return True
+        diff = cv2.absdiff(thumbnail, self._last_thumbnail)
+        return cv2.mean(diff)[0] >= self.threshold
+
+    def __iter__(self):
+        for frame_number, frame in self.frames:
+            self.frames_checked += 1
+            thumbnail = self._thumbnail(frame)
+
+            if (frame_number - self._last_selected >= self.max_interval
+                    or self._scene_changed(thumbnail)):
+                self._last_thumbnail = thumbnail
+                self._last_selected = frame_number
+                self.frames_selected += 1
+                yield frame_number, frame
+
+    def state_dict(self):
+        """Estado para retomar a amostragem logo após o último frame entregue"""
+        return {
+            'frames': self.frames.state_dict(),
+            'frames_checked': self.frames_checked,
+            'frames_selected': self.frames_selected,
+            'last_thumbnail': self._last_thumbnail,
+            'last_selected': self._last_selected
+        }
+
+    def load_state_dict(self, state):
+        """Retoma a partir de um estado de state_dict (antes de iterar)"""
+        self.frames.load_state_dict(state['frames'])
+        self.frames_checked = state['frames_checked']
+        self.frames_selected = state['frames_selected']
+        self._last_thumbnail = state['last_thumbnail']
+        self._last_selected = state['last_selected']
+
+    def describe(self):
+        """Resumo da amostragem utilizada (incluído no relatório)"""
+        info = {
+            'estrategia': 'adaptativa',
+            'intervalo_minimo': self.min_interval,
+            'intervalo_maximo': self.max_interval,
+            'limiar_mudanca': self.threshold,
+            'frames_verificados': self.frames_checked
+        }
+        if hasattr(self.frames, 'describe'):
+            info['estrategia_leitura'] = self.frames.describe()['estrategia']
+        return info
+
+
+def create_sampler(cap, sample_rate=30, strategy='auto', adaptive=False,
+                   min_interval=10, max_interval=120, scene_threshold=10.0,
+                   start_frame=0, end_frame=None):
+    """Cria o amostrador de frames usado por analyze_video
+
+    Com adaptive=True, sample_rate é ignorado: os frames são verificados a
+    cada min_interval frames e analisados quando a cena muda (ou a cada
+    max_interval frames, no máximo).
+    """
+    if adaptive:
+        frames = FrameSampler(cap, min_interval, strategy,
+                              start_frame, end_frame)
+        return SceneChangeSampler(frames, min_interval, max_interval,
+                                  scene_threshold)
+    return FrameSampler(cap, sample_rate, strategy, start_frame, end_frame)
+
+
+def format_sampling_summary(info):
+    """Descrição em texto da amostragem, para os relatórios legíveis"""
+    if info.get('estrategia') == 'adaptativa':
+        return (f"adaptativa (intervalo de {info['intervalo_minimo']} a "
+                f"{info['intervalo_maximo']} frames, "
+                f"{info['frames_verificados']} frames verificados)")
+    if info.get('estrategia') == 'tempo_real':
+        return (f"tempo real (orçamento de latência de "
+                f"{info['orcamento_latencia_s'] * 1000:.0f} ms por frame)")
+    return f"{info['estrategia']} (1 a cada {info['sample_rate']} frames)"
@@ -0,0 +1,84 @@
+"""
+Detecção Haar em pirâmide, com janelas de busca restritas.
+
+A detecção completa percorre o frame em resolução original e os olhos em
+toda a região da face. Neste modo:
+
+- as faces são procuradas numa versão reduzida do frame (largura
+  `detection_width`) e as coordenadas são convertidas de volta;
+- minSize/maxSize da busca vêm do tamanho das últimas faces encontradas,
+  evitando as escalas que não podem conter a face;
+- os olhos são procurados só na metade superior da face, redimensionada
+  para uma largura fixa (`eye_width`), de modo que o tamanho esperado do
+  olho é sempre o mesmo.
+"""
+
+import cv2
+
+
+class PyramidHaarDetector:
+    """Detecção de faces e olhos em escala reduzida
+
+    detection_width: largura do frame reduzido usado na busca de faces
+    size_margin: variação aceita em torno do tamanho da última face (fração)
+    eye_width: largura normalizada da metade superior da face
+    """
+
+    def __init__(self, detection_width=640, size_margin=0.5, eye_width=120):
+        self.detection_width = detection_width
+        self.size_margin = size_margin
+        self.eye_width = eye_width
+
+        # Menor e maior largura de face (em pixels do frame original)
+        self.last_face_sizes = None
+
+    def detect_faces(self, cascade, gray):
+        """Retorna as caixas (x, y, w, h) das faces no frame original"""
+        frame_w = gray.shape[1]
+        scale = min(1.0, self.detection_width / frame_w)
+        if scale < 1.0:
+            small = cv2.resize(gray, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+
+        size_limits = {}
+        if self.last_face_sizes:
+            smallest, largest = self.last_face_sizes
+            min_side = int(smallest * (1 - self.size_margin) * scale)
+            max_side = int(largest * (1 + self.size_margin) * scale)
+            size_limits = {'minSize': (min_side, min_side),
+                           'maxSize': (max_side, max_side)}
+
+        found = cascade.detectMultiScale(small, 1.3, 5, **size_limits)
+
+        faces = [tuple(int(round(v / scale)) for v in box) for box in found]
+
+        # Sem faces, a próxima busca volta a considerar todas as escalas
+        if faces:
+            widths = [w for _, _, w, _ in faces]
+            self.last_face_sizes = (min(widths), max(widths))
+        else:
+            self.last_face_sizes = None
+
+        return faces
+
+    def detect_eyes(self, cascade, face_gray):
+        """Retorna as caixas dos olhos, em coordenadas da região da face"""
+        upper = face_gray[:face_gray.shape[0] // 2]
+        if upper.size == 0:
+            return []
+
+        scale = self.eye_width / upper.shape[1]
+        normalized = cv2.resize(upper, None, fx=scale, fy=scale,
+                                interpolation=cv2.INTER_AREA if scale < 1
+                                else cv2.INTER_LINEAR)
+
+        # Numa face normalizada, o olho ocupa cerca de 1/6 a 1/2 da largura
+        min_side = self.eye_width // 6
+        max_side = self.eye_width // 2
+        found = cascade.detectMultiScale(
+            normalized, minSize=(min_side, min_side),
+            maxSize=(max_side, max_side))
+
+        return [tuple(int(round(v / scale)) for v in box) for box in found]
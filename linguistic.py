@@ -0,0 +1,289 @@
+"""
+Análise linguística da transcrição: contadores léxicos e score de depressão.
+
+Todos os termos (palavras-chave, negações, primeira pessoa e padrões
+negativos) são compilados uma única vez num KeywordMatcher (ver
+text_matcher.py), e todos os contadores saem de uma única passada pelas
+palavras do texto.
+
+Com os trechos da transcrição (com 'inicio' e 'fim' em segundos), cada
+palavra recebe um instante (interpolado dentro do seu trecho) e os mesmos
+contadores são acumulados também por janela de tempo: além do score global,
+sai uma série de scores por janela, calculados com a mesma regra.
+
+Este módulo não depende de nada de áudio ou vídeo: serve também para
+pontuar transcrições vindas de outras fontes (ver bulk_scoring.py).
+"""
+
+from text_matcher import KeywordMatcher
+
+# Palavras e frases indicadoras de depressão
+DEPRESSION_KEYWORDS = [
+    # Sentimentos negativos
+    'triste', 'tristeza', 'deprimido', 'deprimida', 'deprimente',
+    'sozinho', 'sozinha', 'solidão', 'vazio', 'vazia',
+    'desesperado', 'desesperada', 'sem esperança', 'desespero',
+    'cansado', 'cansada', 'exausto', 'exausta', 'esgotado', 'esgotada',
+
+    # Pensamentos negativos
+    'não consigo', 'não aguento', 'não dá mais',
+    'sem sentido', 'sem propósito', 'inútil',
+    'fracasso', 'fracassado', 'fracassada',
+    'culpa', 'culpado', 'culpada',
+
+    # Isolamento
+    'ninguém entende', 'ninguém se importa', 'sozinho no mundo',
+    'me afastar', 'isolar', 'isolamento',
+
+    # Sintomas físicos
+    'não durmo', 'insônia', 'não como', 'sem apetite',
+    'dor', 'corpo pesado', 'sem energia',
+
+    # Ideação
+    'desistir', 'acabar com tudo', 'sumir',
+
+    # Emoções
+    'angústia', 'ansiedade', 'medo', 'pavor',
+    'choro', 'chorando', 'chorar'
+]
+
+# Palavras negativas e de primeira pessoa (contadas como palavras
+# inteiras: 'eu' não conta em 'seu', nem 'me' em 'medo')
+NEGATIVE_WORDS = ['não', 'nunca', 'nada', 'nenhum', 'nem']
+FIRST_PERSON_WORDS = ['eu', 'me', 'meu', 'minha', 'mim']
+
+# Padrões linguísticos: {nome: sequências de palavras}, '*' é
+# qualquer palavra
+NEGATIVE_PATTERNS = {
+    'não + palavra': ['não *'],  # negações
+    'nunca': ['nunca'],
+    'nada': ['nada'],
+    'sempre + triste/mal/cansado/sozinho': [
+        'sempre triste', 'sempre mal', 'sempre cansado', 'sempre sozinho'],
+}
+
+
+def default_engine():
+    """LinguisticEngine com os termos padrão deste módulo"""
+    return LinguisticEngine(DEPRESSION_KEYWORDS, NEGATIVE_WORDS,
+                            FIRST_PERSON_WORDS, NEGATIVE_PATTERNS)
+
+
+def interpret_speech_score(score):
+    """Interpreta o score de depressão na fala"""
+    if score < 5:
+        return 'Baixo - Poucos indicadores na fala'
+    elif score < 15:
+        return 'Moderado - Alguns indicadores presentes'
+    else:
+        return 'Alto - Múltiplos indicadores de depressão na fala'
+
+
+def speech_recommendation(score):
+    """Recomendação baseada no score de depressão na fala"""
+    if score < 5:
+        return 'Não foram detectados sinais significativos de depressão na fala.'
+    elif score < 15:
+        return 'Alguns indicadores linguísticos sugerem possível tristeza ou desânimo. Recomenda-se atenção e diálogo.'
+    else:
+        return 'ATENÇÃO: Múltiplos indicadores de depressão detectados na fala. Recomenda-se URGENTEMENTE avaliação profissional de saúde mental. CVV: 188 (24h)'
+
+
+def segments_text(segments):
+    """Texto corrido dos trechos (o mesmo de transcription.transcript_text,
+    sem importar o módulo de áudio)"""
+    return ' '.join(s['texto'] for s in segments if s['texto'])
+
+
+def _new_counters():
+    return {
+        'palavras': 0,
+        'palavras_chave': {},
+        'padroes_negativos': {},
+        'negacoes': 0,
+        'primeira_pessoa': 0
+    }
+
+
+class LinguisticEngine:
+    """Contadores léxicos e score de depressão de uma transcrição
+
+    keywords: palavras e expressões indicadoras de depressão
+    negative_words / first_person_words: palavras contadas no tom geral
+    negative_patterns: {nome: termos}; cada ocorrência de um dos termos
+        conta para o padrão (um termo pode terminar em '*', qualquer palavra)
+    """
+
+    def __init__(self, keywords, negative_words, first_person_words,
+                 negative_patterns):
+        self.keywords = list(keywords)
+        self.negative_patterns = {name: list(terms)
+                                  for name, terms in negative_patterns.items()}
+
+        categories = {
+            'palavra_chave': self.keywords,
+            'negacao': negative_words,
+            'primeira_pessoa': first_person_words
+        }
+        for name, terms in self.negative_patterns.items():
+            categories[('padrao', name)] = terms
+        self.matcher = KeywordMatcher(categories)
+
+    @staticmethod
+    def _count(counters, term, category):
+        if category == 'palavra_chave':
+            keywords = counters['palavras_chave']
+            keywords[term] = keywords.get(term, 0) + 1
+        elif category == 'negacao':
+            counters['negacoes'] += 1
+        elif category == 'primeira_pessoa':
+            counters['primeira_pessoa'] += 1
+        else:
+            patterns = counters['padroes_negativos']
+            patterns[category[1]] = patterns.get(category[1], 0) + 1
+
+    def score(self, counters):
+        """Score e indicadores de um conjunto de contadores
+
+        Cada palavra-chave encontrada vale 2; cada ocorrência de padrão
+        negativo vale 1; mais de 5 negações valem 0,5 por negação; mais de
+        10 palavras de primeira pessoa valem 2.
+        """
+        score = 2 * len(counters['palavras_chave'])
+        indicators = []
+
+        for name in self.negative_patterns:
+            count = counters['padroes_negativos'].get(name, 0)
+            if count:
+                indicators.append(f"Padrão negativo: {name}")
+                score += count
+
+        if counters['negacoes'] > 5:
+            indicators.append("Alto uso de palavras negativas")
+            score += counters['negacoes'] * 0.5
+
+        if counters['primeira_pessoa'] > 10:
+            indicators.append(
+                "Foco excessivo em si mesmo (possível ruminação)")
+            score += 2
+
+        return score, indicators
+
+    def analyze(self, text, segments=None, window=60.0):
+        """Analisa o texto em uma passada
+
+        segments: trechos da transcrição cujo texto corrido é text (ver
+        transcription.transcript_text); com eles, o resultado traz também
+        os trechos com palavras-chave e a série de scores por janela de
+        window segundos. Com segments, text pode ser None.
+        """
+        counters = _new_counters()
+        occurrences = {}
+
+        timeline = _Timeline(segments) if segments else None
+        if timeline is not None:
+            if text is None:
+                text = timeline.text
+            elif timeline.text != text:
+                raise ValueError("O texto não corresponde aos trechos da transcrição")
+        windows = []
+        if timeline is not None:
+            windows = [_new_counters() for _ in range(timeline.windows(window))]
+        segment_keywords = {}
+        current = None
+
+        for start, _, found in self.matcher.iter_words(text):
+            counters['palavras'] += 1
+            if timeline is not None:
+                index = int(timeline.time_at(start) // window)
+                current = windows[min(index, len(windows) - 1)]
+                current['palavras'] += 1
+
+            for begin, end, term, category in found:
+                self._count(counters, term, category)
+                if current is not None:
+                    self._count(current, term, category)
+                if category == 'palavra_chave':
+                    occurrences.setdefault(term, []).append([begin, end])
+                    if timeline is not None:
+                        segment_keywords.setdefault(
+                            timeline.segment_at(begin), set()).add(term)
+
+        score, indicators = self.score(counters)
+        found_keywords = [k for k in self.keywords if k in counters['palavras_chave']]
+        result = {
+            'score': score,
+            'indicadores': indicators,
+            'palavras_chave': found_keywords,
+            'ocorrencias_palavras_chave': {k: occurrences[k] for k in found_keywords},
+            'contadores': counters
+        }
+
+        if timeline is not None:
+            result['trechos_palavras_chave'] = [
+                {'inicio': segment['inicio'], 'fim': segment['fim'],
+                 'palavras_chave': [k for k in found_keywords
+                                    if k in segment_keywords[index]]}
+                for index, segment in enumerate(timeline.segments)
+                if index in segment_keywords
+            ]
+            result['serie'] = self._series(windows, window, timeline.duration)
+
+        return result
+
+    def _series(self, windows, window, duration):
+        """Score de cada janela, com a mesma regra do score global"""
+        series = []
+        for index, counters in enumerate(windows):
+            score, _ = self.score(counters)
+            series.append({
+                'inicio': round(index * window, 2),
+                'fim': round(min((index + 1) * window, duration), 2),
+                'palavras': counters['palavras'],
+                'score': score,
+                'palavras_chave': [k for k in self.keywords
+                                   if k in counters['palavras_chave']]
+            })
+        return {'janela_s': window, 'janelas': series}
+
+
+class _Timeline:
+    """Posição no texto corrido -> trecho e instante (em segundos)
+
+    Feito para consultas em ordem crescente de posição (como numa passada
+    pelo texto): cada consulta continua do trecho da anterior.
+    """
+
+    def __init__(self, segments):
+        self.segments = [s for s in segments if s['texto']]
+        self.text = segments_text(self.segments)
+        self.duration = max((s['fim'] for s in segments), default=0)
+
+        # Posição de início de cada trecho no texto corrido
+        self._offsets = []
+        offset = 0
+        for segment in self.segments:
+            self._offsets.append(offset)
+            offset += len(segment['texto']) + 1
+        self._current = 0
+
+    def windows(self, window):
+        """Número de janelas de window segundos que cobrem a gravação"""
+        return max(1, -int(-self.duration // window))
+
+    def segment_at(self, position):
+        """Índice (em self.segments) do trecho que contém a posição"""
+        index = self._current
+        if position < self._offsets[index]:
+            index = 0
+        while index + 1 < len(self._offsets) and self._offsets[index + 1] <= position:
+            index += 1
+        self._current = index
+        return index
+
+    def time_at(self, position):
+        """Instante da posição, interpolado dentro do seu trecho"""
+        index = self.segment_at(position)
+        segment = self.segments[index]
+        fraction = (position - self._offsets[index]) / max(1, len(segment['texto']))
+        return segment['inicio'] + (segment['fim'] - segment['inicio']) * min(1.0, fraction)
@@ -4,41 +4,156 @@ Detecta sinais de:
 - Depressão (expressões faciais e fala)
 - Hematomas (possível violência doméstica)
 - Marcas e machucados (problemas de saúde)
+
+    python main_analysis.py data/video.mp4 --sample-rate 30 --output-dir relatorios
+
+Os módulos de análise (OpenCV, MediaPipe...) só são importados quando o
+analisador é criado: --help e o uso só dos relatórios iniciam rápido.
 """
 
+import argparse
+import contextlib
+import io
 import os
 import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from video_analysis import VideoAnalyzer
-from audio_analysis import AudioAnalyzer
+
+DEFAULT_VIDEO = 'data/YTDown.com_YouTube_Media_5t_FoFzVcsA_001_720p.mp4'
+
+
+class _ThreadBufferedOutput:
+    """stdout que guarda num buffer próprio a saída das threads registradas
+
+    As demais threads escrevem direto no stream original. Serve para que a
+    etapa de áudio, rodando ao lado da de vídeo, não intercale suas
+    mensagens com as do vídeo.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffers = {}
+
+    @contextlib.contextmanager
+    def buffered(self):
+        """Guarda a saída da thread atual; devolve o buffer"""
+        buffer = io.StringIO()
+        self._buffers[threading.get_ident()] = buffer
+        try:
+            yield buffer
+        finally:
+            del self._buffers[threading.get_ident()]
+
+    def write(self, text):
+        buffer = self._buffers.get(threading.get_ident())
+        if buffer is not None:
+            return buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
 
 
 class IntegratedAnalyzer:
     """Análise integrada de vídeo e áudio"""
 
-    def __init__(self, video_path):
+    def __init__(self, video_path, output_dir='.', report_prefix=''):
+        from audio_analysis import AudioAnalyzer
+        from video_analysis import VideoAnalyzer
+
         self.video_path = video_path
         self.video_analyzer = VideoAnalyzer(video_path)
         self.audio_analyzer = AudioAnalyzer(video_path)
         self.integrated_results = {}
-
-    def analyze(self):
-        """Executa análise completa"""
+        self.timings = {}
+
+        # Local dos relatórios: output_dir/<report_prefix><nome padrão>
+        self.output_dir = output_dir
+        self.report_prefix = report_prefix
+
+    def _report_path(self, filename):
+        """Caminho de um relatório dentro de output_dir, com o prefixo configurado"""
+        return os.path.join(self.output_dir, self.report_prefix + filename)
+
+    def analyze(self, sample_rate=30, concurrent=True):
+        """Executa análise completa
+
+        Com concurrent=True (padrão), a análise de áudio (extração com
+        ffmpeg, transcrição e características vocais) roda numa thread
+        separada enquanto o vídeo é analisado. O ganho vem principalmente
+        da espera pelo ffmpeg e pelo serviço de transcrição (rede), que
+        liberam o GIL; as partes em Python puro da análise de áudio dividem
+        o GIL com o vídeo. As mensagens da etapa de áudio são guardadas e
+        impressas, juntas, depois da etapa de vídeo. As duas etapas são
+        independentes até a integração dos resultados.
+        """
         print("="*80)
         print("SISTEMA INTEGRADO DE ANÁLISE DE VÍDEO")
         print("Detecção de Depressão, Violência Doméstica e Problemas de Saúde")
         print("="*80)
         print()
 
-        # Análise de vídeo (expressões, hematomas, marcas)
+        start = time.perf_counter()
+
+        if concurrent:
+            print("Análise visual e de áudio em paralelo\n")
+            output = _ThreadBufferedOutput(sys.stdout)
+            audio_output = []
+            with contextlib.redirect_stdout(output), \
+                    ThreadPoolExecutor(max_workers=1,
+                                       thread_name_prefix='analise-audio') as executor:
+                audio_future = executor.submit(
+                    self._analyze_audio_buffered, output, audio_output)
+                video_report = self._analyze_video(sample_rate)
+                try:
+                    audio_report = audio_future.result()
+                finally:
+                    print(''.join(audio_output), end='')
+        else:
+            video_report = self._analyze_video(sample_rate)
+            audio_report = self._analyze_audio()
+
+        self.timings['total_s'] = round(time.perf_counter() - start, 2)
+        self.timings['concorrente'] = concurrent
+
+        # Integra resultados
+        self._integrate_results(video_report, audio_report)
+
+        # Gera relatório final integrado
+        self.generate_final_report()
+
+        return self.integrated_results
+
+    def _analyze_video(self, sample_rate):
+        """Etapa visual: expressões, hematomas e marcas"""
+        start = time.perf_counter()
         print("\n" + "="*80)
         print("ETAPA 1: ANÁLISE VISUAL (Vídeo)")
         print("="*80)
-        video_results = self.video_analyzer.analyze_video(sample_rate=30)
+        self.video_analyzer.analyze_video(sample_rate=sample_rate)
         video_report = self.video_analyzer.generate_report(
-            'analysis_report.json')
-
-        # Análise de áudio (fala)
+            self._report_path('analysis_report.json'))
+
+        self.timings['video_s'] = round(time.perf_counter() - start, 2)
+        return video_report
+
+    def _analyze_audio_buffered(self, output, messages):
+        """_analyze_audio com a saída guardada em messages (ver analyze)"""
+        with output.buffered() as buffer:
+            try:
+                return self._analyze_audio()
+            finally:
+                messages.append(buffer.getvalue())
+
+    def _analyze_audio(self):
+        """Etapa de áudio: transcrição e características da fala"""
+        start = time.perf_counter()
         print("\n" + "="*80)
         print("ETAPA 2: ANÁLISE DE ÁUDIO (Fala)")
         print("="*80)
@@ -46,17 +161,12 @@ class IntegratedAnalyzer:
 
         if audio_results['transcricao']:
             audio_report = self.audio_analyzer.generate_report(
-                'audio_analysis_report.json')
+                self._report_path('audio_analysis_report.json'))
         else:
             audio_report = None
 
-        # Integra resultados
-        self._integrate_results(video_report, audio_report)
-
-        # Gera relatório final integrado
-        self.generate_final_report()
-
-        return self.integrated_results
+        self.timings['audio_s'] = round(time.perf_counter() - start, 2)
+        return audio_report
 
     def _integrate_results(self, video_report, audio_report):
         """Integra resultados de vídeo e áudio"""
@@ -70,7 +180,8 @@ class IntegratedAnalyzer:
                 'motivo': 'Análise de áudio não concluída'
             },
 
-            'analise_integrada': {}
+            'analise_integrada': {},
+            'tempos_execucao': dict(self.timings)
         }
 
         # Calcula scores integrados
@@ -180,8 +291,8 @@ class IntegratedAnalyzer:
 
     def generate_final_report(self):
         """Gera relatório final consolidado"""
-        output_json = 'RELATORIO_FINAL_INTEGRADO.json'
-        output_txt = 'RELATORIO_FINAL_INTEGRADO.txt'
+        output_json = self._report_path('RELATORIO_FINAL_INTEGRADO.json')
+        output_txt = self._report_path('RELATORIO_FINAL_INTEGRADO.txt')
 
         # Salva JSON
         with open(output_json, 'w', encoding='utf-8') as f:
@@ -275,27 +386,40 @@ class IntegratedAnalyzer:
         print("="*80)
         print(f"✓ {output_json}")
         print(f"✓ {output_txt}")
-        print(f"✓ analysis_report.json (detalhes visuais)")
-        print(f"✓ analysis_report.txt (detalhes visuais)")
+        print(f"✓ {self._report_path('analysis_report.json')} (detalhes visuais)")
+        print(f"✓ {self._report_path('analysis_report.txt')} (detalhes visuais)")
         if self.integrated_results['audio_analysis'].get('disponivel', True):
-            print(f"✓ audio_analysis_report.json (detalhes áudio)")
-            print(f"✓ audio_analysis_report.txt (detalhes áudio)")
+            print(f"✓ {self._report_path('audio_analysis_report.json')} (detalhes áudio)")
+            print(f"✓ {self._report_path('audio_analysis_report.txt')} (detalhes áudio)")
         print("="*80)
 
 
 def main():
     """Função principal"""
-    video_path = 'data/YTDown.com_YouTube_Media_5t_FoFzVcsA_001_720p.mp4'
+    parser = argparse.ArgumentParser(
+        description='Análise integrada de vídeo e áudio (depressão, hematomas, marcas)')
+    parser.add_argument('video', nargs='?', default=DEFAULT_VIDEO,
+                        help=f'Vídeo a analisar (padrão: {DEFAULT_VIDEO})')
+    parser.add_argument('--sample-rate', type=int, default=30,
+                        help='Analisa 1 a cada N frames (padrão: 30)')
+    parser.add_argument('--output-dir', default='.',
+                        help='Pasta dos relatórios (padrão: pasta atual)')
+    parser.add_argument('--sequential', action='store_true',
+                        help='Analisa áudio e vídeo um depois do outro')
+    args = parser.parse_args()
+    video_path = args.video
 
     if not os.path.exists(video_path):
         print(f"ERRO: Vídeo não encontrado em {video_path}")
         return
 
     # Cria analisador integrado
-    analyzer = IntegratedAnalyzer(video_path)
+    os.makedirs(args.output_dir, exist_ok=True)
+    analyzer = IntegratedAnalyzer(video_path, output_dir=args.output_dir)
 
     # Executa análise completa
-    results = analyzer.analyze()
+    results = analyzer.analyze(sample_rate=args.sample_rate,
+                               concurrent=not args.sequential)
 
     print("\n" + "="*80)
     print("ANÁLISE CONCLUÍDA!")
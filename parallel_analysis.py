@@ -0,0 +1,142 @@
+"""
+Análise paralela de um único vídeo longo, dividido em segmentos de tempo.
+
+Cada segmento é analisado num processo separado, com seu próprio
+cv2.VideoCapture e seu próprio detector facial. Os resultados parciais são
+combinados na ordem dos segmentos, antes de _process_final_results, de modo
+que o resultado final depende só da divisão em segmentos, não do número de
+processos que os analisam.
+
+Detectores sem estado entre frames (MediaPipe em modo de imagem estática)
+dão o mesmo resultado com qualquer divisão. Com estado entre frames (o
+rastreamento e a faixa de tamanhos da detecção em pirâmide do
+SimpleVideoAnalyzer), cada segmento começa do zero, com uma detecção
+completa em todas as escalas no seu primeiro frame: o resultado muda com o
+número de segmentos, que por padrão é igual ao número de processos.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from frame_sampling import FrameSampler
+
+
+def split_segments(total_frames, segments):
+    """Divide [0, total_frames) em intervalos contíguos de tamanho semelhante
+
+    O último segmento fica aberto (end_frame=None) para não perder frames
+    quando a contagem informada pelo container é imprecisa.
+    """
+    segments = max(1, min(segments, total_frames))
+    bounds = [total_frames * i // segments for i in range(segments + 1)]
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(segments)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _analyze_segment(task):
+    """Executado no processo filho: analisa um intervalo de frames"""
+    (analyzer_cls, video_path, analyzer_kwargs,
+     start_frame, end_frame, sample_rate, sampling_strategy) = task
+
+    # Analisador novo: o estado entre frames (rastreamento, tamanho das
+    # últimas faces) recomeça no primeiro frame do segmento, com uma
+    # detecção completa em todas as escalas
+    analyzer = analyzer_cls(video_path, **analyzer_kwargs)
+
+    # Numeração global dos frames amostrados (usada nos timestamps das
+    # expressões): quantos frames amostrados existem antes do segmento
+    offset = start_frame // sample_rate
+    analyzer.results['frames_analisados'] = offset
+
+    sampler = FrameSampler(analyzer.cap, sample_rate, sampling_strategy,
+                           start_frame, end_frame)
+    analyzer._run_analysis(sampler)
+    analyzer._release_capture()
+
+    analyzer.results['frames_analisados'] -= offset
+    analyzer.results['amostragem'] = sampler.describe()
+    return analyzer.results
+
+
+def merge_results(results, partial):
+    """Acumula os resultados brutos de um segmento (antes da média final)"""
+    results['depressao']['expressoes_detectadas'].extend(
+        partial['depressao']['expressoes_detectadas'])
+    results['depressao']['score_depressao'] += partial['depressao']['score_depressao']
+    results['depressao']['indicadores'].update(
+        partial['depressao']['indicadores'])
+
+    results['hematomas']['detectados'].extend(
+        partial['hematomas']['detectados'])
+    results['hematomas']['score_risco'] += partial['hematomas']['score_risco']
+
+    results['marcas']['detectadas'].extend(partial['marcas']['detectadas'])
+
+    results['frames_analisados'] += partial['frames_analisados']
+
+    if 'rastreamento' in partial:
+        if 'rastreamento' not in results:
+            results['rastreamento'] = dict(partial['rastreamento'])
+        else:
+            for key in ('deteccoes_completas', 'frames_rastreados',
+                        'rastreamentos_perdidos'):
+                results['rastreamento'][key] += partial['rastreamento'][key]
+
+
+def analyze_video_segments(analyzer, workers=None, segments=None,
+                           sample_rate=30, sampling_strategy='auto',
+                           analyzer_kwargs=None):
+    """Analisa o vídeo do analisador em segmentos paralelos
+
+    workers: número de processos (padrão: número de CPUs)
+    segments: número de segmentos (padrão: igual a workers); fixe-o para
+        que o resultado de detectores com estado entre frames não dependa
+        de workers
+    analyzer_kwargs: argumentos extras para criar o analisador em cada processo
+    """
+    workers = workers or os.cpu_count() or 1
+    segments = segments or workers
+    analyzer_kwargs = analyzer_kwargs or {}
+
+    total_frames = int(analyzer.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = analyzer.cap.get(cv2.CAP_PROP_FPS)
+    analyzer._release_capture()
+
+    if total_frames <= 0:
+        print("AVISO: Número de frames desconhecido. Analisando em um único segmento.")
+        ranges = [(0, None)]
+    else:
+        ranges = split_segments(total_frames, segments)
+
+    print(f"Iniciando análise paralela do vídeo...")
+    print(f"Total de frames: {total_frames}, FPS: {fps}")
+    print(f"Segmentos: {len(ranges)}, Processos: {min(workers, len(ranges))}")
+
+    tasks = [
+        (type(analyzer), analyzer.video_path, analyzer_kwargs,
+         start_frame, end_frame, sample_rate, sampling_strategy)
+        for start_frame, end_frame in ranges
+    ]
+
+    # 'spawn' evita herdar por fork o estado de threads do detector facial
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                             mp_context=context) as pool:
+        partials = list(pool.map(_analyze_segment, tasks))
+
+    for partial in partials:
+        merge_results(analyzer.results, partial)
+
+    analyzer.results['amostragem'] = partials[0]['amostragem']
+    analyzer.results['paralelismo'] = {
+        'segmentos': len(tasks),
+        'processos': min(workers, len(tasks))
+    }
+
+    analyzer._process_final_results()
+
+    return analyzer.results
@@ -0,0 +1,339 @@
+"""
+Extração de características vocais (prosódia) em blocos, com memória constante.
+
+O sinal é lido em blocos de tamanho fixo (de um DecodedAudio ou de um
+arquivo PCM bruto por memory-map) e cada bloco é dividido nos mesmos quadros
+que o librosa usaria no sinal inteiro (quadros centralizados, com as mesmas
+bordas). Só somas e contadores atravessam os blocos, então a memória usada
+não depende da duração da gravação.
+
+Energia e taxa de cruzamentos por zero têm os mesmos valores do cálculo
+sobre o sinal inteiro. O pitch (F0) é estimado por YIN (estimate_f0), com a
+autocorrelação calculada por FFT e vetorizada sobre os quadros, só nos
+quadros de fala; são reportadas média, mediana e variância. Também estima:
+- proporção de pausas: fração dos quadros abaixo do nível de fala, com o
+  ruído de fundo acompanhado continuamente;
+- taxa de fala: picos de energia (núcleos de sílaba) por segundo de fala.
+"""
+
+import numpy as np
+
+# Quadros do librosa usados nas características (2048 amostras, salto de 512)
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+# Bloco lido de cada vez (amostras)
+BLOCK_SIZE = 256 * 1024
+
+# Faixa de F0 procurada (Hz) e limiar da diferença normalizada do YIN
+F0_MIN = 60.0
+F0_MAX = 500.0
+YIN_THRESHOLD = 0.15
+
+
+def pcm_blocks(samples, block_size=BLOCK_SIZE):
+    """Blocos float32 em [-1, 1) de um array int16 (em memória ou memmap)"""
+    for start in range(0, len(samples), block_size):
+        block = samples[start:start + block_size].astype(np.float32)
+        block /= 32768.0
+        yield block
+
+
+def memmap_pcm(path):
+    """Arquivo PCM bruto (16 bits little-endian, mono) por memory-map"""
+    return np.memmap(path, dtype='<i2', mode='r')
+
+
+def _fft_size(n):
+    """Menor tamanho >= n da forma 2^a * 3^b (rápido na FFT)"""
+    best = 1 << (n - 1).bit_length()
+    power3 = 1
+    while power3 < best:
+        size = power3
+        while size < n:
+            size *= 2
+        best = min(best, size)
+        power3 *= 3
+    return best
+
+
+def estimate_f0(frames, sample_rate, fmin=F0_MIN, fmax=F0_MAX,
+                threshold=YIN_THRESHOLD):
+    """F0 (Hz) de cada quadro pelo YIN; 0 nos quadros sem periodicidade
+
+    frames: array (quadros, amostras). A diferença de cada atraso é
+    calculada para todos os quadros de uma vez, com a autocorrelação por
+    FFT; o período é o primeiro mínimo local da diferença normalizada
+    abaixo de threshold, refinado por interpolação parabólica.
+    """
+    count, length = np.shape(frames)
+    if count == 0:
+        return np.zeros(0)
+
+    # Janela de integração de meio quadro: atrasos até a outra metade
+    width = length // 2
+    tau_max = min(int(sample_rate / fmin), length - width)
+    tau_min = max(2, int(sample_rate / fmax))
+    if tau_max - tau_min < 2:
+        raise ValueError("Quadro curto demais para a faixa de F0 pedida")
+
+    # Só as amostras que entram em algum atraso
+    used = width + tau_max
+    frames = np.asarray(frames)[:, :used].astype(np.float64)
+
+    # Autocorrelação r(tau) = sum x[j] x[j + tau], j < width, por FFT. Com
+    # n_fft >= used, a correlação circular só dobra os atrasos negativos
+    # para depois de tau_max: não é preciso dobrar o tamanho com zeros
+    n_fft = _fft_size(used)
+    spectrum = np.fft.rfft(frames, n_fft, axis=1)
+    spectrum *= np.conj(np.fft.rfft(frames[:, :width], n_fft, axis=1))
+    acf = np.fft.irfft(spectrum, n_fft, axis=1)[:, :tau_max + 1]
+
+    # Energia da janela em cada atraso, por soma acumulada
+    energy = np.zeros((count, used + 1))
+    np.cumsum(np.square(frames), axis=1, out=energy[:, 1:])
+    shifted = energy[:, width:width + tau_max + 1] - energy[:, :tau_max + 1]
+
+    # Diferença e diferença normalizada pela média acumulada
+    diff = np.maximum(shifted[:, :1] + shifted - 2 * acf, 0)
+    cmnd = np.ones_like(diff)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    lags = np.arange(1, tau_max + 1)
+    np.divide(diff[:, 1:] * lags, cumulative, out=cmnd[:, 1:],
+              where=cumulative > 0)
+
+    # Primeiro atraso abaixo do limiar em que a diferença para de cair
+    # (o mesmo mínimo local que o YIN encontra descendo a partir do limiar)
+    lag = cmnd[:, tau_min:tau_max]
+    candidates = (lag < threshold) & (lag <= cmnd[:, tau_min + 1:tau_max + 1])
+    voiced = candidates.any(axis=1)
+    tau = tau_min + np.argmax(candidates, axis=1)
+
+    rows = np.arange(count)
+    before, at, after = (cmnd[rows, tau - 1], cmnd[rows, tau],
+                         cmnd[rows, tau + 1])
+    curvature = before - 2 * at + after
+    shift = np.zeros(count)
+    np.divide(before - after, 2 * curvature, out=shift, where=curvature > 0)
+
+    return np.where(voiced, sample_rate / (tau + np.clip(shift, -1, 1)), 0.0)
+
+
+class _StreamingFramer:
+    """Divide blocos consecutivos nos quadros centralizados do librosa
+
+    Equivale a util.frame(np.pad(y, frame_length // 2, mode=pad_mode)) no
+    sinal inteiro ('constant' como em rms e stft, 'edge' como em
+    zero_crossing_rate), guardando entre blocos só o final incompleto.
+    """
+
+    def __init__(self, frame_length, hop_length, pad_mode='constant'):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.pad_mode = pad_mode
+        self._tail = None
+        self._last = 0.0
+
+    def _frames(self, signal):
+        """Quadros completos de signal; guarda o restante para o próximo bloco"""
+        if len(signal) < self.frame_length:
+            self._tail = signal
+            return np.empty((0, self.frame_length), dtype=signal.dtype)
+
+        count = 1 + (len(signal) - self.frame_length) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(
+            signal, self.frame_length)[::self.hop_length][:count]
+        self._tail = signal[count * self.hop_length:]
+        return frames
+
+    def _pad(self, value, dtype):
+        if self.pad_mode == 'edge':
+            return np.full(self.frame_length // 2, value, dtype=dtype)
+        return np.zeros(self.frame_length // 2, dtype=dtype)
+
+    def feed(self, block):
+        """Quadros que ficam completos com este bloco"""
+        if len(block) == 0:
+            return np.empty((0, self.frame_length), dtype=block.dtype)
+        if self._tail is None:
+            self._tail = self._pad(block[0], block.dtype)
+        self._last = block[-1]
+        return self._frames(np.concatenate([self._tail, block]))
+
+    def finish(self):
+        """Últimos quadros, com o preenchimento do fim do sinal"""
+        if self._tail is None:
+            return np.empty((0, self.frame_length), dtype=np.float32)
+        signal = np.concatenate([self._tail, self._pad(self._last, self._tail.dtype)])
+        return self._frames(signal)
+
+
+class ProsodyExtractor:
+    """Características vocais acumuladas bloco a bloco
+
+    Uso: chamar feed(bloco) para cada bloco float32 e finish() no fim.
+
+    margin_db / floor_db: um quadro é fala quando sua energia passa o ruído
+        de fundo em margin_db (e nunca abaixo de floor_db dBFS)
+    floor_rise_db: quanto o ruído de fundo estimado pode subir por segundo
+    prominence_db: queda mínima de energia ao redor de um núcleo de sílaba
+    min_syllable_gap: intervalo mínimo (s) entre núcleos de sílaba
+    fmin / fmax / yin_threshold: faixa de F0 (Hz) e limiar do YIN
+    """
+
+    def __init__(self, sample_rate, margin_db=12.0, floor_db=-50.0,
+                 floor_rise_db=0.5, prominence_db=3.0, min_syllable_gap=0.1,
+                 fmin=F0_MIN, fmax=F0_MAX, yin_threshold=YIN_THRESHOLD):
+        self.sample_rate = sample_rate
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.prominence_db = prominence_db
+        self.fmin = fmin
+        self.fmax = fmax
+        self.yin_threshold = yin_threshold
+
+        frame_rate = sample_rate / HOP_LENGTH
+        self._floor_rise = floor_rise_db / frame_rate
+        self._min_gap = int(round(min_syllable_gap * frame_rate))
+
+        self._energy_frames = _StreamingFramer(FRAME_LENGTH, HOP_LENGTH, 'constant')
+        self._zcr_frames = _StreamingFramer(FRAME_LENGTH, HOP_LENGTH, 'edge')
+
+        self.frames = 0
+        self.energy_sum = 0.0
+        self.zcr_sum = 0.0
+        self.zcr_frames = 0
+        self.pitch_sum = 0.0
+        self.pitch_square_sum = 0.0
+        self.pitch_count = 0
+        # Histograma de 1 Hz para a mediana, sem guardar os valores
+        self._pitch_histogram = np.zeros(int(np.ceil(fmax - fmin)) + 1, dtype=np.int64)
+
+        # Estado do detector de fala e dos núcleos de sílaba
+        self.speech_frames = 0
+        self.syllables = 0
+        self._noise_floor = None
+        self._envelope = None
+        self._peak = None
+        self._valley = None
+        self._since_syllable = self._min_gap
+
+    def feed(self, block):
+        """Processa um bloco float32 de amostras"""
+        self._process_energy(self._energy_frames.feed(block))
+        self._process_zcr(self._zcr_frames.feed(block))
+
+    def _process_energy(self, frames):
+        """Energia (RMS), detecção de fala e pitch de um lote de quadros"""
+        if len(frames) == 0:
+            return
+
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        self.frames += len(rms)
+        self.energy_sum += float(rms.sum(dtype=np.float64))
+
+        speaking = np.array([self._track_speech(float(level))
+                             for level in 20 * np.log10(rms + 1e-10)])
+        if speaking.any():
+            self._accumulate_pitch(frames[speaking])
+
+    def _accumulate_pitch(self, frames):
+        """F0 dos quadros de fala: acumula somas e histograma"""
+        f0 = estimate_f0(frames, self.sample_rate, self.fmin, self.fmax,
+                         self.yin_threshold)
+        f0 = f0[(f0 >= self.fmin) & (f0 <= self.fmax)]
+        self.pitch_sum += float(f0.sum())
+        self.pitch_square_sum += float(np.square(f0).sum())
+        self.pitch_count += len(f0)
+        bins = np.round(f0 - self.fmin).astype(np.intp)
+        self._pitch_histogram += np.bincount(bins, minlength=len(self._pitch_histogram))
+
+    def _track_speech(self, level):
+        """Atualiza ruído de fundo, fala/pausa e contagem de sílabas
+
+        Retorna se o quadro é de fala.
+        """
+        if self._noise_floor is None:
+            self._noise_floor = level
+            self._envelope = level
+        # O ruído de fundo cai imediatamente e sobe devagar
+        self._noise_floor = min(level, self._noise_floor + self._floor_rise)
+        self._envelope = 0.5 * self._envelope + 0.5 * level
+        self._since_syllable += 1
+
+        speaking = level > max(self.floor_db, self._noise_floor + self.margin_db)
+        if speaking:
+            self.speech_frames += 1
+
+        # Núcleo de sílaba: máximo local do envelope, proeminente em relação
+        # ao vale anterior e ao seguinte
+        envelope = self._envelope
+        if self._valley is None or envelope < self._valley:
+            self._valley = envelope
+        if self._peak is None:
+            if speaking and envelope >= self._valley + self.prominence_db:
+                self._peak = envelope
+        elif envelope > self._peak:
+            self._peak = envelope
+        elif envelope <= self._peak - self.prominence_db:
+            if self._since_syllable >= self._min_gap:
+                self.syllables += 1
+                self._since_syllable = 0
+            self._peak = None
+            self._valley = envelope
+
+        return speaking
+
+    def _process_zcr(self, frames):
+        """Taxa de cruzamentos por zero (mesma regra do librosa)"""
+        if len(frames) == 0:
+            return
+        # Valores muito próximos de zero contam como zero (positivos)
+        signs = np.signbit(np.where(np.abs(frames) <= 1e-10, 0, frames))
+        crossings = signs[:, 1:] != signs[:, :-1]
+        # O librosa conta o primeiro elemento de cada quadro como sem cruzamento
+        self.zcr_sum += float(crossings.sum(axis=1).sum(dtype=np.float64) / FRAME_LENGTH)
+        self.zcr_frames += len(frames)
+
+    def finish(self):
+        """Processa o final do sinal e retorna as características"""
+        self._process_energy(self._energy_frames.finish())
+        self._process_zcr(self._zcr_frames.finish())
+        return self.features()
+
+    def features(self):
+        """Características acumuladas até aqui"""
+        seconds_per_frame = HOP_LENGTH / self.sample_rate
+        speech_time = self.speech_frames * seconds_per_frame
+
+        return {
+            **self._pitch_statistics(),
+            'energia': self.energy_sum,
+            'zero_crossing_rate': self.zcr_sum / self.zcr_frames if self.zcr_frames else 0,
+            'proporcao_pausas': 1 - self.speech_frames / self.frames if self.frames else 0,
+            'tempo_fala_s': speech_time,
+            'taxa_fala': self.syllables / speech_time if speech_time else 0
+        }
+
+    def _pitch_statistics(self):
+        """Média, mediana (resolução de 1 Hz) e variância do F0"""
+        count = self.pitch_count
+        if count == 0:
+            return {'pitch_medio': 0, 'pitch_mediana': 0, 'pitch_variancia': 0}
+
+        mean = self.pitch_sum / count
+        variance = max(0.0, self.pitch_square_sum / count - mean * mean)
+        middle = np.searchsorted(np.cumsum(self._pitch_histogram), (count + 1) / 2)
+        return {
+            'pitch_medio': mean,
+            'pitch_mediana': float(self.fmin + middle),
+            'pitch_variancia': variance
+        }
+
+
+def extract_prosody(samples, sample_rate, block_size=BLOCK_SIZE, **options):
+    """Características vocais de um array int16 (em memória ou memmap)"""
+    extractor = ProsodyExtractor(sample_rate, **options)
+    for block in pcm_blocks(samples, block_size):
+        extractor.feed(block)
+    return extractor.finish()
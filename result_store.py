@@ -0,0 +1,202 @@
+"""
+Armazenamento colunar dos resultados da análise de vídeo.
+
+Em vez de um dicionário Python por expressão, hematoma ou marca, os valores
+ficam em arrays estruturados do NumPy que crescem em blocos de tamanho fixo
+(sem realocar o que já foi gravado). Localizações e tipos são textos muito
+repetidos: cada um é guardado uma única vez e as linhas guardam só o código.
+As contagens por localização e por tipo são mantidas à medida que as
+detecções chegam.
+
+Iterar sobre um armazenamento produz os mesmos dicionários de antes, então
+o código que lê os resultados continua funcionando.
+"""
+
+import numpy as np
+
+CHUNK_SIZE = 4096
+
+# Colunas de uma detecção (hematoma ou marca)
+DETECTION_FIELDS = [
+    ('area', np.float64),
+    ('location', np.uint16),
+    ('type', np.uint16),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('w', np.int32),
+    ('h', np.int32),
+]
+
+
+class ColumnStore:
+    """Tabela de colunas NumPy que cresce em blocos de chunk_size linhas"""
+
+    def __init__(self, fields, chunk_size=CHUNK_SIZE):
+        self.dtype = np.dtype(fields)
+        self.chunk_size = chunk_size
+        self._chunks = []
+        self._used = 0  # linhas ocupadas no último bloco
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, record):
+        """Acrescenta uma linha a partir de um dicionário com as colunas"""
+        if not self._chunks or self._used == len(self._chunks[-1]):
+            self._chunks.append(np.zeros(self.chunk_size, self.dtype))
+            self._used = 0
+
+        self._chunks[-1][self._used] = tuple(
+            record[name] for name in self.dtype.names)
+        self._used += 1
+        self._length += 1
+
+    def extend(self, rows):
+        """Acrescenta as linhas de outro ColumnStore ou de um array estruturado"""
+        if isinstance(rows, ColumnStore):
+            rows = rows.to_array()
+        if len(rows) == 0:
+            return
+
+        # O bloco parcial é encolhido para não guardar espaço vazio no meio
+        if self._chunks and self._used < len(self._chunks[-1]):
+            self._chunks[-1] = self._chunks[-1][:self._used].copy()
+
+        self._chunks.append(np.array(rows, dtype=self.dtype))
+        self._used = len(rows)
+        self._length += len(rows)
+
+    def to_array(self):
+        """Todas as linhas num único array estruturado"""
+        if not self._chunks:
+            return np.zeros(0, self.dtype)
+        return np.concatenate(self._chunks[:-1] + [self._chunks[-1][:self._used]])
+
+    def column(self, name):
+        """Uma coluna como array"""
+        return self.to_array()[name]
+
+    def __iter__(self):
+        names = self.dtype.names
+        for row in self.to_array():
+            yield dict(zip(names, row.item()))
+
+    def __getstate__(self):
+        # Transferido sem o espaço livre do último bloco
+        return {'fields': self.dtype.descr, 'chunk_size': self.chunk_size,
+                'rows': self.to_array()}
+
+    def __setstate__(self, state):
+        self.__init__(state['fields'], state['chunk_size'])
+        self.extend(state['rows'])
+
+
+class DetectionStore:
+    """Hematomas ou marcas em colunas, com localização e tipo codificados"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.rows = ColumnStore(DETECTION_FIELDS, chunk_size)
+        self.locations = []  # código -> texto
+        self.types = []
+        self._location_codes = {}
+        self._type_codes = {}
+
+        # Contagens mantidas incrementalmente (na ordem da primeira ocorrência)
+        self.location_counts = {}
+        self.type_counts = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def from_columns(cls, rows, locations, types, chunk_size=CHUNK_SIZE):
+        """Cria o armazenamento a partir de linhas já codificadas
+
+        rows: array estruturado com DETECTION_FIELDS, cujos códigos de
+        localização e tipo indexam as listas locations e types. Os textos
+        são recodificados na ordem da primeira ocorrência, como em add.
+        """
+        store = cls(chunk_size)
+        rows = np.array(rows, dtype=store.rows.dtype)
+
+        for column, table, names, counts in (
+                ('location', locations, store.locations, store.location_counts),
+                ('type', types, store.types, store.type_counts)):
+            codes, first, inverse, totals = np.unique(
+                rows[column], return_index=True, return_inverse=True,
+                return_counts=True)
+            order = np.argsort(first, kind='stable')
+            new_codes = np.empty(len(codes), dtype=np.uint16)
+            new_codes[order] = np.arange(len(codes))
+            rows[column] = new_codes[inverse.reshape(-1)]
+
+            for index in order:
+                names.append(table[codes[index]])
+                counts[names[-1]] = int(totals[index])
+
+        store._location_codes = {text: code for code, text in enumerate(store.locations)}
+        store._type_codes = {text: code for code, text in enumerate(store.types)}
+        store.rows.extend(rows)
+        return store
+
+    @staticmethod
+    def _intern(text, codes, table):
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(table)
+            table.append(text)
+        return code
+
+    def add(self, detection):
+        """Acrescenta uma detecção no formato de detect_bruises_and_marks"""
+        location = detection['location']
+        kind = detection['type']
+        x, y, w, h = detection['coords']
+
+        self.rows.append({
+            'area': detection['area'],
+            'location': self._intern(location, self._location_codes, self.locations),
+            'type': self._intern(kind, self._type_codes, self.types),
+            'x': x, 'y': y, 'w': w, 'h': h
+        })
+
+        self.location_counts[location] = self.location_counts.get(location, 0) + 1
+        self.type_counts[kind] = self.type_counts.get(kind, 0) + 1
+
+    def extend(self, detections):
+        """Acrescenta várias detecções (lista de dicionários ou outro DetectionStore)"""
+        if isinstance(detections, DetectionStore):
+            self._merge(detections)
+            return
+        for detection in detections:
+            self.add(detection)
+
+    def _merge(self, other):
+        """Acrescenta as linhas de outro armazenamento, recodificando os textos"""
+        rows = other.rows.to_array()
+        location_map = np.array(
+            [self._intern(text, self._location_codes, self.locations)
+             for text in other.locations] or [0], dtype=np.uint16)
+        type_map = np.array(
+            [self._intern(text, self._type_codes, self.types)
+             for text in other.types] or [0], dtype=np.uint16)
+
+        rows['location'] = location_map[rows['location']]
+        rows['type'] = type_map[rows['type']]
+        self.rows.extend(rows)
+
+        for location, count in other.location_counts.items():
+            self.location_counts[location] = self.location_counts.get(location, 0) + count
+        for kind, count in other.type_counts.items():
+            self.type_counts[kind] = self.type_counts.get(kind, 0) + count
+
+    def __iter__(self):
+        for row in self.rows.to_array():
+            area, location, kind, x, y, w, h = row.item()
+            yield {
+                'area': area,
+                'location': self.locations[location],
+                'coords': (x, y, w, h),
+                'type': self.types[kind]
+            }
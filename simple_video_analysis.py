@@ -3,15 +3,52 @@ import numpy as np
 from datetime import datetime
 import json
 import os
-from collections import defaultdict
+import time
+
+from checkpoint import AnalysisCheckpoint
+from color_classifier import DEFAULT_COLOR_CLASSIFIER, MORPH_KERNEL
+from face_tracking import FaceTracker
+from haar_detection import PyramidHaarDetector
+from frame_pipeline import DecodeAheadPipeline
+from frame_sampling import create_sampler, format_sampling_summary
+from parallel_analysis import analyze_video_segments
+from result_store import ColumnStore, DetectionStore
+
+# Colunas de uma expressão facial analisada
+EXPRESSION_FIELDS = [
+    ('eyes_detected', np.int32),
+    ('face_brightness', np.float64),
+    ('timestamp', np.int64),
+]
 
 
 class SimpleVideoAnalyzer:
     """Análise simplificada de vídeos para detectar sinais de depressão, hematomas e problemas de saúde"""
 
-    def __init__(self, video_path):
+    def __init__(self, video_path, tracking=False, detect_every=10,
+                 track_threshold=0.6, pyramid=False, detection_width=640):
+        """tracking=True ativa o modo detectar-e-rastrear: a detecção facial
+        completa roda a cada detect_every frames analisados e, entre elas, as
+        faces são rastreadas (ver face_tracking.py). Abaixo da confiança
+        track_threshold a detecção completa é refeita.
+
+        pyramid=True procura as faces num frame reduzido à largura
+        detection_width e os olhos só na metade superior da face (ver
+        haar_detection.py).
+        """
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
+        self._cap = None
+        self.detection_options = {
+            'tracking': tracking,
+            'detect_every': detect_every,
+            'track_threshold': track_threshold,
+            'pyramid': pyramid,
+            'detection_width': detection_width
+        }
+        self.face_tracker = (FaceTracker(detect_every, track_threshold)
+                             if tracking else None)
+        self.pyramid_detector = (PyramidHaarDetector(detection_width)
+                                 if pyramid else None)
 
         # Usar detectores Haar Cascade (mais simples e confiável)
         cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
@@ -22,23 +59,41 @@ class SimpleVideoAnalyzer:
         # Resultados da análise
         self.results = {
             'depressao': {
-                'expressoes_detectadas': [],
+                'expressoes_detectadas': ColumnStore(EXPRESSION_FIELDS),
                 'score_depressao': 0,
-                'indicadores': []
+                # Conjunto ordenado (dicionário com valores None)
+                'indicadores': {}
             },
             'hematomas': {
-                'detectados': [],
+                'detectados': DetectionStore(),
                 'localizacoes': [],
                 'score_risco': 0
             },
             'marcas': {
-                'detectadas': [],
+                'detectadas': DetectionStore(),
                 'tipos': []
             },
             'frames_analisados': 0,
+            'amostragem': {},
             'timestamp': datetime.now().isoformat()
         }
 
+        # Verdadeiro depois de _process_final_results
+        self._finalized = False
+
+    @property
+    def cap(self):
+        """VideoCapture do vídeo, aberto no primeiro uso"""
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.video_path)
+        return self._cap
+
+    def _release_capture(self):
+        """Fecha o vídeo (um novo acesso a self.cap o reabre)"""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
     def detect_bruises_and_marks(self, frame, face_region):
         """Detecta hematomas, marcas e possíveis sinais de violência ou problemas de saúde"""
         x, y, w, h = face_region
@@ -61,25 +116,12 @@ class SimpleVideoAnalyzer:
         bruises = []
         marks = []
 
-        # Detecção de hematomas (tons roxos, azuis escuros, amarelados)
-        lower_purple = np.array([120, 30, 30])
-        upper_purple = np.array([160, 255, 200])
-        mask_purple = cv2.inRange(hsv, lower_purple, upper_purple)
+        # Classifica os pixels de uma vez: hematomas (tons roxos, azuis
+        # escuros, amarelados) e marcas vermelhas
+        mask_bruise, mask_red = DEFAULT_COLOR_CLASSIFIER.classify(hsv)
 
-        lower_yellow = np.array([20, 40, 40])
-        upper_yellow = np.array([40, 255, 200])
-        mask_yellow = cv2.inRange(hsv, lower_yellow, upper_yellow)
-
-        lower_dark = np.array([0, 0, 0])
-        upper_dark = np.array([180, 255, 80])
-        mask_dark = cv2.inRange(hsv, lower_dark, upper_dark)
-
-        mask_bruise = cv2.bitwise_or(mask_purple, mask_yellow)
-        mask_bruise = cv2.bitwise_or(mask_bruise, mask_dark)
-
-        kernel = np.ones((5, 5), np.uint8)
-        mask_bruise = cv2.morphologyEx(mask_bruise, cv2.MORPH_OPEN, kernel)
-        mask_bruise = cv2.morphologyEx(mask_bruise, cv2.MORPH_CLOSE, kernel)
+        mask_bruise = cv2.morphologyEx(mask_bruise, cv2.MORPH_OPEN, MORPH_KERNEL)
+        mask_bruise = cv2.morphologyEx(mask_bruise, cv2.MORPH_CLOSE, MORPH_KERNEL)
 
         contours, _ = cv2.findContours(
             mask_bruise, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -103,16 +145,7 @@ class SimpleVideoAnalyzer:
                 })
 
         # Detecção de marcas vermelhas
-        lower_red1 = np.array([0, 50, 50])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 50, 50])
-        upper_red2 = np.array([180, 255, 255])
-
-        mask_red1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        mask_red2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        mask_red = cv2.bitwise_or(mask_red1, mask_red2)
-
-        mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, kernel)
+        mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, MORPH_KERNEL)
         contours_red, _ = cv2.findContours(
             mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -156,123 +189,299 @@ class SimpleVideoAnalyzer:
 
         return ' - '.join(location)
 
-    def analyze_video(self, sample_rate=30):
-        """Analisa o vídeo completo"""
-        frame_count = 0
-        processed_count = 0
-
+    def analyze_video(self, sample_rate=30, sampling_strategy='auto',
+                      adaptive=False, min_interval=10, max_interval=120,
+                      scene_threshold=10.0, pipeline=False, queue_size=8,
+                      live_report=None, live_interval=60.0,
+                      checkpoint=None, checkpoint_interval=300.0, resume=False,
+                      frame_cache=None):
+        """Analisa o vídeo completo
+
+        sampling_strategy define como os frames descartados são pulados
+        ('auto', 'read', 'grab' ou 'seek', ver frame_sampling.py).
+        Com adaptive=True só os frames com mudança de cena são analisados.
+        Com pipeline=True a decodificação roda numa thread separada.
+        Com live_report, um relatório parcial (ver snapshot_report) é gravado
+        nesse caminho a cada live_interval segundos.
+        Com checkpoint, o estado da análise é gravado nesse arquivo a cada
+        checkpoint_interval segundos; com resume=True, uma análise
+        interrompida continua a partir do último checkpoint (ver
+        checkpoint.py).
+        Com frame_cache (um FrameCache), os frames amostrados são lidos do
+        cache em disco quando já foram gravados por uma análise anterior
+        (ver frame_cache.py).
+        """
         fps = self.cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
+        sampler = create_sampler(
+            self.cap, sample_rate, sampling_strategy, adaptive,
+            min_interval, max_interval, scene_threshold)
+
+        sampling_parameters = {
+            'sample_rate': sample_rate,
+            'adaptive': adaptive,
+            'min_interval': min_interval,
+            'max_interval': max_interval,
+            'scene_threshold': scene_threshold
+        }
+
+        checkpointer = None
+        if checkpoint:
+            parameters = {
+                **sampling_parameters,
+                'sampling_strategy': sampling_strategy,
+                'detector': dict(self.detection_options)
+            }
+            checkpointer = AnalysisCheckpoint(
+                checkpoint, self.video_path, parameters, checkpoint_interval)
+
+            saved = checkpointer.load() if resume else None
+            if saved:
+                self._restore_checkpoint_state(saved['analisador'])
+                sampler.load_state_dict(saved['amostrador'])
+
+        if frame_cache and checkpointer:
+            print("AVISO: O cache de frames não é usado junto com checkpoint.")
+        elif frame_cache:
+            sampler = frame_cache.wrap(
+                self.video_path, sampler, sampling_parameters, total_frames)
+
         print(f"Iniciando análise do vídeo...")
         print(f"Total de frames: {total_frames}, FPS: {fps}")
+        print(f"Estratégia de amostragem: {sampler.describe()['estrategia']}")
+        if self.results['frames_analisados']:
+            print(f"Retomando após {self.results['frames_analisados']} frames já analisados")
+
+        self._run_analysis(sampler, pipeline, queue_size,
+                           live_report, live_interval, checkpointer)
+
+        self._release_capture()
+        self.results['amostragem'] = sampler.describe()
+        self._process_final_results()
 
-        while self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        if checkpointer:
+            checkpointer.remove()
 
-            frame_count += 1
+        return self.results
 
-            if frame_count % sample_rate != 0:
-                continue
+    def _run_analysis(self, sampler, pipeline=False, queue_size=8,
+                      live_report=None, live_interval=60.0, checkpoint=None):
+        """Analisa os frames entregues pelo amostrador"""
+        processed_count = self.results['frames_analisados']
+        last_flush = time.monotonic()
+
+        # Com checkpoint, o estado do amostrador é capturado junto com cada
+        # frame (na thread de decodificação, quando há pipeline), pois o
+        # amostrador pode estar à frente do frame em análise
+        def prepare(frame):
+            state = sampler.state_dict() if checkpoint else None
+            return self._prepare_frame(frame), state
+
+        if pipeline:
+            frames = DecodeAheadPipeline(sampler, prepare, queue_size)
+        else:
+            frames = ((frame_count, frame, prepare(frame))
+                      for frame_count, frame in sampler)
 
+        for frame_count, frame, (gray, sampler_state) in frames:
             processed_count += 1
             self.results['frames_analisados'] = processed_count
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-
-            for (x, y, w, h) in faces:
-                face_region = (x, y, w, h)
-                face_roi = gray[y:y+h, x:x+w]
-                eyes = self.eye_cascade.detectMultiScale(face_roi)
-
-                # Análise simplificada
-                depression_score = 0
-                indicators = []
-
-                # Detecta olhos para avaliar cansaço
-                if len(eyes) < 2:
-                    indicators.append(
-                        'Dificuldade em detectar ambos os olhos (possível cansaço ou expressão fechada)')
-                    depression_score += 1
-
-                # Análise de brilho (pessoas deprimidas podem ter expressão "apagada")
-                face_brightness = np.mean(face_roi)
-                if face_brightness < 80:
-                    indicators.append(
-                        'Expressão com baixa luminosidade (pode indicar rosto "apagado")')
-                    depression_score += 1
-
-                expression_data = {
-                    'eyes_detected': len(eyes),
-                    'face_brightness': float(face_brightness),
-                    'timestamp': processed_count
-                }
-
-                self.results['depressao']['expressoes_detectadas'].append(
-                    expression_data)
-                self.results['depressao']['score_depressao'] += depression_score
-                if indicators:
-                    self.results['depressao']['indicadores'].extend(indicators)
-
-                # Detecção de hematomas e marcas
-                bruises, marks = self.detect_bruises_and_marks(
-                    frame, face_region)
-
-                if bruises:
-                    self.results['hematomas']['detectados'].extend(bruises)
-                    self.results['hematomas']['score_risco'] += len(
-                        bruises) * 3
-
-                if marks:
-                    self.results['marcas']['detectadas'].extend(marks)
+            self._analyze_frame(frame, gray)
 
             if processed_count % 10 == 0:
                 print(f"Processados {processed_count} frames...")
 
-        self.cap.release()
-        self._process_final_results()
+            if live_report and time.monotonic() - last_flush >= live_interval:
+                self.results['amostragem'] = sampler.describe()
+                self.snapshot_report(live_report)
+                last_flush = time.monotonic()
+
+            if checkpoint and checkpoint.due():
+                checkpoint.save(sampler_state, self._checkpoint_state())
+
+        if pipeline:
+            self.results['pipeline'] = frames.stats()
+        if self.face_tracker:
+            self.results['rastreamento'] = self.face_tracker.describe()
+
+    def _checkpoint_state(self):
+        """Estado do analisador gravado no checkpoint"""
+        return {
+            'results': self.results,
+            'face_tracker': self.face_tracker,
+            'pyramid_detector': self.pyramid_detector
+        }
 
-        return self.results
+    def _restore_checkpoint_state(self, state):
+        """Restaura o estado gravado por _checkpoint_state"""
+        self.results = state['results']
+        self.face_tracker = state['face_tracker']
+        self.pyramid_detector = state['pyramid_detector']
+
+    def analyze_video_parallel(self, workers=None, sample_rate=30,
+                               sampling_strategy='auto', segments=None):
+        """Analisa o vídeo em segmentos de tempo, um processo por segmento
+
+        Com tracking=True ou pyramid=True, o rastreamento e a faixa de
+        tamanhos da pirâmide recomeçam no início de cada segmento, com uma
+        detecção completa em todas as escalas, então o resultado depende do
+        número de segmentos (por padrão, igual a workers). Com segments
+        fixo, o resultado é o mesmo com qualquer número de processos.
+        """
+        options = self.detection_options
+        if (options['tracking'] or options['pyramid']) and segments is None:
+            print("AVISO: Com rastreamento ou pirâmide, o resultado depende do "
+                  "número de segmentos (padrão: igual a workers). Informe "
+                  "segments para um resultado que não dependa do número de "
+                  "processos.")
+        return analyze_video_segments(
+            self, workers, segments, sample_rate, sampling_strategy,
+            self.detection_options)
+
+    def _prepare_frame(self, frame):
+        """Converte para tons de cinza para os detectores Haar"""
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _detect_faces(self, gray):
+        """Detecção facial completa no frame inteiro"""
+        if self.pyramid_detector:
+            return self.pyramid_detector.detect_faces(self.face_cascade, gray)
+        return self.face_cascade.detectMultiScale(gray, 1.3, 5)
+
+    def _detect_eyes(self, face_roi):
+        """Detecção dos olhos na região da face"""
+        if self.pyramid_detector:
+            return self.pyramid_detector.detect_eyes(self.eye_cascade, face_roi)
+        return self.eye_cascade.detectMultiScale(face_roi)
+
+    def _analyze_frame(self, frame, gray):
+        """Analisa expressões, hematomas e marcas de um frame amostrado"""
+        if self.face_tracker:
+            faces = self.face_tracker.update(gray, self._detect_faces)
+        else:
+            faces = self._detect_faces(gray)
+
+        for (x, y, w, h) in faces:
+            face_region = (x, y, w, h)
+            face_roi = gray[y:y+h, x:x+w]
+            eyes = self._detect_eyes(face_roi)
+
+            # Análise simplificada
+            depression_score = 0
+            indicators = []
+
+            # Detecta olhos para avaliar cansaço
+            if len(eyes) < 2:
+                indicators.append(
+                    'Dificuldade em detectar ambos os olhos (possível cansaço ou expressão fechada)')
+                depression_score += 1
+
+            # Análise de brilho (pessoas deprimidas podem ter expressão "apagada")
+            face_brightness = np.mean(face_roi)
+            if face_brightness < 80:
+                indicators.append(
+                    'Expressão com baixa luminosidade (pode indicar rosto "apagado")')
+                depression_score += 1
+
+            expression_data = {
+                'eyes_detected': len(eyes),
+                'face_brightness': float(face_brightness),
+                'timestamp': self.results['frames_analisados']
+            }
+
+            self.results['depressao']['expressoes_detectadas'].append(
+                expression_data)
+            self.results['depressao']['score_depressao'] += depression_score
+            if indicators:
+                self.results['depressao']['indicadores'].update(
+                    dict.fromkeys(indicators))
+
+            # Detecção de hematomas e marcas
+            bruises, marks = self.detect_bruises_and_marks(
+                frame, face_region)
+
+            if bruises:
+                self.results['hematomas']['detectados'].extend(bruises)
+                self.results['hematomas']['score_risco'] += len(
+                    bruises) * 3
+
+            if marks:
+                self.results['marcas']['detectadas'].extend(marks)
+
+    def _current_aggregates(self):
+        """Agregados correntes no formato dos resultados finais
+
+        A soma dos scores e as contagens por localização e por tipo são
+        atualizadas a cada frame analisado, então o cálculo não depende do
+        tamanho do vídeo e não altera self.results.
+        """
+        score = self.results['depressao']['score_depressao']
+        if not self._finalized and self.results['frames_analisados'] > 0:
+            score /= self.results['frames_analisados']
+
+        return {
+            'score_depressao': score,
+            'indicadores': list(self.results['depressao']['indicadores']),
+            'localizacoes': dict(
+                self.results['hematomas']['detectados'].location_counts),
+            'tipos': dict(self.results['marcas']['detectadas'].type_counts)
+        }
 
     def _process_final_results(self):
         """Processa e sumariza os resultados finais"""
-        if self.results['frames_analisados'] > 0:
-            self.results['depressao']['score_depressao'] /= self.results['frames_analisados']
-
-        self.results['depressao']['indicadores'] = list(set(
-            self.results['depressao']['indicadores']
-        ))
-
-        location_count = defaultdict(int)
-        for bruise in self.results['hematomas']['detectados']:
-            location_count[bruise['location']] += 1
+        aggregates = self._current_aggregates()
 
-        self.results['hematomas']['localizacoes'] = dict(location_count)
+        # Média do score de depressão e indicadores únicos, na ordem em que
+        # apareceram
+        self.results['depressao']['score_depressao'] = aggregates['score_depressao']
+        self.results['depressao']['indicadores'] = aggregates['indicadores']
 
-        mark_types = defaultdict(int)
-        for mark in self.results['marcas']['detectadas']:
-            mark_types[mark['type']] += 1
+        # Contagens por localização e por tipo
+        self.results['hematomas']['localizacoes'] = aggregates['localizacoes']
+        self.results['marcas']['tipos'] = aggregates['tipos']
 
-        self.results['marcas']['tipos'] = dict(mark_types)
+        self._finalized = True
 
     def generate_report(self, output_path='analysis_report.json'):
         """Gera relatório completo da análise"""
+        report = self._build_report(self._current_aggregates())
+        self._write_report(report, output_path)
+
+        return report
+
+    def snapshot_report(self, output_path=None):
+        """Relatório parcial, no formato de generate_report, a qualquer momento
+
+        Pode ser chamado durante a análise (por exemplo, de outra thread):
+        usa os agregados correntes e não altera self.results. Com
+        output_path, grava também os relatórios JSON e texto.
+        """
+        report = self._build_report(self._current_aggregates())
+        report['parcial'] = not self._finalized
+
+        if output_path:
+            self._write_report(report, output_path)
+
+        return report
+
+    def _build_report(self, aggregates):
+        """Monta o relatório a partir dos agregados de _current_aggregates"""
         report = {
             'arquivo_analisado': self.video_path,
             'timestamp_analise': self.results['timestamp'],
             'frames_analisados': self.results['frames_analisados'],
+            'amostragem': self.results['amostragem'],
 
             'analise_depressao': {
-                'score': round(self.results['depressao']['score_depressao'], 2),
+                'score': round(aggregates['score_depressao'], 2),
                 'nivel': self._interpret_depression_score(
-                    self.results['depressao']['score_depressao']
+                    aggregates['score_depressao']
                 ),
-                'indicadores_encontrados': self.results['depressao']['indicadores'],
+                'indicadores_encontrados': aggregates['indicadores'],
                 'recomendacao': self._get_depression_recommendation(
-                    self.results['depressao']['score_depressao']
+                    aggregates['score_depressao']
                 )
             },
 
@@ -282,30 +491,43 @@ class SimpleVideoAnalyzer:
                 'nivel_risco': self._interpret_bruise_risk(
                     self.results['hematomas']['score_risco']
                 ),
-                'localizacoes': self.results['hematomas']['localizacoes'],
+                'localizacoes': aggregates['localizacoes'],
                 'recomendacao': self._get_bruise_recommendation(
                     self.results['hematomas']['score_risco'],
-                    self.results['hematomas']['localizacoes']
+                    aggregates['localizacoes']
                 )
             },
 
             'analise_marcas': {
                 'total_detectado': len(self.results['marcas']['detectadas']),
-                'tipos': self.results['marcas']['tipos'],
+                'tipos': aggregates['tipos'],
                 'recomendacao': self._get_marks_recommendation(
                     len(self.results['marcas']['detectadas'])
                 )
             }
         }
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=4, ensure_ascii=False)
-
-        self._generate_text_report(
-            report, output_path.replace('.json', '.txt'))
+        if self.results.get('pipeline'):
+            report['pipeline'] = self.results['pipeline']
+        if self.results.get('paralelismo'):
+            report['paralelismo'] = self.results['paralelismo']
+        if self.results.get('tempo_real'):
+            report['tempo_real'] = self.results['tempo_real']
+        if self.results.get('rastreamento'):
+            report['rastreamento'] = self.results['rastreamento']
 
         return report
 
+    def _write_report(self, report, output_path):
+        """Grava os relatórios JSON e texto (arquivo temporário + rename)"""
+        with open(output_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        os.replace(output_path + '.tmp', output_path)
+
+        text_path = output_path.replace('.json', '.txt')
+        self._generate_text_report(report, text_path + '.tmp')
+        os.replace(text_path + '.tmp', text_path)
+
     def _interpret_depression_score(self, score):
         if score < 0.5:
             return 'Baixo - Sem sinais significativos'
@@ -360,7 +582,13 @@ class SimpleVideoAnalyzer:
 
             f.write(f"Arquivo Analisado: {report['arquivo_analisado']}\n")
             f.write(f"Data da Análise: {report['timestamp_analise']}\n")
-            f.write(f"Frames Analisados: {report['frames_analisados']}\n\n")
+            f.write(f"Frames Analisados: {report['frames_analisados']}\n")
+            if report.get('parcial'):
+                f.write("RELATÓRIO PARCIAL: análise em andamento\n")
+            if report['amostragem']:
+                f.write(
+                    f"Amostragem: {format_sampling_summary(report['amostragem'])}\n")
+            f.write("\n")
 
             f.write("-"*80 + "\n")
             f.write("1. ANÁLISE DE SINAIS DE DEPRESSÃO (Expressões Faciais)\n")
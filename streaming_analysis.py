@@ -0,0 +1,336 @@
+"""
+Análise em tempo real de uma câmera, pipe ou stream.
+
+A fonte é qualquer coisa que o cv2.VideoCapture abre: índice de dispositivo
+(0, 1...), URL ou pipe. Um arquivo local pode ser reproduzido no ritmo
+real (respeitando o FPS) para simular uma câmera.
+
+Uma thread leitora consome a fonte continuamente e mantém só o frame mais
+recente; a análise sempre pega o último frame disponível. Quando a análise
+fica para trás, os frames intermediários são descartados em vez de
+acumularem atraso, e um frame que já chega mais velho que o orçamento de
+latência também é descartado. Os scores são calculados sobre uma janela
+móvel dos últimos segundos, junto com as estatísticas de latência e
+descarte.
+
+    python streaming_analysis.py 0 --budget 0.5 --window 30
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class LatestFrameReader:
+    """Lê a fonte numa thread, guardando só o frame mais recente
+
+    realtime=True espera o instante de cada frame (pelo FPS da fonte) antes
+    de entregá-lo, para reproduzir um arquivo como se fosse ao vivo.
+    """
+
+    def __init__(self, cap, realtime=False):
+        if not cap.isOpened():
+            raise ValueError("Não foi possível abrir a fonte de vídeo")
+
+        self.cap = cap
+        self.realtime = realtime
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        self.frames_read = 0
+        self.frames_replaced = 0  # substituídos antes de serem analisados
+
+        self._latest = None
+        self._finished = False
+        self._error = None
+        self._stop = threading.Event()
+        self._ready = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._read, name='leitor-tempo-real', daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        """Thread leitora: lê os frames e substitui o último não analisado"""
+        start = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.cap.read()
+                if not ok:
+                    break
+
+                if self.realtime:
+                    delay = start + self.frames_read / self.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                with self._ready:
+                    if self._latest is not None:
+                        self.frames_replaced += 1
+                    self._latest = (self.frames_read, time.monotonic(), frame)
+                    self.frames_read += 1
+                    self._ready.notify()
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._ready:
+                self._finished = True
+                self._ready.notify()
+
+    @property
+    def finished(self):
+        """A fonte terminou e o último frame já foi entregue?"""
+        return self._finished and self._latest is None
+
+    def get(self, timeout=None):
+        """Próximo frame (número, instante de captura, frame)
+
+        Retorna None no fim da fonte ou se nenhum frame chegar em timeout
+        segundos.
+        """
+        with self._ready:
+            if self._latest is None and not self._finished:
+                self._ready.wait(timeout)
+            item, self._latest = self._latest, None
+
+        if item is None and self._error is not None:
+            raise self._error
+        return item
+
+    def stop(self):
+        """Encerra a thread leitora"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class StreamingAnalyzer:
+    """Análise em tempo real com orçamento de latência e scores em janela móvel
+
+    analyzer: um VideoAnalyzer ou SimpleVideoAnalyzer; seu video_path é a
+        fonte aberta pelo cv2.VideoCapture (índice de dispositivo, URL, pipe
+        ou arquivo)
+    latency_budget: idade máxima (em segundos) de um frame no início da
+        análise; frames mais velhos são descartados
+    window: duração (em segundos) da janela dos scores móveis
+    realtime: reproduz a fonte no ritmo do FPS (padrão: só para arquivos)
+    """
+
+    def __init__(self, analyzer, latency_budget=0.5, window=30.0, realtime=None):
+        self.analyzer = analyzer
+        self.latency_budget = latency_budget
+        self.window = window
+        if realtime is None:
+            realtime = (isinstance(analyzer.video_path, str)
+                        and os.path.isfile(analyzer.video_path))
+        self.realtime = realtime
+
+        self.reader = None
+        self.frames_late = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.over_budget = 0
+        self._started = None
+        self._stop = threading.Event()
+
+        # (instante de captura, latência, score de depressão, hematomas,
+        # pontos de risco, marcas) de cada frame analisado na janela
+        self._recent = deque()
+
+    def _counters(self):
+        results = self.analyzer.results
+        return (results['depressao']['score_depressao'],
+                len(results['hematomas']['detectados']),
+                results['hematomas']['score_risco'],
+                len(results['marcas']['detectadas']))
+
+    def stop(self):
+        """Pede o encerramento de run (pode ser chamado de outra thread)"""
+        self._stop.set()
+
+    def run(self, duration=None, max_frames=None, on_update=None,
+            update_interval=1.0):
+        """Analisa a fonte até o fim, até duration segundos, até max_frames
+        frames ou até stop()
+
+        on_update(snapshot) é chamado a cada update_interval segundos com os
+        scores móveis e as estatísticas (ver snapshot). Ao terminar, os
+        resultados do analisador são finalizados e generate_report produz o
+        relatório completo, com as estatísticas em 'tempo_real'.
+        """
+        analyzer = self.analyzer
+        self.reader = LatestFrameReader(analyzer.cap, self.realtime)
+        self._started = time.monotonic()
+        last_update = self._started
+        self.reader.start()
+
+        try:
+            while not self._stop.is_set():
+                if duration is not None and time.monotonic() - self._started >= duration:
+                    break
+                if max_frames is not None and analyzer.results['frames_analisados'] >= max_frames:
+                    break
+
+                item = self.reader.get(timeout=0.1)
+                if item is None:
+                    if self.reader.finished:
+                        break
+                    continue
+                frame_number, captured, frame = item
+
+                # Frame velho demais: analisá-lo só aumentaria o atraso
+                if time.monotonic() - captured > self.latency_budget:
+                    self.frames_late += 1
+                    continue
+
+                before = self._counters()
+                analyzer.results['frames_analisados'] += 1
+                analyzer._analyze_frame(frame, analyzer._prepare_frame(frame))
+                latency = time.monotonic() - captured
+                after = self._counters()
+
+                self._record(captured, latency,
+                             [a - b for a, b in zip(after, before)])
+
+                if on_update and time.monotonic() - last_update >= update_interval:
+                    on_update(self.snapshot())
+                    last_update = time.monotonic()
+        finally:
+            self.reader.stop()
+            analyzer._release_capture()
+            self._finish()
+
+        return analyzer.results
+
+    def _finish(self):
+        """Finaliza os resultados do analisador (também após interrupção)"""
+        analyzer = self.analyzer
+        analyzer.results['amostragem'] = {
+            'estrategia': 'tempo_real',
+            'orcamento_latencia_s': self.latency_budget
+        }
+        analyzer.results['tempo_real'] = self.stats()
+        if getattr(analyzer, 'face_tracker', None):
+            analyzer.results['rastreamento'] = analyzer.face_tracker.describe()
+        analyzer._process_final_results()
+
+    def _record(self, captured, latency, deltas):
+        """Registra um frame analisado e remove da janela os antigos"""
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        if latency > self.latency_budget:
+            self.over_budget += 1
+
+        self._recent.append((captured, latency, *deltas))
+        while self._recent and self._recent[0][0] < captured - self.window:
+            self._recent.popleft()
+
+    def rolling_scores(self):
+        """Scores calculados só com os frames analisados na janela móvel"""
+        analyzer = self.analyzer
+        frames = len(self._recent)
+        depression = sum(entry[2] for entry in self._recent)
+        risk = sum(entry[4] for entry in self._recent)
+        depression = depression / frames if frames else 0
+
+        return {
+            'janela_s': self.window,
+            'frames': frames,
+            'score_depressao': round(depression, 2),
+            'nivel_depressao': analyzer._interpret_depression_score(depression),
+            'hematomas': sum(entry[3] for entry in self._recent),
+            'score_risco': risk,
+            'nivel_risco': analyzer._interpret_bruise_risk(risk),
+            'marcas': sum(entry[5] for entry in self._recent)
+        }
+
+    def stats(self):
+        """Estatísticas de latência (captura até o fim da análise) e descarte"""
+        analyzed = self.analyzer.results['frames_analisados']
+        received = self.reader.frames_read if self.reader else 0
+        replaced = self.reader.frames_replaced if self.reader else 0
+        dropped = replaced + self.frames_late
+        elapsed = time.monotonic() - self._started if self._started else 0
+        recent = np.array([entry[1] for entry in self._recent])
+
+        return {
+            'tempo_decorrido_s': round(elapsed, 2),
+            'frames_recebidos': received,
+            'frames_analisados': analyzed,
+            'descartados_substituidos': replaced,
+            'descartados_atraso': self.frames_late,
+            'taxa_descarte': round(dropped / received, 4) if received else 0,
+            'fps_analise': round(analyzed / elapsed, 2) if elapsed else 0,
+            'orcamento_latencia_ms': round(self.latency_budget * 1000, 1),
+            'latencia_media_ms': round(self.latency_sum / analyzed * 1000, 1) if analyzed else 0,
+            'latencia_p95_janela_ms': round(float(np.percentile(recent, 95)) * 1000, 1) if len(recent) else 0,
+            'latencia_maxima_ms': round(self.latency_max * 1000, 1),
+            'acima_do_orcamento': self.over_budget
+        }
+
+    def snapshot(self):
+        """Scores móveis e estatísticas correntes"""
+        return {'scores': self.rolling_scores(), 'estatisticas': self.stats()}
+
+
+def _format_update(snapshot):
+    scores, stats = snapshot['scores'], snapshot['estatisticas']
+    return (f"[{stats['tempo_decorrido_s']:7.1f}s] "
+            f"depressão {scores['score_depressao']:.2f} | "
+            f"hematomas {scores['hematomas']} (risco {scores['score_risco']}) | "
+            f"marcas {scores['marcas']} | "
+            f"latência {stats['latencia_p95_janela_ms']} ms (p95) | "
+            f"descarte {stats['taxa_descarte']:.1%}")
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description='Análise de vídeo em tempo real (câmera, pipe ou arquivo)')
+    parser.add_argument('source', help='Índice da câmera, URL, pipe ou arquivo de vídeo')
+    parser.add_argument('--simple', action='store_true',
+                        help='Usa a análise simplificada (Haar Cascade)')
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help='Orçamento de latência por frame, em segundos')
+    parser.add_argument('--window', type=float, default=30.0,
+                        help='Janela dos scores móveis, em segundos')
+    parser.add_argument('--duration', type=float,
+                        help='Encerra após esse número de segundos')
+    parser.add_argument('--no-realtime', action='store_true',
+                        help='Lê arquivos o mais rápido possível, sem respeitar o FPS')
+    parser.add_argument('--output', default='streaming_report.json',
+                        help='Relatório final (JSON e texto)')
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+
+    if args.simple:
+        from simple_video_analysis import SimpleVideoAnalyzer
+        analyzer = SimpleVideoAnalyzer(source, tracking=True)
+    else:
+        from video_analysis import VideoAnalyzer
+        analyzer = VideoAnalyzer(source)
+
+    streaming = StreamingAnalyzer(analyzer, args.budget, args.window,
+                                  False if args.no_realtime else None)
+
+    print("Análise em tempo real iniciada (Ctrl+C para encerrar)")
+    try:
+        streaming.run(duration=args.duration,
+                      on_update=lambda s: print(_format_update(s)))
+    except KeyboardInterrupt:
+        print("\nEncerrando...")
+
+    analyzer.generate_report(args.output)
+    print(_format_update(streaming.snapshot()))
+    print(f"Relatório salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
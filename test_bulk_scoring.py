@@ -0,0 +1,47 @@
+"""
+Testes da pontuação em lote de transcrições.
+"""
+
+from bulk_scoring import read_documents, score_document, score_documents
+
+SEGMENTS = [{'inicio': 0.0, 'fim': 2.0, 'texto': 'eu não consigo'},
+            {'inicio': 2.5, 'fim': 4.0, 'texto': 'dormir'}]
+
+
+def test_segments_give_series():
+    result = score_document({'id': 1, 'texto': 'eu não consigo dormir',
+                             'segmentos': SEGMENTS})
+
+    assert 'erro' not in result
+    assert result['palavras_chave'] == ['não consigo']
+    assert result['serie_linguistica']['janelas'][0]['palavras'] == 4
+
+
+def test_mismatched_segments_are_dropped():
+    # Como no AudioAnalyzer: o texto é pontuado sem os trechos
+    result = score_document({'id': 1, 'texto': 'eu  não consigo dormir',
+                             'segmentos': SEGMENTS})
+    alone = score_document({'id': 1, 'texto': 'eu  não consigo dormir'})
+
+    assert 'erro' not in result
+    assert 'serie_linguistica' not in result
+    assert result == alone
+
+
+def test_segments_without_text():
+    result = score_document({'id': 1, 'texto': '', 'segmentos': SEGMENTS})
+    assert result['palavras_chave'] == ['não consigo']
+
+
+def test_long_csv_field(tmp_path):
+    path = tmp_path / 'transcricoes.csv'
+    text = 'eu estou triste ' * 20000  # ~320 KB, acima do limite padrão do csv
+    path.write_text(f'id,texto\na,"{text}"\nb,sem nada\n', encoding='utf-8')
+
+    documents = list(read_documents(str(path)))
+    assert [d['id'] for d in documents] == ['a', 'b']
+    assert documents[0]['texto'] == text
+
+    results = list(score_documents(documents, workers=1))
+    assert results[0]['contadores']['palavras'] == 60000
+    assert results[1]['palavras_chave'] == []
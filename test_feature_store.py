@@ -0,0 +1,76 @@
+"""
+Testes do recálculo de relatórios a partir de features gravadas.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from feature_store import FeatureRecorder, KIND_BRUISE, KIND_MARK, rescore
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _write_features(path):
+    """Arquivo de features com duas faces e alguns contornos"""
+    recorder = FeatureRecorder()
+    for frame, eye_openness, mouth_ratio in ((0, 4.0, 0.5), (5, 12.0, 0.1)):
+        face = recorder.add_face(
+            {'timestamp': frame, 'eye_openness': eye_openness,
+             'mouth_ratio': mouth_ratio},
+            (10, 20, 100, 120), (120, 100))
+        recorder.add_contours(face, KIND_BRUISE, [(150.0, (5, 5, 10, 10)),
+                                                  (10.0, (60, 60, 3, 3))])
+        recorder.add_contours(face, KIND_MARK, [(90.0, (70, 40, 8, 8))])
+    recorder.save(path, {
+        'arquivo_analisado': 'video.mp4',
+        'timestamp': '2024-01-01T00:00:00',
+        'frames_analisados': 2,
+        'amostragem': {'estrategia': 'grab', 'estrategia_solicitada': 'auto',
+                       'sample_rate': 5}
+    })
+
+
+def test_rescore_thresholds(tmp_path):
+    path = str(tmp_path / 'features.npz')
+    _write_features(path)
+
+    report = rescore(path)
+    assert report['frames_analisados'] == 2
+    assert report['analise_hematomas']['total_detectado'] == 2
+    assert report['analise_marcas']['total_detectado'] == 2
+
+    report = rescore(path, {'bruise_area': (5, 200)})
+    assert report['analise_hematomas']['total_detectado'] == 4
+
+
+def test_rescore_report_matches_generate_report(tmp_path):
+    path = str(tmp_path / 'features.npz')
+    _write_features(path)
+    output_path = str(tmp_path / 'relatorio.json')
+
+    # Sem output_path, o mesmo relatório de generate_report (sem chaves a mais)
+    report = rescore(path)
+    written = rescore(path, output_path=output_path)
+    with open(output_path, encoding='utf-8') as f:
+        saved = json.load(f)
+
+    assert report == written
+    assert json.loads(json.dumps(report)) == saved
+    assert 'parcial' not in report
+
+
+def test_rescore_does_not_import_mediapipe(tmp_path):
+    path = str(tmp_path / 'features.npz')
+    _write_features(path)
+
+    # Processo novo: o sys.modules deste processo pode já ter o mediapipe
+    script = ("import json, sys\n"
+              "from feature_store import rescore\n"
+              f"report = rescore({path!r})\n"
+              "print(json.dumps(['mediapipe' in sys.modules,"
+              " report['analise_marcas']['total_detectado']]))\n")
+    output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    assert json.loads(output.splitlines()[-1]) == [False, 2]
@@ -0,0 +1,69 @@
+"""
+Testes do cache de frames amostrados.
+"""
+
+import json
+
+import numpy as np
+
+from frame_cache import CachedFrames, FrameCache, INDEX_NAME
+
+
+class _Sampler:
+    """Amostrador com frames sintéticos (frame n tem todos os pixels = n)"""
+
+    def __init__(self, sample_rate, frames=20):
+        self.sample_rate = sample_rate
+        self.frames = frames
+
+    def __iter__(self):
+        for number in range(0, self.frames, self.sample_rate):
+            yield number, np.full((8, 12, 3), number, np.uint8)
+
+    def describe(self):
+        return {'estrategia': 'sequencial', 'sample_rate': self.sample_rate}
+
+
+def _parameters(sample_rate):
+    return {'sample_rate': sample_rate, 'adaptive': False}
+
+
+def _read(cache, video, sample_rate):
+    frames = cache.wrap(video, _Sampler(sample_rate), _parameters(sample_rate), 20)
+    return frames, [(number, frame.copy()) for number, frame in frames]
+
+
+def test_hit_matches_recording(tmp_path):
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'conteudo')
+
+    recording, recorded = _read(FrameCache(str(tmp_path / 'cache')), str(video), 4)
+    cached, read = _read(FrameCache(str(tmp_path / 'cache')), str(video), 4)
+
+    assert isinstance(cached, CachedFrames)
+    assert [n for n, _ in read] == [n for n, _ in recorded] == [0, 4, 8, 12, 16]
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(read, recorded))
+    # O relatório de uma análise com cache é igual ao de uma sem cache
+    assert cached.describe() == recording.describe() == _Sampler(4).describe()
+
+
+def test_shared_directory_keeps_all_entries(tmp_path):
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'conteudo')
+    cache_dir = str(tmp_path / 'cache')
+
+    # Duas instâncias abertas antes de qualquer gravação, como duas
+    # análises em processos diferentes
+    first = FrameCache(cache_dir)
+    second = FrameCache(cache_dir)
+    _read(first, str(video), 4)
+    _read(second, str(video), 5)
+
+    with open(tmp_path / 'cache' / INDEX_NAME, encoding='utf-8') as f:
+        index = json.load(f)
+    rates = sorted(entry['amostragem']['sample_rate']
+                   for entry in index['entradas'].values())
+    assert rates == [4, 5]
+
+    cached, _ = _read(first, str(video), 5)
+    assert isinstance(cached, CachedFrames)
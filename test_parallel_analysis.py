@@ -0,0 +1,105 @@
+"""
+Testes da análise em segmentos paralelos.
+"""
+
+import cv2
+import numpy as np
+
+from parallel_analysis import split_segments
+from simple_video_analysis import SimpleVideoAnalyzer
+
+FRAME_W, FRAME_H = 160, 120
+FRAMES = 90
+
+
+class _BlockCascade:
+    """Cascade determinística: a caixa dos pixels não pretos"""
+
+    def detectMultiScale(self, image, scaleFactor=1.1, minNeighbors=3,
+                         minSize=None, maxSize=None):
+        ys, xs = np.nonzero(image > 8)
+        if not len(xs):
+            return []
+        w = int(xs.max() - xs.min() + 1)
+        if (minSize and w < minSize[0]) or (maxSize and w > maxSize[0]):
+            return []
+        return [(int(xs.min()), int(ys.min()), w, int(ys.max() - ys.min() + 1))]
+
+
+class _BlockAnalyzer(SimpleVideoAnalyzer):
+    """Analisador com a cascade de faces determinística
+
+    No nível do módulo para ser importável pelos processos dos segmentos.
+    """
+
+    def __init__(self, video_path, **options):
+        super().__init__(video_path, **options)
+        self.face_cascade = _BlockCascade()
+
+
+def _write_video(path):
+    """Bloco texturizado que se move devagar sobre fundo preto
+
+    No último terço (o terceiro de três segmentos) o bloco dobra de
+    tamanho, fora da faixa de tamanhos que a pirâmide deriva da face
+    anterior.
+    """
+    rng = np.random.default_rng(0)
+    block = rng.integers(40, 255, (40, 40, 3), dtype=np.uint8)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30,
+                             (FRAME_W, FRAME_H))
+    for i in range(FRAMES):
+        frame = np.zeros((FRAME_H, FRAME_W, 3), np.uint8)
+        size = 40 if i < 2 * FRAMES // 3 else 80
+        x = 10 + i // 2
+        frame[20:20 + size, x:x + size] = cv2.resize(block, (size, size))
+        writer.write(frame)
+    writer.release()
+
+
+def _report(analyzer, path):
+    report = analyzer.generate_report(path)
+    for key in ('timestamp_analise', 'paralelismo'):
+        report.pop(key, None)
+    return report
+
+
+def test_split_segments():
+    assert split_segments(10, 3) == [(0, 3), (3, 6), (6, None)]
+    assert split_segments(2, 5) == [(0, 1), (1, None)]
+
+
+def test_tracking_does_not_depend_on_workers(tmp_path):
+    video = str(tmp_path / 'video.avi')
+    _write_video(video)
+
+    reports = []
+    for workers in (1, 3):
+        analyzer = _BlockAnalyzer(video, tracking=True, detect_every=4)
+        analyzer.analyze_video_parallel(workers=workers, segments=3,
+                                        sample_rate=2)
+        reports.append(_report(analyzer, str(tmp_path / f'r{workers}.json')))
+
+    assert reports[0] == reports[1]
+    tracking = reports[0]['rastreamento']
+    assert tracking['frames_rastreados'] > 0
+    # Cada segmento começa com uma detecção completa
+    assert tracking['deteccoes_completas'] >= 3
+
+
+def test_pyramid_does_not_depend_on_workers(tmp_path):
+    video = str(tmp_path / 'video.avi')
+    _write_video(video)
+
+    reports = []
+    for workers, segments in ((1, 3), (3, 3), (1, 1)):
+        analyzer = _BlockAnalyzer(video, pyramid=True)
+        analyzer.analyze_video_parallel(workers=workers, segments=segments,
+                                        sample_rate=2)
+        reports.append(_report(analyzer, str(tmp_path / f'r{workers}_{segments}.json')))
+
+    assert reports[0] == reports[1]
+    # Num único segmento a face maior se perde no primeiro frame em que
+    # aparece; com três, o terceiro segmento começa em todas as escalas
+    assert reports[2]['frames_analisados'] == reports[0]['frames_analisados']
+    assert reports[2] != reports[0]
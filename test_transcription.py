@@ -0,0 +1,91 @@
+"""
+Testes da detecção de fala e da transcrição em trechos (sem rede).
+"""
+
+import numpy as np
+import pytest
+
+from audio_analysis import DecodedAudio
+from transcription import (ScriptedBackend, TranscriptionBackend, detect_speech,
+                           format_timestamp, transcribe_segments, transcript_text)
+
+RATE = 16000
+
+# Falas (tom de 220 Hz) em meio a silêncio com ruído fraco, em segundos
+SPEECH = [(1.0, 2.5), (4.0, 5.0), (7.0, 7.6)]
+DURATION = 9.0
+
+
+def _audio():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 20, int(DURATION * RATE))
+    t = np.arange(len(samples)) / RATE
+    for start, end in SPEECH:
+        voiced = (t >= start) & (t < end)
+        samples[voiced] += 8000 * np.sin(2 * np.pi * 220 * t[voiced])
+    return DecodedAudio(samples.round().astype(np.int16).tobytes(), RATE)
+
+
+class _FailingBackend(TranscriptionBackend):
+    name = 'falha'
+
+    def transcribe(self, segment):
+        if segment['indice'] == 1:
+            raise RuntimeError('serviço indisponível')
+        return 'ok'
+
+
+def test_detect_speech_boundaries():
+    audio = _audio()
+    found = [(start / RATE, end / RATE)
+             for start, end in detect_speech(audio.samples, RATE)]
+
+    # Cada fala com padding de 0,15 s, com a precisão de um quadro (30 ms)
+    expected = [(start - 0.15, end + 0.15) for start, end in SPEECH]
+    assert len(found) == len(expected)
+    for (start, end), (expected_start, expected_end) in zip(found, expected):
+        assert start == pytest.approx(expected_start, abs=0.035)
+        assert end == pytest.approx(expected_end, abs=0.035)
+
+
+def test_detect_speech_splits_long_speech():
+    audio = _audio()
+    parts = detect_speech(audio.samples, RATE, max_duration=0.5)
+
+    first = [part for part in parts if part[1] <= 3 * RATE]
+    assert len(first) == 4
+    # Partes contíguas e de tamanho semelhante
+    assert all(a[1] == b[0] for a, b in zip(first, first[1:]))
+    assert all(end - start <= 0.5 * RATE for start, end in first)
+
+
+def test_transcribe_segments_in_order():
+    backend = ScriptedBackend([(4.5, 'não durmo'), (2.0, 'muito'),
+                               (1.5, 'eu estou cansado')])
+    segments = transcribe_segments(_audio(), backend, workers=3)
+
+    assert [s['texto'] for s in segments] == ['eu estou cansado muito',
+                                              'não durmo', '']
+    assert [(s['inicio'], s['fim']) for s in segments] == [
+        (pytest.approx(start - 0.15, abs=0.035), pytest.approx(end + 0.15, abs=0.035))
+        for start, end in SPEECH]
+    assert transcript_text(segments) == 'eu estou cansado muito não durmo'
+
+
+def test_transcribe_segments_records_errors():
+    segments = transcribe_segments(_audio(), _FailingBackend())
+
+    assert [s['texto'] for s in segments] == ['ok', '', 'ok']
+    assert segments[1]['erro'] == 'serviço indisponível'
+    assert 'erro' not in segments[0]
+    assert transcript_text(segments) == 'ok ok'
+
+
+def test_backend_interface():
+    with pytest.raises(TypeError):
+        TranscriptionBackend()
+
+
+def test_format_timestamp():
+    assert format_timestamp(65.3) == '01:05.3'
+    assert format_timestamp(3725.0) == '1:02:05.0'
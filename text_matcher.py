@@ -0,0 +1,181 @@
+"""
+Busca de vários termos num texto em uma única passada (Aho-Corasick).
+
+Os termos (palavras ou expressões) são compilados uma vez num autômato cujo
+alfabeto são as palavras do texto: a busca percorre as palavras uma vez,
+qualquer que seja o número de termos, e devolve todas as ocorrências com as
+posições (em caracteres) no texto original.
+
+A comparação ignora maiúsculas e acentos ('nao consigo' encontra 'não
+consigo', 'angustia' encontra 'angústia') e só aceita palavras inteiras:
+'eu' não é encontrado em 'seu', nem 'dor' em 'dormir'. As palavras de uma
+expressão podem estar separadas por quaisquer espaços, mas não por
+pontuação. Um termo pode terminar em '*' (qualquer palavra): 'não *'
+encontra 'não' seguido de outra palavra.
+
+    matcher = KeywordMatcher({'negacao': ['não', 'nunca'],
+                              'primeira_pessoa': ['eu', 'me']})
+    matcher.find("Eu não durmo")
+    # [(0, 2, 'eu', 'primeira_pessoa'), (3, 6, 'não', 'negacao')]
+"""
+
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+# Palavra: letras, dígitos e _, incluindo acentos combinantes (texto em NFD)
+WORD_PATTERN = re.compile(r'[\w\u0300-\u036f]+')
+
+# Curinga (qualquer palavra), aceito só no fim de um termo
+ANY_WORD = '*'
+
+# Palavras distintas com a forma normalizada guardada (o vocabulário comum
+# cabe inteiro; nomes, números e erros de transcrição vão sendo descartados)
+FOLD_CACHE_SIZE = 1 << 16
+
+
+def fold_text(text):
+    """Minúsculas e sem acentos (pode mudar o número de caracteres)"""
+    decomposed = unicodedata.normalize('NFD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+# fold_text de cada palavra do texto, com memória limitada (LRU), para não
+# crescer sem limite num processo que pontua muitos documentos
+_fold_word = lru_cache(maxsize=FOLD_CACHE_SIZE)(fold_text)
+
+
+class KeywordMatcher:
+    """Autômato de Aho-Corasick sobre termos agrupados em categorias
+
+    patterns: dicionário {categoria: termos}. Um mesmo termo pode estar em
+    mais de uma categoria; termos que se sobrepõem no texto são todos
+    encontrados (por exemplo 'não' e 'não consigo').
+    """
+
+    def __init__(self, patterns):
+        self.categories = {category: list(terms)
+                           for category, terms in patterns.items()}
+
+        # Nó 0 é a raiz; cada nó tem suas transições (por palavra
+        # normalizada), o nó de falha e as saídas (número de palavras fixas
+        # do termo, número de curingas no fim, termo, categoria)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self.longest = 0
+
+        for category, terms in self.categories.items():
+            for term in terms:
+                self._add(term, category)
+        self._link()
+
+    def _add(self, term, category):
+        words = fold_text(term).split()
+        wildcards = 0
+        while words and words[-1] == ANY_WORD:
+            words.pop()
+            wildcards += 1
+        if not words:
+            raise ValueError(f"Termo sem palavras fixas: {term!r}")
+        for word in words:
+            if word == ANY_WORD:
+                raise ValueError(f"Curinga fora do fim do termo: {term!r}")
+            if not WORD_PATTERN.fullmatch(word):
+                raise ValueError(f"Termo com pontuação: {term!r}")
+
+        node = 0
+        for word in words:
+            next_node = self._goto[node].get(word)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][word] = next_node
+            node = next_node
+        self._output[node].append((len(words), wildcards, term, category))
+        self.longest = max(self.longest, len(words))
+
+    def _link(self):
+        """Nós de falha em largura; cada nó herda as saídas do seu nó de falha"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+    def iter_words(self, text):
+        """Percorre as palavras do texto uma vez
+
+        Gera (início, fim, ocorrências) para cada palavra, em que ocorrências
+        são os termos que terminam nela, como (início, fim, termo, categoria).
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        # Início (no texto original) das palavras recentes
+        starts = deque(maxlen=self.longest)
+        # Termos com curinga esperando as próximas palavras:
+        # (início, palavras que faltam, termo, categoria)
+        pending = []
+        state = 0
+        previous_end = 0
+
+        for token in WORD_PATTERN.finditer(text):
+            start, end = token.span()
+            # Pontuação entre as palavras interrompe as expressões
+            if (state or pending) and not text[previous_end:start].isspace():
+                state = 0
+                pending = []
+            previous_end = end
+            starts.append(start)
+
+            found = []
+            if pending:
+                waiting = []
+                for begin, remaining, term, category in pending:
+                    if remaining == 1:
+                        found.append((begin, end, term, category))
+                    else:
+                        waiting.append((begin, remaining - 1, term, category))
+                pending = waiting
+
+            key = _fold_word(token.group())
+
+            while state and key not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(key, 0)
+
+            for length, wildcards, term, category in output[state]:
+                if wildcards:
+                    pending.append((starts[-length], wildcards, term, category))
+                else:
+                    found.append((starts[-length], end, term, category))
+
+            yield start, end, found
+
+    def find(self, text):
+        """Todas as ocorrências, como (início, fim, termo, categoria)
+
+        início e fim são posições no texto original (fim exclusivo), em
+        ordem de início.
+        """
+        matches = [match for _, _, found in self.iter_words(text) for match in found]
+        matches.sort()
+        return matches
+
+    def scan(self, text):
+        """Ocorrências por categoria e termo: {categoria: {termo: [(início, fim)]}}
+
+        Todas as categorias aparecem; só os termos encontrados aparecem, e o
+        número de ocorrências de cada um é o tamanho da lista.
+        """
+        result = {category: {} for category in self.categories}
+        for start, end, term, category in self.find(text):
+            result[category].setdefault(term, []).append((start, end))
+        return result
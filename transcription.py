@@ -0,0 +1,176 @@
+"""
+Transcrição da fala em trechos, com timestamps.
+
+Em vez de enviar a gravação inteira numa única chamada, o áudio é dividido
+em falas por detecção de atividade de voz (energia por quadro) e cada fala
+é transcrita separadamente, em paralelo, por um backend plugável:
+- GoogleBackend: serviço gratuito do Google via SpeechRecognition (rede);
+- ScriptedBackend: backend local, sem rede, que devolve textos
+  pré-definidos pelo instante da fala (usado em testes).
+
+Qualquer objeto com um método transcribe(segment) serve de backend. O
+segment é um dicionário com 'indice', 'inicio' e 'fim' (em segundos) e
+'audio' (um DecodedAudio só com o trecho, sem cópia do PCM).
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Quadros analisados de cada vez na detecção de voz (limita a memória usada
+# na conversão para float em gravações longas)
+_VAD_BLOCK_FRAMES = 10000
+
+
+def detect_speech(samples, sample_rate, frame_duration=0.03, margin_db=12.0,
+                  floor_db=-50.0, min_silence=0.4, min_speech=0.25,
+                  padding=0.15, max_duration=30.0):
+    """Trechos de fala (início, fim), em amostras, por energia por quadro
+
+    Um quadro é fala quando sua energia (dBFS) passa o ruído de fundo
+    (percentil 10 dos quadros) em margin_db, e nunca abaixo de floor_db.
+    Pausas menores que min_silence segundos são unidas, falas menores que
+    min_speech são descartadas, cada fala ganha padding segundos de cada
+    lado e falas maiores que max_duration são divididas em partes iguais.
+    """
+    frame = max(1, int(sample_rate * frame_duration))
+    frames = len(samples) // frame
+    if frames == 0:
+        return []
+
+    levels = np.empty(frames)
+    for start in range(0, frames, _VAD_BLOCK_FRAMES):
+        stop = min(frames, start + _VAD_BLOCK_FRAMES)
+        block = samples[start * frame:stop * frame].reshape(-1, frame)
+        block = block.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(np.square(block), axis=1))
+        levels[start:stop] = 20 * np.log10(rms + 1e-10)
+
+    threshold = max(floor_db, np.percentile(levels, 10) + margin_db)
+    speech = np.concatenate([[0], (levels > threshold).astype(np.int8), [0]])
+    edges = np.diff(speech)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Une falas separadas por pausas curtas
+    runs = []
+    for start, end in zip(starts, ends):
+        if runs and (start - runs[-1][1]) * frame_duration < min_silence:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+
+    pad = int(padding * sample_rate)
+    max_length = int(max_duration * sample_rate)
+    segments = []
+    for start, end in runs:
+        if (end - start) * frame_duration < min_speech:
+            continue
+        start = max(0, start * frame - pad)
+        end = min(len(samples), end * frame + pad)
+
+        parts = -(-(end - start) // max_length)
+        bounds = np.linspace(start, end, parts + 1).astype(int)
+        segments.extend(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    # O padding pode sobrepor falas vizinhas: cada uma começa onde a
+    # anterior termina
+    for i in range(1, len(segments)):
+        if segments[i][0] < segments[i - 1][1]:
+            segments[i] = (segments[i - 1][1], segments[i][1])
+
+    return segments
+
+
+class TranscriptionBackend(ABC):
+    """Interface dos backends de transcrição"""
+
+    name = None
+
+    @abstractmethod
+    def transcribe(self, segment):
+        """Texto da fala do segmento ('' se não houver fala reconhecível)"""
+
+
+class GoogleBackend(TranscriptionBackend):
+    """Google Speech Recognition (gratuito, requer rede)"""
+
+    name = 'google'
+
+    def __init__(self, language='pt-BR'):
+        import speech_recognition as sr
+        self._sr = sr
+        self.language = language
+
+    def transcribe(self, segment):
+        # AudioData sobre o mesmo buffer do trecho (sem cópia do PCM)
+        data = segment['audio'].to_audio_data()
+        try:
+            return self._sr.Recognizer().recognize_google(
+                data, language=self.language)
+        except self._sr.UnknownValueError:
+            return ''
+
+
+class ScriptedBackend(TranscriptionBackend):
+    """Backend local, sem rede, para testes
+
+    script: pares (tempo_s, texto); cada texto é devolvido pela fala que
+    contém aquele instante.
+    """
+
+    name = 'roteiro'
+
+    def __init__(self, script=()):
+        self.script = sorted(script)
+
+    def transcribe(self, segment):
+        return ' '.join(text for time, text in self.script
+                        if segment['inicio'] <= time < segment['fim'])
+
+
+def transcribe_segments(audio, backend, workers=4, **vad_options):
+    """Detecta as falas e as transcreve em paralelo, na ordem do áudio
+
+    audio: DecodedAudio. Retorna uma lista de {'inicio', 'fim', 'texto'},
+    com 'erro' nos trechos em que o backend falhou.
+    """
+    rate = audio.sample_rate
+    segments = [
+        {'indice': index, 'inicio': start / rate, 'fim': end / rate,
+         'audio': audio.segment(start, end)}
+        for index, (start, end) in enumerate(
+            detect_speech(audio.samples, rate, **vad_options))
+    ]
+
+    def run(segment):
+        entry = {'inicio': round(segment['inicio'], 2),
+                 'fim': round(segment['fim'], 2)}
+        try:
+            entry['texto'] = (backend.transcribe(segment) or '').strip()
+        except Exception as e:
+            entry['texto'] = ''
+            entry['erro'] = str(e)
+        return entry
+
+    if not segments:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(segments))),
+                            thread_name_prefix='transcricao') as executor:
+        return list(executor.map(run, segments))
+
+
+def transcript_text(segments):
+    """Texto corrido da transcrição"""
+    return ' '.join(s['texto'] for s in segments if s['texto'])
+
+
+def format_timestamp(seconds):
+    """Tempo no formato [HH:]MM:SS.s"""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{seconds:04.1f}"
+    return f"{minutes:02d}:{seconds:04.1f}"
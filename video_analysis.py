@@ -3,32 +3,148 @@ import numpy as np
 from datetime import datetime
 import json
 import os
-from collections import defaultdict
-import matplotlib.pyplot as plt
-
-try:
-    import mediapipe as mp
-    from mediapipe.tasks import python
-    from mediapipe.tasks.python import vision
-    MEDIAPIPE_AVAILABLE = True
-except ImportError:
-    MEDIAPIPE_AVAILABLE = False
-    print("AVISO: MediaPipe não disponível. Usando detecção facial alternativa.")
+import time
+
+from checkpoint import AnalysisCheckpoint
+from color_classifier import DEFAULT_COLOR_CLASSIFIER, MORPH_KERNEL
+from feature_store import KIND_BRUISE, KIND_MARK, FeatureRecorder
+from frame_pipeline import DecodeAheadPipeline
+from frame_sampling import create_sampler, format_sampling_summary
+from parallel_analysis import analyze_video_segments
+from result_store import DETECTION_FIELDS, ColumnStore, DetectionStore
+
+# Índices da malha facial do MediaPipe usados na análise de expressão:
+# pálpebras superior/inferior do olho esquerdo (159/145) e direito (386/374),
+# cantos da boca (61/291) e lábios superior/inferior (13/14)
+EXPRESSION_LANDMARKS = np.array([159, 145, 386, 374, 61, 291, 13, 14])
+
+# Colunas de uma expressão facial analisada
+EXPRESSION_FIELDS = [
+    ('eye_openness', np.float64),
+    ('mouth_ratio', np.float64),
+    ('timestamp', np.int64),
+]
+
+# Limiares da análise (podem ser alterados no construtor e reaplicados às
+# features gravadas com rescore):
+# - eye_openness: abertura média dos olhos (pixels) abaixo da qual indica cansaço
+# - mouth_ratio: altura/largura da boca abaixo da qual indica expressão neutra
+# - bruise_area, mark_area: faixas de área (exclusivas) dos contornos
+#   aceitos como hematoma e como marca vermelha
+# - bruise_weight: pontos de risco por hematoma
+DEFAULT_THRESHOLDS = {
+    'eye_openness': 8,
+    'mouth_ratio': 0.08,
+    'bruise_area': (100, 5000),
+    'mark_area': (80, 3000),
+    'bruise_weight': 3,
+}
+
+# Layout de um NormalizedLandmark serializado (proto2) com x, y e z
+# preenchidos: tag e tamanho do item seguidos de três floats com suas tags
+_LANDMARK_WIRE_DTYPE = np.dtype([
+    ('item_tag', 'u1'), ('item_len', 'u1'),
+    ('x_tag', 'u1'), ('x', '<f4'),
+    ('y_tag', 'u1'), ('y', '<f4'),
+    ('z_tag', 'u1'), ('z', '<f4')
+])
+_LANDMARK_WIRE_TAGS = {
+    'item_tag': 0x0A, 'item_len': 15, 'x_tag': 0x0D, 'y_tag': 0x15, 'z_tag': 0x1D
+}
+
+
+def landmarks_to_array(landmarks):
+    """Converte os landmarks de uma face num array contíguo (N, 3) float32
+
+    Aceita um NormalizedLandmarkList do MediaPipe ou uma sequência de
+    landmarks. No NormalizedLandmarkList, a serialização protobuf é
+    decodificada de uma vez com NumPy, sem acessar atributos landmark a
+    landmark; se o formato não for o esperado, converte ponto a ponto.
+    """
+    if hasattr(landmarks, 'SerializeToString'):
+        data = landmarks.SerializeToString()
+        if len(data) % _LANDMARK_WIRE_DTYPE.itemsize == 0:
+            wire = np.frombuffer(data, _LANDMARK_WIRE_DTYPE)
+            if all((wire[field] == tag).all()
+                   for field, tag in _LANDMARK_WIRE_TAGS.items()):
+                points = np.empty((len(wire), 3), dtype=np.float32)
+                points[:, 0] = wire['x']
+                points[:, 1] = wire['y']
+                points[:, 2] = wire['z']
+                return points
+        landmarks = landmarks.landmark
+
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
 
 
 class VideoAnalyzer:
     """Análise de vídeos para detectar sinais de depressão, hematomas e problemas de saúde"""
 
-    def __init__(self, video_path):
+    def __init__(self, video_path, static_image_mode=False, thresholds=None):
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
-
-        # Configuração do detector facial
+        self._cap = None
+        self.static_image_mode = static_image_mode
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+        # Detector facial, configurado no primeiro frame analisado (ver
+        # face_mesh): rescore e os relatórios não precisam dele
+        self._face_mesh = None
+        self.use_mediapipe = None
+
+        # Resultados da análise
+        self.results = {
+            'depressao': {
+                'expressoes_detectadas': ColumnStore(EXPRESSION_FIELDS),
+                'score_depressao': 0,
+                # Conjunto ordenado (dicionário com valores None)
+                'indicadores': {}
+            },
+            'hematomas': {
+                'detectados': DetectionStore(),
+                'localizacoes': [],
+                'score_risco': 0
+            },
+            'marcas': {
+                'detectadas': DetectionStore(),
+                'tipos': []
+            },
+            'frames_analisados': 0,
+            'amostragem': {},
+            'timestamp': datetime.now().isoformat()
+        }
+
+        # Verdadeiro depois de _process_final_results
+        self._finalized = False
+
+        # Features brutas gravadas durante a análise (ver feature_store.py)
+        self._features = None
+
+    @property
+    def cap(self):
+        """VideoCapture do vídeo, aberto no primeiro uso"""
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.video_path)
+        return self._cap
+
+    @property
+    def face_mesh(self):
+        """FaceMesh do MediaPipe, configurado no primeiro uso"""
+        if self.use_mediapipe is None:
+            self._setup_face_detector()
+        return self._face_mesh
+
+    def _setup_face_detector(self):
+        """Configura o detector facial (MediaPipe ou Haar Cascade)"""
         try:
-            # Tenta usar MediaPipe
+            # Tenta usar MediaPipe (importado só aqui: é a dependência mais
+            # pesada e nem todo uso do módulo precisa dela)
             import mediapipe as mp
             self.mp_face_mesh = mp.solutions.face_mesh
-            self.face_mesh = self.mp_face_mesh.FaceMesh(
+            # static_image_mode=True desliga o rastreamento entre frames:
+            # cada frame é analisado de forma independente (necessário para
+            # que a análise em segmentos não dependa do número de processos)
+            self._face_mesh = self.mp_face_mesh.FaceMesh(
+                static_image_mode=self.static_image_mode,
                 max_num_faces=1,
                 refine_landmarks=True,
                 min_detection_confidence=0.5,
@@ -37,543 +153,786 @@ class VideoAnalyzer:
             self.use_mediapipe = True
         except:
             # Fallback para Haar Cascade do OpenCV
-            print("Usando detector facial alternativo (Haar Cascade)")
+            print("AVISO: MediaPipe não disponível. Usando detector facial alternativo (Haar Cascade)")
             cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
             self.face_cascade = cv2.CascadeClassifier(cascade_path)
             eye_cascade_path = cv2.data.haarcascades + 'haarcascade_eye.xml'
             self.eye_cascade = cv2.CascadeClassifier(eye_cascade_path)
             self.use_mediapipe = False
-              'expressoes_detectadas': [],
-               'score_depressao': 0,
-                'indicadores': []
-            },
-            'hematomas': {
-              'detectados': [],
-               'localizacoes': [],
-                'score_risco': 0
-            },
-                'marcas': {
-              'detectadas': [],
-               'tipos': []
-            },
-                'frames_analisados': 0,
-                'timestamp': datetime.now().isoformat()
-                }
-
-                def analyze_facial_expression(self, landmarks, frame_shape):
-                """Analisa expressões faciais para detectar sinais de depressão"""
-                h, w = frame_shape[:2]
-
-                # Pontos chave para análise de expressão
-                # Olhos (para detectar cansaço/tristeza)
-                left_eye_top = landmarks[159]
-                left_eye_bottom = landmarks[145]
-                right_eye_top = landmarks[386]
-                right_eye_bottom = landmarks[374]
-
-                # Sobrancelhas (para detectar expressão triste)
-                left_eyebrow = landmarks[70]
-                right_eyebrow = landmarks[300]
-
-                # Boca (para detectar falta de sorriso/tristeza)
-                mouth_left = landmarks[61]
-                mouth_right = landmarks[291]
-                mouth_top = landmarks[13]
-                mouth_bottom = landmarks[14]
-
-                # Cálculo de métricas
-                eye_openness_left = abs(left_eye_top.y - left_eye_bottom.y) * h
-                eye_openness_right = abs(
-                    right_eye_top.y - right_eye_bottom.y) * h
-                avg_eye_openness = (eye_openness_left + eye_openness_right) / 2
-
-                mouth_width = abs(mouth_left.x - mouth_right.x) * w
-                mouth_height = abs(mouth_top.y - mouth_bottom.y) * h
-                mouth_ratio = mouth_height / mouth_width if mouth_width > 0 else 0
-
-                # Análise de expressão
-                expression_data = {
-                    'eye_openness': avg_eye_openness,
-                    'mouth_ratio': mouth_ratio,
-                    'timestamp': self.results['frames_analisados']
-                    }
-
-                # Indicadores de depressão
-                indicators = []
-                depression_score = 0
-
-                # Olhos pouco abertos (cansaço, falta de energia)
-                if avg_eye_openness < 8:
-            indicators.append('Olhos com aparência cansada')
-            depression_score += 2
-
-                # Boca neutra ou para baixo (falta de sorriso)
-                if mouth_ratio < 0.08:
-            indicators.append('Expressão facial neutra/triste')
-            depression_score += 2
-
-                return expression_data, indicators, depression_score
-
-                def detect_bruises_and_marks(self, frame, face_region):
-                """Detecta hematomas, marcas e possíveis sinais de violência ou problemas de saúde"""
-                x, y, w, h = face_region
-
-                # Extrai região da face com margem para pescoço e orelhas
-                margin = int(h * 0.3)
-                y1 = max(0, y - margin)
-                y2 = min(frame.shape[0], y + h + margin)
-                x1 = max(0, x - margin)
-                x2 = min(frame.shape[1], x + w + margin)
 
-                face_area = frame[y1:y2, x1:x2]
+    def _release_capture(self):
+        """Fecha o vídeo (um novo acesso a self.cap o reabre)"""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
 
-                if face_area.size == 0:
-            return [], []
+    def analyze_facial_expression(self, landmarks, frame_shape):
+        """Analisa expressões faciais para detectar sinais de depressão
 
-                # Conversão para diferentes espaços de cor
-                hsv = cv2.cvtColor(face_area, cv2.COLOR_BGR2HSV)
-                lab = cv2.cvtColor(face_area, cv2.COLOR_BGR2LAB)
+        landmarks é o array (N, 3) de landmarks_to_array (uma sequência de
+        landmarks do MediaPipe também é aceita e convertida).
+        """
+        h, w = frame_shape[:2]
 
-                bruises = []
-                marks = []
+        if not isinstance(landmarks, np.ndarray):
+            landmarks = landmarks_to_array(landmarks)
 
-                # Detecção de hematomas (tons roxos, azuis escuros, amarelados)
-                # Hematomas frescos (roxo/azulado)
-                lower_purple = np.array([120, 30, 30])
-                upper_purple = np.array([160, 255, 200])
-                mask_purple = cv2.inRange(hsv, lower_purple, upper_purple)
+        # Pontos chave para análise de expressão: olhos (cansaço/tristeza) e
+        # boca (falta de sorriso/tristeza), em float64 como no cálculo escalar
+        points = landmarks[EXPRESSION_LANDMARKS].astype(np.float64)
 
-                # Hematomas mais antigos (amarelado/esverdeado)
-                lower_yellow = np.array([20, 40, 40])
-                upper_yellow = np.array([40, 255, 200])
-                mask_yellow = cv2.inRange(hsv, lower_yellow, upper_yellow)
+        # Cálculo de métricas
+        eye_openness = np.abs(points[[0, 2], 1] - points[[1, 3], 1]) * h
+        avg_eye_openness = float((eye_openness[0] + eye_openness[1]) / 2)
 
-                # Hematomas escuros
-                lower_dark = np.array([0, 0, 0])
-                upper_dark = np.array([180, 255, 80])
-                mask_dark = cv2.inRange(hsv, lower_dark, upper_dark)
+        mouth_width = float(abs(points[4, 0] - points[5, 0]) * w)
+        mouth_height = float(abs(points[6, 1] - points[7, 1]) * h)
+        mouth_ratio = mouth_height / mouth_width if mouth_width > 0 else 0
 
-                # Combina máscaras
-                mask_bruise = cv2.bitwise_or(mask_purple, mask_yellow)
-                mask_bruise = cv2.bitwise_or(mask_bruise, mask_dark)
+        # Análise de expressão
+        expression_data = {
+            'eye_openness': avg_eye_openness,
+            'mouth_ratio': mouth_ratio,
+            'timestamp': self.results['frames_analisados']
+        }
 
-                # Remove ruído
-                kernel = np.ones((5, 5), np.uint8)
-                mask_bruise = cv2.morphologyEx(
-                    mask_bruise, cv2.MORPH_OPEN, kernel)
-                mask_bruise = cv2.morphologyEx(
-                    mask_bruise, cv2.MORPH_CLOSE, kernel)
+        # Indicadores de depressão
+        indicators = []
+        depression_score = 0
 
-                # Detecta contornos
-                contours, _ = cv2.findContours(
-            mask_bruise, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-                for contour in contours:
-            area = cv2.contourArea(contour)
-            # Filtra áreas muito pequenas (ruído) ou muito grandes (sombras)
-            if 100 < area < 5000:
-                x_c, y_c, w_c, h_c = cv2.boundingRect(contour)
-
-                # Calcula localização relativa
-                relative_x = (x_c + w_c/2) / face_area.shape[1]
-                relative_y = (y_c + h_c/2) / face_area.shape[0]
+        # Olhos pouco abertos (cansaço, falta de energia)
+        if avg_eye_openness < self.thresholds['eye_openness']:
+            indicators.append('Olhos com aparência cansada')
+            depression_score += 2
 
-                location = self._determine_face_location(
-                    relative_x, relative_y)
+        # Boca neutra ou para baixo (falta de sorriso)
+        if mouth_ratio < self.thresholds['mouth_ratio']:
+            indicators.append('Expressão facial neutra/triste')
+            depression_score += 2
 
-                bruises.append({
-                  'area': area,
-                   'location': location,
-                    'coords': (x_c, y_c, w_c, h_c),
-                    'type': 'hematoma_possivel'
-                })
+        return expression_data, indicators, depression_score
 
-                    # Detecção de marcas vermelhas (possíveis ferimentos, irritações)
-                    lower_red1= np.array([0, 50, 50])
-                    upper_red1= np.array([10, 255, 255])
-                    lower_red2= np.array([170, 50, 50])
-                    upper_red2= np.array([180, 255, 255])
+    def detect_bruises_and_marks(self, frame, face_region):
+        """Detecta hematomas, marcas e possíveis sinais de violência ou problemas de saúde"""
+        bruise_contours, red_contours, roi_shape = self._face_contours(
+            frame, face_region)
 
-                    mask_red1= cv2.inRange(hsv, lower_red1, upper_red1)
-                    mask_red2= cv2.inRange(hsv, lower_red2, upper_red2)
-                    mask_red= cv2.bitwise_or(mask_red1, mask_red2)
+        bruises = self._contour_detections(
+            bruise_contours, roi_shape, self.thresholds['bruise_area'],
+            'hematoma_possivel')
+        marks = self._contour_detections(
+            red_contours, roi_shape, self.thresholds['mark_area'],
+            'marca_vermelha')
 
-                    mask_red= cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, kernel)
-                    contours_red, _= cv2.findContours(
-                    mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return bruises, marks
 
-                    for contour in contours_red:
-            area= cv2.contourArea(contour)
-                    if 80 < area < 3000:
-                x_c, y_c, w_c, h_c = cv2.boundingRect(contour)
+    def _face_contours(self, frame, face_region):
+        """Contornos de hematomas e de marcas vermelhas na região da face
 
-                relative_x = (x_c + w_c/2) / face_area.shape[1]
-                relative_y = (y_c + h_c/2) / face_area.shape[0]
+        Retorna as duas listas de contornos, no formato (area, (x, y, w, h)),
+        sem filtro de área, e o tamanho (altura, largura) da região
+        analisada.
+        """
+        x, y, w, h = face_region
 
-                location = self._determine_face_location(
-                    relative_x, relative_y)
+        # Extrai região da face com margem para pescoço e orelhas
+        margin = int(h * 0.3)
+        y1 = max(0, y - margin)
+        y2 = min(frame.shape[0], y + h + margin)
+        x1 = max(0, x - margin)
+        x2 = min(frame.shape[1], x + w + margin)
 
-                marks.append({
-                  'area': area,
-                   'location': location,
-                    'coords': (x_c, y_c, w_c, h_c),
-                    'type': 'marca_vermelha'
-                })
+        face_area = frame[y1:y2, x1:x2]
 
-                    return bruises, marks
+        if face_area.size == 0:
+            return [], [], face_area.shape[:2]
 
-                    def _determine_face_location(self, rel_x, rel_y):
-                    """Determina a localização na face com base em coordenadas relativas"""
-                    location = []
+        # Conversão para HSV
+        hsv = cv2.cvtColor(face_area, cv2.COLOR_BGR2HSV)
 
-                    # Horizontal
-                    if rel_x < 0.35:
-                    location.append('esquerda')
-                    elif rel_x > 0.65:
-                    location.append('direita')
-                    else:
-                    location.append('centro')
+        # Classifica os pixels de uma vez: hematomas (roxo/azulado, amarelado/
+        # esverdeado e escuro) e marcas vermelhas (ver color_classifier.py)
+        mask_bruise, mask_red = DEFAULT_COLOR_CLASSIFIER.classify(hsv)
 
-                    # Vertical
-                    if rel_y < 0.33:
-                    location.append('testa/superior')
-                    elif rel_y < 0.66:
-                    location.append('meio')
-                    else:
-                    location.append('inferior/queixo')
+        # Remove ruído
+        mask_bruise = cv2.morphologyEx(
+            mask_bruise, cv2.MORPH_OPEN, MORPH_KERNEL)
+        mask_bruise = cv2.morphologyEx(
+            mask_bruise, cv2.MORPH_CLOSE, MORPH_KERNEL)
 
-                    return ' - '.join(location)
+        # Detecta contornos
+        contours, _ = cv2.findContours(
+            mask_bruise, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-                    def analyze_video(self, sample_rate=30):
-                    """Analisa o vídeo completo"""
-                    frame_count = 0
-                    processed_count = 0
+        # Detecção de marcas vermelhas (possíveis ferimentos, irritações)
+        mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, MORPH_KERNEL)
+        contours_red, _ = cv2.findContours(
+            mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-                    fps = self.cap.get(cv2.CAP_PROP_FPS)
-                    total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return ([(cv2.contourArea(c), cv2.boundingRect(c)) for c in contours],
+                [(cv2.contourArea(c), cv2.boundingRect(c)) for c in contours_red],
+                face_area.shape[:2])
 
-                    print(f"Iniciando análise do vídeo...")
-                print(f"Total de frames: {total_frames}, FPS: {fps}")
+    def _contour_detections(self, contours, roi_shape, area_range, kind):
+        """Detecções a partir dos contornos com área dentro da faixa"""
+        min_area, max_area = area_range
+        detections = []
 
-                    while self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        for area, (x_c, y_c, w_c, h_c) in contours:
+            # Filtra áreas muito pequenas (ruído) ou muito grandes (sombras)
+            if min_area < area < max_area:
+                # Calcula localização relativa
+                relative_x = (x_c + w_c/2) / roi_shape[1]
+                relative_y = (y_c + h_c/2) / roi_shape[0]
 
-            frame_count += 1
+                location = self._determine_face_location(
+                    relative_x, relative_y)
 
-            # Processa apenas alguns frames para otimizar
-            if frame_count % sample_rate != 0:
-                continue
+                detections.append({
+                    'area': area,
+                    'location': location,
+                    'coords': (x_c, y_c, w_c, h_c),
+                    'type': kind
+                })
 
+        return detections
+
+    def _determine_face_location(self, rel_x, rel_y):
+        """Determina a localização na face com base em coordenadas relativas"""
+        location = []
+
+        # Horizontal
+        if rel_x < 0.35:
+            location.append('esquerda')
+        elif rel_x > 0.65:
+            location.append('direita')
+        else:
+            location.append('centro')
+
+        # Vertical
+        if rel_y < 0.33:
+            location.append('testa/superior')
+        elif rel_y < 0.66:
+            location.append('meio')
+        else:
+            location.append('inferior/queixo')
+
+        return ' - '.join(location)
+
+    def analyze_video(self, sample_rate=30, sampling_strategy='auto',
+                      adaptive=False, min_interval=10, max_interval=120,
+                      scene_threshold=10.0, pipeline=False, queue_size=8,
+                      live_report=None, live_interval=60.0,
+                      checkpoint=None, checkpoint_interval=300.0, resume=False,
+                      frame_cache=None, feature_file=None):
+        """Analisa o vídeo completo
+
+        sampling_strategy define como os frames descartados são pulados
+        ('auto', 'read', 'grab' ou 'seek', ver frame_sampling.py). Todas as
+        estratégias analisam os mesmos frames.
+
+        Com adaptive=True a análise facial e de hematomas só roda quando a
+        cena muda (verificação a cada min_interval frames, análise forçada a
+        cada max_interval frames).
+
+        Com pipeline=True a decodificação e a conversão para RGB rodam numa
+        thread separada, à frente da análise, com até queue_size frames em
+        fila (ver frame_pipeline.py).
+        Com live_report, um relatório parcial (ver snapshot_report) é gravado
+        nesse caminho a cada live_interval segundos.
+        Com checkpoint, o estado da análise é gravado nesse arquivo a cada
+        checkpoint_interval segundos; com resume=True, uma análise
+        interrompida continua a partir do último checkpoint (ver
+        checkpoint.py).
+        Com frame_cache (um FrameCache), os frames amostrados são lidos do
+        cache em disco quando já foram gravados por uma análise anterior
+        (ver frame_cache.py).
+        Com feature_file, as features brutas de cada face (métricas de
+        expressão e todos os contornos) são gravadas nesse arquivo .npz; o
+        relatório pode então ser recalculado com outros limiares por
+        rescore, sem reprocessar o vídeo (ver feature_store.py).
+        """
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        sampler = create_sampler(
+            self.cap, sample_rate, sampling_strategy, adaptive,
+            min_interval, max_interval, scene_threshold)
+
+        sampling_parameters = {
+            'sample_rate': sample_rate,
+            'adaptive': adaptive,
+            'min_interval': min_interval,
+            'max_interval': max_interval,
+            'scene_threshold': scene_threshold
+        }
+
+        self._features = FeatureRecorder() if feature_file else None
+
+        checkpointer = None
+        if checkpoint:
+            parameters = {
+                **sampling_parameters,
+                'sampling_strategy': sampling_strategy,
+                'detector': {'static_image_mode': self.static_image_mode},
+                'limiares': self.thresholds,
+                'features': feature_file is not None
+            }
+            checkpointer = AnalysisCheckpoint(
+                checkpoint, self.video_path, parameters, checkpoint_interval)
+
+            saved = checkpointer.load() if resume else None
+            if saved:
+                self._restore_checkpoint_state(saved['analisador'])
+                sampler.load_state_dict(saved['amostrador'])
+
+                # O rastreamento interno do FaceMesh entre frames não pode ser
+                # gravado: só o modo de imagem estática retoma sem diferenças
+                if not self.static_image_mode:
+                    print("AVISO: Retomando com static_image_mode=False. O resultado "
+                          "pode diferir levemente de uma análise sem interrupção.")
+
+        if frame_cache and checkpointer:
+            print("AVISO: O cache de frames não é usado junto com checkpoint.")
+        elif frame_cache:
+            sampler = frame_cache.wrap(
+                self.video_path, sampler, sampling_parameters, total_frames)
+
+        print(f"Iniciando análise do vídeo...")
+        print(f"Total de frames: {total_frames}, FPS: {fps}")
+        print(f"Estratégia de amostragem: {sampler.describe()['estrategia']}")
+        if self.results['frames_analisados']:
+            print(f"Retomando após {self.results['frames_analisados']} frames já analisados")
+
+        self._run_analysis(sampler, pipeline, queue_size,
+                           live_report, live_interval, checkpointer)
+
+        self._release_capture()
+        self.results['amostragem'] = sampler.describe()
+
+        if self._features:
+            self._features.save(feature_file, {
+                'arquivo_analisado': self.video_path,
+                'timestamp': self.results['timestamp'],
+                'frames_analisados': self.results['frames_analisados'],
+                'amostragem': self.results['amostragem'],
+                'limiares': self.thresholds
+            })
+
+        # Processa resultados finais
+        self._process_final_results()
+
+        if checkpointer:
+            checkpointer.remove()
+
+        return self.results
+
+    def _run_analysis(self, sampler, pipeline=False, queue_size=8,
+                      live_report=None, live_interval=60.0, checkpoint=None):
+        """Analisa os frames entregues pelo amostrador"""
+        processed_count = self.results['frames_analisados']
+        last_flush = time.monotonic()
+
+        # Com checkpoint, o estado do amostrador é capturado junto com cada
+        # frame (na thread de decodificação, quando há pipeline), pois o
+        # amostrador pode estar à frente do frame em análise
+        def prepare(frame):
+            state = sampler.state_dict() if checkpoint else None
+            return self._prepare_frame(frame), state
+
+        if pipeline:
+            frames = DecodeAheadPipeline(sampler, prepare, queue_size)
+        else:
+            frames = ((frame_count, frame, prepare(frame))
+                      for frame_count, frame in sampler)
+
+        # Processa apenas os frames amostrados para otimizar
+        for frame_count, frame, (rgb_frame, sampler_state) in frames:
             processed_count += 1
             self.results['frames_analisados'] = processed_count
 
-            # Converte para RGB para o MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Detecta face
-            results_face = self.face_mesh.process(rgb_frame)
-
-            if results_face.multi_face_landmarks:
-                for face_landmarks in results_face.multi_face_landmarks:
-                    # Análise de expressão facial
-                    expression_data, indicators, depression_score = self.analyze_facial_expression(
-                        face_landmarks.landmark, frame.shape
-                    )
-
-                    self.results['depressao']['expressoes_detectadas'].append(
-                        expression_data)
-                    self.results['depressao']['score_depressao'] += depression_score
-                    if indicators:
-                        self.results['depressao']['indicadores'].extend(
-                            indicators)
-
-                    # Calcula bounding box da face
-                    h, w = frame.shape[:2]
-                    x_coords = [landmark.x *
-                               w for landmark in face_landmarks.landmark]
-                    y_coords = [landmark.y *
-                               h for landmark in face_landmarks.landmark]
-
-                    x_min, x_max = int(min(x_coords)), int(max(x_coords))
-                    y_min, y_max = int(min(y_coords)), int(max(y_coords))
-
-                    face_region = (x_min, y_min, x_max - x_min, y_max - y_min)
-
-                    # Detecção de hematomas e marcas
-                    bruises, marks = self.detect_bruises_and_marks(
-                        frame, face_region)
-
-                    if bruises:
-                        self.results['hematomas']['detectados'].extend(bruises)
-                        self.results['hematomas']['score_risco'] += len(
-                            bruises) * 3
-
-                    if marks:
-                        self.results['marcas']['detectadas'].extend(marks)
+            self._analyze_frame(frame, rgb_frame)
 
             if processed_count % 10 == 0:
                 print(f"Processados {processed_count} frames...")
 
-                    self.cap.release()
-
-                    # Processa resultados finais
-                    self._process_final_results()
-
-                    return self.results
-
-                    def _process_final_results(self):
-                    """Processa e sumariza os resultados finais"""
-                    # Média do score de depressão
-                    if self.results['frames_analisados'] > 0:
-            self.results['depressao']['score_depressao'] /= self.results['frames_analisados']
-
-                    # Remove indicadores duplicados
-        self.results['depressao']['indicadores'] = list(set(
-            self.results['depressao']['indicadores']
-        ))
-
-            # Agrupa hematomas por localização
-        location_count = defaultdict(int)
-            for bruise in self.results['hematomas']['detectados']:
-            location_count[bruise['location']] += 1
-
-        self.results['hematomas']['localizacoes'] = dict(location_count)
+            if live_report and time.monotonic() - last_flush >= live_interval:
+                self.results['amostragem'] = sampler.describe()
+                self.snapshot_report(live_report)
+                last_flush = time.monotonic()
+
+            if checkpoint and checkpoint.due():
+                checkpoint.save(sampler_state, self._checkpoint_state())
+
+        if pipeline:
+            self.results['pipeline'] = frames.stats()
+
+    def _checkpoint_state(self):
+        """Estado do analisador gravado no checkpoint"""
+        return {
+            'results': self.results,
+            'features': self._features
+        }
+
+    def _restore_checkpoint_state(self, state):
+        """Restaura o estado gravado por _checkpoint_state"""
+        self.results = state['results']
+        self._features = state['features']
+
+    def analyze_video_parallel(self, workers=None, sample_rate=30,
+                               sampling_strategy='auto', segments=None):
+        """Analisa o vídeo em segmentos de tempo, um processo por segmento
+
+        Cada processo usa seu próprio VideoCapture e FaceMesh (em modo de
+        imagem estática). O resultado combinado não depende do número de
+        processos. Ver parallel_analysis.py.
+        """
+        return analyze_video_segments(
+            self, workers, segments, sample_rate, sampling_strategy,
+            {'static_image_mode': True, 'thresholds': self.thresholds})
+
+    def _prepare_frame(self, frame):
+        """Converte para RGB para o MediaPipe"""
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def _analyze_frame(self, frame, rgb_frame):
+        """Analisa expressões, hematomas e marcas de um frame amostrado"""
+        # Detecta face
+        results_face = self.face_mesh.process(rgb_frame)
+
+        if not results_face.multi_face_landmarks:
+            return
 
-            # Agrupa marcas por tipo
-            mark_types= defaultdict(int)
-            for mark in self.results['marcas']['detectadas']:
-            mark_types[mark['type']] += 1
+        for face_landmarks in results_face.multi_face_landmarks:
+            # Converte os landmarks uma única vez para um array (N, 3)
+            points = landmarks_to_array(face_landmarks)
 
-        self.results['marcas']['tipos'] = dict(mark_types)
+            # Análise de expressão facial
+            expression_data, indicators, depression_score = self.analyze_facial_expression(
+                points, frame.shape
+            )
 
-            def generate_report(self, output_path='analysis_report.json'):
-            """Gera relatório completo da análise"""
-            # Interpretação dos resultados
+            self.results['depressao']['expressoes_detectadas'].append(
+                expression_data)
+            self.results['depressao']['score_depressao'] += depression_score
+            if indicators:
+                self.results['depressao']['indicadores'].update(
+                    dict.fromkeys(indicators))
+
+            # Calcula bounding box da face
+            h, w = frame.shape[:2]
+            xy_min = points[:, :2].min(axis=0)
+            xy_max = points[:, :2].max(axis=0)
+
+            x_min, x_max = int(float(xy_min[0]) * w), int(float(xy_max[0]) * w)
+            y_min, y_max = int(float(xy_min[1]) * h), int(float(xy_max[1]) * h)
+
+            face_region = (x_min, y_min, x_max - x_min, y_max - y_min)
+
+            # Detecção de hematomas e marcas
+            bruise_contours, red_contours, roi_shape = self._face_contours(
+                frame, face_region)
+            bruises = self._contour_detections(
+                bruise_contours, roi_shape, self.thresholds['bruise_area'],
+                'hematoma_possivel')
+            marks = self._contour_detections(
+                red_contours, roi_shape, self.thresholds['mark_area'],
+                'marca_vermelha')
+
+            if self._features:
+                face_index = self._features.add_face(
+                    expression_data, face_region, roi_shape)
+                self._features.add_contours(face_index, KIND_BRUISE, bruise_contours)
+                self._features.add_contours(face_index, KIND_MARK, red_contours)
+
+            if bruises:
+                self.results['hematomas']['detectados'].extend(bruises)
+                self.results['hematomas']['score_risco'] += len(
+                    bruises) * self.thresholds['bruise_weight']
+
+            if marks:
+                self.results['marcas']['detectadas'].extend(marks)
+
+    def rescore(self, features):
+        """Recalcula os resultados a partir de features gravadas
+
+        features: um FeatureSet (ver feature_store.py). Os limiares deste
+        analisador são aplicados a todas as faces e contornos de uma vez,
+        sem abrir o vídeo; com os limiares da análise original, o relatório
+        é idêntico ao de generate_report.
+        """
+        faces = features.faces
+        contours = features.contours
+        limits = self.thresholds
+
+        self.results['timestamp'] = features.meta['timestamp']
+        self.results['frames_analisados'] = features.meta['frames_analisados']
+        self.results['amostragem'] = features.meta['amostragem']
+
+        # Expressões e indicadores de depressão
+        expressions = np.zeros(len(faces), EXPRESSION_FIELDS)
+        expressions['eye_openness'] = faces['eye_openness']
+        expressions['mouth_ratio'] = faces['mouth_ratio']
+        expressions['timestamp'] = faces['frame']
+        store = ColumnStore(EXPRESSION_FIELDS)
+        store.extend(expressions)
+
+        tired = faces['eye_openness'] < limits['eye_openness']
+        neutral = faces['mouth_ratio'] < limits['mouth_ratio']
+
+        # Indicadores na ordem em que apareceram (olhos antes da boca numa
+        # mesma face)
+        found = [(int(mask.argmax()), order, text) for order, (mask, text) in
+                 enumerate([(tired, 'Olhos com aparência cansada'),
+                            (neutral, 'Expressão facial neutra/triste')])
+                 if mask.any()]
+
+        self.results['depressao'] = {
+            'expressoes_detectadas': store,
+            'score_depressao': 2 * int(tired.sum() + neutral.sum()),
+            'indicadores': dict.fromkeys(text for _, _, text in sorted(found))
+        }
+
+        bruises = self._rescore_detections(
+            faces, contours, KIND_BRUISE, limits['bruise_area'], 'hematoma_possivel')
+        marks = self._rescore_detections(
+            faces, contours, KIND_MARK, limits['mark_area'], 'marca_vermelha')
+
+        self.results['hematomas'] = {
+            'detectados': bruises,
+            'localizacoes': [],
+            'score_risco': len(bruises) * limits['bruise_weight']
+        }
+        self.results['marcas'] = {'detectadas': marks, 'tipos': []}
+
+        self._finalized = False
+        self._process_final_results()
+        return self.results
+
+    def _rescore_detections(self, faces, contours, kind, area_range, label):
+        """Versão vetorizada de _contour_detections sobre features gravadas"""
+        min_area, max_area = area_range
+        selected = contours[(contours['kind'] == kind)
+                            & (contours['area'] > min_area)
+                            & (contours['area'] < max_area)]
+        roi = faces[selected['face']]
+
+        relative_x = (selected['x'] + selected['w'] / 2) / roi['roi_w']
+        relative_y = (selected['y'] + selected['h'] / 2) / roi['roi_h']
+
+        # Faixa horizontal e vertical de _determine_face_location; o texto de
+        # cada combinação vem do próprio método, com um ponto de cada faixa
+        column = np.where(relative_x < 0.35, 0, np.where(relative_x > 0.65, 2, 1))
+        row = np.where(relative_y < 0.33, 0, np.where(relative_y < 0.66, 1, 2))
+        centers = (0.0, 0.5, 1.0)
+        locations = [self._determine_face_location(rx, ry)
+                     for rx in centers for ry in centers]
+
+        rows = np.zeros(len(selected), DETECTION_FIELDS)
+        for name in ('area', 'x', 'y', 'w', 'h'):
+            rows[name] = selected[name]
+        rows['location'] = column * 3 + row
+
+        return DetectionStore.from_columns(rows, locations, [label])
+
+    def _current_aggregates(self):
+        """Agregados correntes no formato dos resultados finais
+
+        A soma dos scores e as contagens por localização e por tipo são
+        atualizadas a cada frame analisado, então o cálculo não depende do
+        tamanho do vídeo e não altera self.results.
+        """
+        score = self.results['depressao']['score_depressao']
+        if not self._finalized and self.results['frames_analisados'] > 0:
+            score /= self.results['frames_analisados']
+
+        return {
+            'score_depressao': score,
+            'indicadores': list(self.results['depressao']['indicadores']),
+            'localizacoes': dict(
+                self.results['hematomas']['detectados'].location_counts),
+            'tipos': dict(self.results['marcas']['detectadas'].type_counts)
+        }
+
+    def _process_final_results(self):
+        """Processa e sumariza os resultados finais"""
+        aggregates = self._current_aggregates()
+
+        # Média do score de depressão e indicadores únicos, na ordem em que
+        # apareceram
+        self.results['depressao']['score_depressao'] = aggregates['score_depressao']
+        self.results['depressao']['indicadores'] = aggregates['indicadores']
+
+        # Contagens por localização e por tipo
+        self.results['hematomas']['localizacoes'] = aggregates['localizacoes']
+        self.results['marcas']['tipos'] = aggregates['tipos']
+
+        self._finalized = True
+
+    def generate_report(self, output_path='analysis_report.json'):
+        """Gera relatório completo da análise"""
+        report = self._build_report(self._current_aggregates())
+        self._write_report(report, output_path)
+
+        return report
+
+    def snapshot_report(self, output_path=None):
+        """Relatório parcial, no formato de generate_report, a qualquer momento
+
+        Pode ser chamado durante a análise (por exemplo, de outra thread):
+        usa os agregados correntes e não altera self.results. Com
+        output_path, grava também os relatórios JSON e texto.
+        """
+        report = self._build_report(self._current_aggregates())
+        report['parcial'] = not self._finalized
+
+        if output_path:
+            self._write_report(report, output_path)
+
+        return report
+
+    def _build_report(self, aggregates):
+        """Monta o relatório a partir dos agregados de _current_aggregates"""
+        # Interpretação dos resultados
         report = {
             'arquivo_analisado': self.video_path,
             'timestamp_analise': self.results['timestamp'],
             'frames_analisados': self.results['frames_analisados'],
+            'amostragem': self.results['amostragem'],
 
             'analise_depressao': {
-              'score': round(self.results['depressao']['score_depressao'], 2),
-               'nivel': self._interpret_depression_score(
-                    self.results['depressao']['score_depressao']
+                'score': round(aggregates['score_depressao'], 2),
+                'nivel': self._interpret_depression_score(
+                    aggregates['score_depressao']
                 ),
-                'indicadores_encontrados': self.results['depressao']['indicadores'],
+                'indicadores_encontrados': aggregates['indicadores'],
                 'recomendacao': self._get_depression_recommendation(
-                    self.results['depressao']['score_depressao']
+                    aggregates['score_depressao']
                 )
             },
 
-                'analise_hematomas': {
-              'total_detectado': len(self.results['hematomas']['detectados']),
-               'score_risco': self.results['hematomas']['score_risco'],
+            'analise_hematomas': {
+                'total_detectado': len(self.results['hematomas']['detectados']),
+                'score_risco': self.results['hematomas']['score_risco'],
                 'nivel_risco': self._interpret_bruise_risk(
                     self.results['hematomas']['score_risco']
                 ),
-                'localizacoes': self.results['hematomas']['localizacoes'],
+                'localizacoes': aggregates['localizacoes'],
                 'recomendacao': self._get_bruise_recommendation(
                     self.results['hematomas']['score_risco'],
-                    self.results['hematomas']['localizacoes']
+                    aggregates['localizacoes']
                 )
             },
 
-                'analise_marcas': {
-              'total_detectado': len(self.results['marcas']['detectadas']),
-               'tipos': self.results['marcas']['tipos'],
+            'analise_marcas': {
+                'total_detectado': len(self.results['marcas']['detectadas']),
+                'tipos': aggregates['tipos'],
                 'recomendacao': self._get_marks_recommendation(
                     len(self.results['marcas']['detectadas'])
                 )
             }
-            }
-
-                # Salva relatório
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=4, ensure_ascii=False)
-
-                # Gera relatório em texto
-                self._generate_text_report(
-                report, output_path.replace('.json', '.txt'))
-
-                return report
-
-                def _interpret_depression_score(self, score):
-            """Interpreta o score de depressão"""
-            if score < 0.5:
-                return 'Baixo - Sem sinais significativos'
-                elif score < 1.5:
-                return 'Moderado - Alguns indicadores presentes'
-                else:
-                return 'Alto - Múltiplos indicadores presentes'
-
-                def _get_depression_recommendation(self, score):
-            """Retorna recomendação baseada no score de depressão"""
-            if score < 0.5:
-                return 'Não foram detectados sinais significativos de depressão nas expressões faciais.'
-                elif score < 1.5:
-                return 'Alguns indicadores de expressão facial podem sugerir cansaço ou tristeza. Recomenda-se observação e diálogo aberto.'
-                else:
-                return 'ATENÇÃO: Múltiplos indicadores detectados. Recomenda-se fortemente buscar avaliação profissional de saúde mental.'
-
-                def _interpret_bruise_risk(self, score):
-            """Interpreta o score de risco de hematomas"""
-            if score < 5:
-                return 'Baixo - Poucos ou nenhum hematoma detectado'
-                elif score < 15:
-                return 'Moderado - Alguns hematomas detectados'
-                else:
-                return 'ALTO - Múltiplos hematomas detectados'
-
-                def _get_bruise_recommendation(self, score, locations):
-            """Retorna recomendação baseada nos hematomas"""
-            if score < 5:
-                return 'Não foram detectados hematomas significativos.'
-                elif score < 15:
-                rec = 'Foram detectados alguns hematomas. '
-                if locations:
+        }
+
+        if self.results.get('pipeline'):
+            report['pipeline'] = self.results['pipeline']
+        if self.results.get('paralelismo'):
+            report['paralelismo'] = self.results['paralelismo']
+        if self.results.get('tempo_real'):
+            report['tempo_real'] = self.results['tempo_real']
+
+        return report
+
+    def _write_report(self, report, output_path):
+        """Grava os relatórios JSON e texto (arquivo temporário + rename)"""
+        with open(output_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        os.replace(output_path + '.tmp', output_path)
+
+        text_path = output_path.replace('.json', '.txt')
+        self._generate_text_report(report, text_path + '.tmp')
+        os.replace(text_path + '.tmp', text_path)
+
+    def _interpret_depression_score(self, score):
+        """Interpreta o score de depressão"""
+        if score < 0.5:
+            return 'Baixo - Sem sinais significativos'
+        elif score < 1.5:
+            return 'Moderado - Alguns indicadores presentes'
+        else:
+            return 'Alto - Múltiplos indicadores presentes'
+
+    def _get_depression_recommendation(self, score):
+        """Retorna recomendação baseada no score de depressão"""
+        if score < 0.5:
+            return 'Não foram detectados sinais significativos de depressão nas expressões faciais.'
+        elif score < 1.5:
+            return 'Alguns indicadores de expressão facial podem sugerir cansaço ou tristeza. Recomenda-se observação e diálogo aberto.'
+        else:
+            return 'ATENÇÃO: Múltiplos indicadores detectados. Recomenda-se fortemente buscar avaliação profissional de saúde mental.'
+
+    def _interpret_bruise_risk(self, score):
+        """Interpreta o score de risco de hematomas"""
+        if score < 5:
+            return 'Baixo - Poucos ou nenhum hematoma detectado'
+        elif score < 15:
+            return 'Moderado - Alguns hematomas detectados'
+        else:
+            return 'ALTO - Múltiplos hematomas detectados'
+
+    def _get_bruise_recommendation(self, score, locations):
+        """Retorna recomendação baseada nos hematomas"""
+        if score < 5:
+            return 'Não foram detectados hematomas significativos.'
+        elif score < 15:
+            rec = 'Foram detectados alguns hematomas. '
+            if locations:
                 rec += f'Localizações: {", ".join(locations.keys())}. '
-                rec += 'Recomenda-se investigar a origem dessas marcas.'
-                return rec
-                else:
-                return f'ALERTA: Múltiplos hematomas detectados em diversas regiões. Localizações: {", ".join(locations.keys())}. RECOMENDAÇÃO URGENTE: Avaliação médica e/ou avaliação de segurança pessoal. Em caso de violência doméstica, ligue 180 (Central de Atendimento à Mulher).'
-
-                def _get_marks_recommendation(self, count):
-            """Retorna recomendação baseada nas marcas"""
-            if count < 3:
-                return 'Poucas ou nenhuma marca detectada.'
-                elif count < 8:
-                return 'Algumas marcas vermelhas foram detectadas. Podem ser irritações cutâneas, arranhões ou outros problemas de pele. Recomenda-se observação.'
-                else:
-                return 'Múltiplas marcas detectadas. Recomenda-se avaliação dermatológica ou médica para investigar possíveis problemas de saúde da pele.'
-
-                def _generate_text_report(self, report, output_path):
-            """Gera relatório em formato texto legível"""
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("="*80 + "\n")
-                f.write("RELATÓRIO DE ANÁLISE DE VÍDEO\n")
-                f.write(
+            rec += 'Recomenda-se investigar a origem dessas marcas.'
+            return rec
+        else:
+            return f'ALERTA: Múltiplos hematomas detectados em diversas regiões. Localizações: {", ".join(locations.keys())}. RECOMENDAÇÃO URGENTE: Avaliação médica e/ou avaliação de segurança pessoal. Em caso de violência doméstica, ligue 180 (Central de Atendimento à Mulher).'
+
+    def _get_marks_recommendation(self, count):
+        """Retorna recomendação baseada nas marcas"""
+        if count < 3:
+            return 'Poucas ou nenhuma marca detectada.'
+        elif count < 8:
+            return 'Algumas marcas vermelhas foram detectadas. Podem ser irritações cutâneas, arranhões ou outros problemas de pele. Recomenda-se observação.'
+        else:
+            return 'Múltiplas marcas detectadas. Recomenda-se avaliação dermatológica ou médica para investigar possíveis problemas de saúde da pele.'
+
+    def _generate_text_report(self, report, output_path):
+        """Gera relatório em formato texto legível"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("="*80 + "\n")
+            f.write("RELATÓRIO DE ANÁLISE DE VÍDEO\n")
+            f.write(
                 "Detecção de Sinais de Depressão, Hematomas e Problemas de Saúde\n")
-                f.write("="*80 + "\n\n")
-
-                f.write(f"Arquivo Analisado: {report['arquivo_analisado']}\n")
-                f.write(f"Data da Análise: {report['timestamp_analise']}\n")
-                f.write(f"Frames Analisados: {report['frames_analisados']}\n\n")
-
-                f.write("-"*80 + "\n")
-                f.write("1. ANÁLISE DE SINAIS DE DEPRESSÃO (Expressões Faciais)\n")
-                f.write("-"*80 + "\n")
+            f.write("="*80 + "\n\n")
+
+            f.write(f"Arquivo Analisado: {report['arquivo_analisado']}\n")
+            f.write(f"Data da Análise: {report['timestamp_analise']}\n")
+            f.write(f"Frames Analisados: {report['frames_analisados']}\n")
+            if report.get('parcial'):
+                f.write("RELATÓRIO PARCIAL: análise em andamento\n")
+            if report['amostragem']:
                 f.write(
+                    f"Amostragem: {format_sampling_summary(report['amostragem'])}\n")
+            f.write("\n")
+
+            f.write("-"*80 + "\n")
+            f.write("1. ANÁLISE DE SINAIS DE DEPRESSÃO (Expressões Faciais)\n")
+            f.write("-"*80 + "\n")
+            f.write(
                 f"Score de Depressão: {report['analise_depressao']['score']}\n")
-                f.write(f"Nível: {report['analise_depressao']['nivel']}\n\n")
+            f.write(f"Nível: {report['analise_depressao']['nivel']}\n\n")
 
-                if report['analise_depressao']['indicadores_encontrados']:
+            if report['analise_depressao']['indicadores_encontrados']:
                 f.write("Indicadores Encontrados:\n")
                 for ind in report['analise_depressao']['indicadores_encontrados']:
                     f.write(f"  • {ind}\n")
-                else:
+            else:
                 f.write("Nenhum indicador significativo encontrado.\n")
 
-                f.write(
+            f.write(
                 f"\nRecomendação: {report['analise_depressao']['recomendacao']}\n\n")
 
-                f.write("-"*80 + "\n")
-                f.write("2. ANÁLISE DE HEMATOMAS (Possível Violência Doméstica)\n")
-                f.write("-"*80 + "\n")
-                f.write(
+            f.write("-"*80 + "\n")
+            f.write("2. ANÁLISE DE HEMATOMAS (Possível Violência Doméstica)\n")
+            f.write("-"*80 + "\n")
+            f.write(
                 f"Total de Hematomas Detectados: {report['analise_hematomas']['total_detectado']}\n")
-                f.write(
+            f.write(
                 f"Score de Risco: {report['analise_hematomas']['score_risco']}\n")
-                f.write(
+            f.write(
                 f"Nível de Risco: {report['analise_hematomas']['nivel_risco']}\n\n")
 
-                if report['analise_hematomas']['localizacoes']:
+            if report['analise_hematomas']['localizacoes']:
                 f.write("Localizações dos Hematomas:\n")
                 for loc, count in report['analise_hematomas']['localizacoes'].items():
                     f.write(f"  • {loc}: {count} ocorrência(s)\n")
-                else:
+            else:
                 f.write("Nenhum hematoma detectado.\n")
 
-                f.write(
+            f.write(
                 f"\nRecomendação: {report['analise_hematomas']['recomendacao']}\n\n")
 
-                f.write("-"*80 + "\n")
-                f.write("3. ANÁLISE DE MARCAS E MACHUCADOS (Problemas de Saúde)\n")
-                f.write("-"*80 + "\n")
-                f.write(
+            f.write("-"*80 + "\n")
+            f.write("3. ANÁLISE DE MARCAS E MACHUCADOS (Problemas de Saúde)\n")
+            f.write("-"*80 + "\n")
+            f.write(
                 f"Total de Marcas Detectadas: {report['analise_marcas']['total_detectado']}\n\n")
 
-                if report['analise_marcas']['tipos']:
+            if report['analise_marcas']['tipos']:
                 f.write("Tipos de Marcas:\n")
                 for tipo, count in report['analise_marcas']['tipos'].items():
                     f.write(f"  • {tipo}: {count} ocorrência(s)\n")
-                else:
+            else:
                 f.write("Nenhuma marca significativa detectada.\n")
 
-                f.write(
+            f.write(
                 f"\nRecomendação: {report['analise_marcas']['recomendacao']}\n\n")
 
-                f.write("="*80 + "\n")
-                f.write("IMPORTANTE:\n")
-                f.write(
+            f.write("="*80 + "\n")
+            f.write("IMPORTANTE:\n")
+            f.write(
                 "Esta análise é baseada em processamento de imagem por computador e deve ser\n")
-                f.write(
+            f.write(
                 "considerada como uma ferramenta de triagem, não um diagnóstico definitivo.\n")
-                f.write("Recomenda-se sempre consulta com profissionais qualificados.\n")
-                f.write("="*80 + "\n")
+            f.write("Recomenda-se sempre consulta com profissionais qualificados.\n")
+            f.write("="*80 + "\n")
 
 
-                def main():
-            """Função principal para executar a análise"""
-            video_path = 'data/YTDown.com_YouTube_Media_5t_FoFzVcsA_001_720p.mp4'
+def main():
+    """Função principal para executar a análise"""
+    video_path = 'data/YTDown.com_YouTube_Media_5t_FoFzVcsA_001_720p.mp4'
 
-            if not os.path.exists(video_path):
+    if not os.path.exists(video_path):
         print(f"ERRO: Vídeo não encontrado em {video_path}")
-            return
+        return
 
-            print("="*80)
-                print("SISTEMA DE ANÁLISE DE VÍDEO")
-                print("Detecção de Sinais de Depressão, Hematomas e Problemas de Saúde")
-                print("="*80)
-                print()
+    print("="*80)
+    print("SISTEMA DE ANÁLISE DE VÍDEO")
+    print("Detecção de Sinais de Depressão, Hematomas e Problemas de Saúde")
+    print("="*80)
+    print()
 
-                # Cria analisador
-                analyzer = VideoAnalyzer(video_path)
+    # Cria analisador
+    analyzer = VideoAnalyzer(video_path)
 
-                # Executa análise
-                print("Iniciando análise do vídeo...")
-                results = analyzer.analyze_video(sample_rate=30)
+    # Executa análise
+    print("Iniciando análise do vídeo...")
+    results = analyzer.analyze_video(sample_rate=30)
 
-                print("\nAnálise concluída!")
-                print(f"Total de frames analisados: {results['frames_analisados']}")
+    print("\nAnálise concluída!")
+    print(f"Total de frames analisados: {results['frames_analisados']}")
 
-                # Gera relatório
-                print("\nGerando relatórios...")
-                report = analyzer.generate_report('analysis_report.json')
+    # Gera relatório
+    print("\nGerando relatórios...")
+    report = analyzer.generate_report('analysis_report.json')
 
-                print("\n" + "="*80)
-                print("RESUMO DOS RESULTADOS")
-                print("="*80)
+    print("\n" + "="*80)
+    print("RESUMO DOS RESULTADOS")
+    print("="*80)
 
-                print(f"\n1. DEPRESSÃO:")
-                print(f"   Score: {report['analise_depressao']['score']}")
-                print(f"   Nível: {report['analise_depressao']['nivel']}")
+    print(f"\n1. DEPRESSÃO:")
+    print(f"   Score: {report['analise_depressao']['score']}")
+    print(f"   Nível: {report['analise_depressao']['nivel']}")
 
-                print(f"\n2. HEMATOMAS:")
-                print(
+    print(f"\n2. HEMATOMAS:")
+    print(
         f"   Total Detectado: {report['analise_hematomas']['total_detectado']}")
-                print(f"   Nível de Risco: {report['analise_hematomas']['nivel_risco']}")
+    print(f"   Nível de Risco: {report['analise_hematomas']['nivel_risco']}")
 
-                print(f"\n3. MARCAS:")
-                print(f"   Total Detectado: {report['analise_marcas']['total_detectado']}")
+    print(f"\n3. MARCAS:")
+    print(f"   Total Detectado: {report['analise_marcas']['total_detectado']}")
 
-                print("\n" + "="*80)
-                print("Relatórios salvos:")
-                print("  • analysis_report.json (formato JSON)")
-                print("  • analysis_report.txt (formato texto)")
-                print("="*80)
+    print("\n" + "="*80)
+    print("Relatórios salvos:")
+    print("  • analysis_report.json (formato JSON)")
+    print("  • analysis_report.txt (formato texto)")
+    print("="*80)
 
 
-                if __name__ == "__main__":
-                main()
+if __name__ == "__main__":
+    main()